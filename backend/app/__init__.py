@@ -0,0 +1,5 @@
+import time
+
+# Reference point for the startup timing report (app.startup): the first import of
+# anything under app/, before FastAPI and the routers are loaded.
+IMPORT_STARTED = time.perf_counter()
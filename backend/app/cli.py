@@ -0,0 +1,151 @@
+"""Command-line maintenance tools.
+
+Usage: python -m app.cli <command> [options]   (run from backend/)
+"""
+
+import argparse
+import asyncio
+import io
+import sys
+from pathlib import Path
+
+from app.database import (
+    DEFAULT_HOUSEHOLD,
+    HOUSEHOLD_ID,
+    household,
+    household_ids,
+    init_db,
+    use_household,
+)
+from app.services.backup import create_backup
+from app.services.importer import check_utf8, detect_format, import_entries
+from app.services.storage import collect_garbage, migrate_legacy_uploads
+from app.services.tiering import tier_uploads
+
+
+async def _import_entries(args: argparse.Namespace) -> int:
+    fmt = args.format or detect_format(args.path.name)
+    if fmt is None:
+        print("Cannot detect format; pass --format csv|ndjson", file=sys.stderr)
+        return 2
+
+    with args.path.open("rb") as raw:
+        try:
+            check_utf8(raw)
+        except UnicodeDecodeError:
+            print("File must be UTF-8 encoded", file=sys.stderr)
+            return 2
+        await init_db()
+        lines = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        result = await import_entries(lines, fmt, dedupe=args.dedupe)
+
+    for error in result.errors:
+        print(f"line {error.line}: {error.error}", file=sys.stderr)
+    print(
+        f"Imported {result.imported} entries, {result.duplicates} duplicates skipped, "
+        f"{result.error_count} errors"
+    )
+    return 1 if result.error_count else 0
+
+
+async def _backup(args: argparse.Namespace) -> int:
+    result = await create_backup(include_images=args.images)
+    print(
+        f"Wrote {result.name} ({result.size_bytes / 1024:.1f} KB, "
+        f"{result.image_count} images, {result.images_copied} new) in {result.duration_ms:.0f}ms"
+    )
+    return 0
+
+
+async def _gc(_args: argparse.Namespace) -> int:
+    await init_db()
+    result = await collect_garbage()
+    print(
+        f"Removed {result.removed} of {result.scanned} blobs, "
+        f"{result.reclaimed_bytes / 1024 / 1024:.1f} MB reclaimed"
+    )
+    return 0
+
+
+async def _migrate_storage(_args: argparse.Namespace) -> int:
+    await init_db()
+    moved = await migrate_legacy_uploads()
+    print(f"Moved {moved} upload files into the blob store")
+    return 0
+
+
+async def _tier(args: argparse.Namespace) -> int:
+    await init_db()
+    try:
+        result = await tier_uploads(args.limit)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    before_mb, after_mb = result.bytes_before / 1024 / 1024, result.bytes_after / 1024 / 1024
+    print(
+        f"Transcoded {result.tiered} images ({before_mb:.1f} MB -> {after_mb:.1f} MB), "
+        f"{result.retained} kept, {result.failed} failed"
+    )
+    return 1 if result.failed else 0
+
+
+async def _migrate(_args: argparse.Namespace) -> int:
+    for household_id in household_ids():
+        with use_household(household_id):
+            migrated = await init_db()
+        print(f"{household_id}: {'migrated' if migrated else 'current'}")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    parser.add_argument(
+        "--household", default=DEFAULT_HOUSEHOLD, help="Household database to operate on"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import-entries", help="Bulk-import entries from a CSV or NDJSON file"
+    )
+    import_parser.add_argument("path", type=Path)
+    import_parser.add_argument("--format", choices=("csv", "ndjson"))
+    import_parser.add_argument(
+        "--dedupe", action="store_true", help="Skip rows that match an existing entry"
+    )
+
+    backup_parser = commands.add_parser("backup", help="Write a compressed database snapshot")
+    backup_parser.add_argument(
+        "--images", action="store_true", help="Also bundle referenced upload images"
+    )
+
+    commands.add_parser("migrate", help="Bring every household database to the current schema")
+    commands.add_parser("gc", help="Remove upload blobs no upload references")
+    commands.add_parser(
+        "migrate-storage", help="Move flat upload files into the content-addressed blob store"
+    )
+    tier_parser = commands.add_parser(
+        "tier", help="Transcode originals of long-reviewed uploads to save space"
+    )
+    tier_parser.add_argument("--limit", type=int)
+
+    args = parser.parse_args(argv)
+    if not HOUSEHOLD_ID.match(args.household):
+        parser.error(f"invalid household id {args.household!r}")
+    household.set(args.household)
+    if args.command == "import-entries":
+        return asyncio.run(_import_entries(args))
+    if args.command == "backup":
+        return asyncio.run(_backup(args))
+    if args.command == "migrate":
+        return asyncio.run(_migrate(args))
+    if args.command == "gc":
+        return asyncio.run(_gc(args))
+    if args.command == "migrate-storage":
+        return asyncio.run(_migrate_storage(args))
+    if args.command == "tier":
+        return asyncio.run(_tier(args))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
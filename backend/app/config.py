@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -11,14 +12,98 @@ class Settings(BaseSettings):
     anthropic_api_key: str = ""
     openai_api_key: str = ""
     llm_model: str = "claude-sonnet-4-20250514"
+    # Optional second provider ("anthropic" | "openai") raced against the primary when it
+    # is slower than its usual latency percentile; empty disables hedging.
+    llm_hedge_provider: str = ""
+    llm_hedge_model: str = ""
+    llm_hedge_percentile: float = 0.95
+    # Hedge delay used until enough latency samples have been collected.
+    llm_hedge_delay_s: float = 30.0
+    # Split dense pages into this many overlapping horizontal bands extracted in
+    # parallel (0 or 1 = whole page in one call). Requires the 'tiling' extra (Pillow).
+    llm_tile_bands: int = 0
+    # Fraction of a band's height shared with each neighbour.
+    llm_tile_overlap: float = 0.15
+    # Shared HTTP pool for LLM API calls: connections kept alive between uploads, idle
+    # expiry, and HTTP/2 (requires the 'http2' extra).
+    llm_max_connections: int = 10
+    llm_keepalive_expiry_s: float = 120
+    llm_http2: bool = False
+    llm_connect_timeout_s: float = 10
+    # Per-read socket timeout, and overall deadline per LLM call including SDK retries
+    # (0 = no deadline).
+    llm_read_timeout_s: float = 120
+    llm_request_deadline_s: float = 300
+    # Constrain replies to the entry JSON schema (Anthropic tool use, OpenAI structured
+    # outputs); off sends the prompt alone and parses the bare JSON array it asks for.
+    llm_structured_output: bool = True
+    # Backfill mode: pending uploads per provider message batch, and seconds between
+    # checks on submitted batches (0 disables the background poller).
+    llm_batch_size: int = 100
+    llm_batch_poll_interval_s: float = 60
     # Default to an external location so multiple checkouts/worktrees share one data store.
     # Override via UPLOAD_DIR / DATABASE_PATH in .env. Leading ~ is expanded.
     upload_dir: str = "~/.babylog/uploads"
     database_path: str = "~/.babylog/data/babylog.db"
+    # Databases of households other than the default one (X-Household header), one file
+    # each, and how many households keep read connections open at once (LRU).
+    households_dir: str = "~/.babylog/data/households"
+    household_pool_cache: int = 8
+    # Stem Russian query words (and match them as prefixes) in /api/entries/search.
+    search_stemming: bool = True
+    backup_dir: str = "~/.babylog/backups"
+    # Snapshots kept; older ones (and blobs only they reference) are pruned after each run.
+    backup_retention: int = 7
+    # Hours between scheduled backups; 0 disables scheduled mode.
+    backup_interval_hours: float = 0
+    backup_include_images: bool = False
+    # Online backup pacing: pages copied per step and pause between steps.
+    backup_pages_per_step: int = 256
+    backup_step_sleep_ms: int = 5
+    # Hours between storage GC passes removing orphaned upload blobs; 0 disables them.
+    storage_gc_interval_hours: float = 24
+    # Storage tiering: originals of uploads reviewed this many days ago are re-encoded to
+    # STORAGE_TIER_FORMAT (webp | jpeg) at this quality by a process pool of this size,
+    # every STORAGE_TIER_INTERVAL_HOURS (0 disables). Requires the 'tiering' extra (Pillow).
+    storage_tier_after_days: int = 30
+    storage_tier_format: str = "webp"
+    storage_tier_quality: int = 80
+    storage_tier_workers: int = 2
+    storage_tier_interval_hours: float = 0
+    # Number of pooled read-only SQLite connections used for concurrent dashboard queries.
+    read_pool_size: int = 4
+    # PRAGMA profile applied to every SQLite connection. NORMAL sync is durable in WAL
+    # mode except for the last transactions before a power loss.
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_mmap_size_mb: int = 128
+    sqlite_cache_size_kib: int = 8192
+    sqlite_temp_store: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    sqlite_busy_timeout_ms: int = 5000
+    # Database maintenance every DB_MAINTENANCE_INTERVAL_S (0 disables): a passive WAL
+    # checkpoint while requests are coming in; after DB_MAINTENANCE_IDLE_S without one, a
+    # truncating checkpoint, incremental vacuum of up to DB_VACUUM_MAX_PAGES free pages
+    # and, every DB_OPTIMIZE_INTERVAL_HOURS, PRAGMA optimize.
+    db_maintenance_interval_s: float = 300
+    db_maintenance_idle_s: float = 60
+    db_optimize_interval_hours: float = 6
+    db_vacuum_max_pages: int = 2048
+    # Days deleted rows stay visible to GET /api/changes; clients that last synced before
+    # that get a full snapshot. Pruned by the idle maintenance pass.
+    sync_tombstone_days: int = 30
+    # Event-loop watchdog (off by default): samples loop lag every
+    # LOOP_WATCHDOG_INTERVAL_MS into the "event_loop" metrics and logs the stack of
+    # whatever blocks the loop for longer than LOOP_WATCHDOG_THRESHOLD_MS.
+    loop_watchdog: bool = False
+    loop_watchdog_interval_ms: int = 100
+    loop_watchdog_threshold_ms: int = 250
+    # Seconds a worker's claim on an upload lasts without renewal (renewed every third of
+    # it while processing), and seconds between sweeps taking over lapsed claims.
+    job_lease_s: int = 120
+    job_sweep_interval_s: float = 60
     backend_port: int = 3849
     frontend_url: str = "http://localhost:5174/babylog"
 
-    @field_validator("upload_dir", "database_path", mode="after")
+    @field_validator("upload_dir", "database_path", "backup_dir", "households_dir", mode="after")
     @classmethod
     def _expand_path(cls, v: str) -> str:
         return str(Path(v).expanduser())
@@ -1,22 +1,61 @@
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+import asyncio
+import re
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 
 import aiosqlite
 
 from app.config import settings
 
-SCHEMA = """
+# Each household has its own database file (shard), so families don't share a writer
+# lock. The default household is settings.database_path; the others live in
+# households_dir as <id>.db. The household of the current request or job is held in a
+# context variable, set from the X-Household header (see main.py).
+DEFAULT_HOUSEHOLD = "default"
+HOUSEHOLD_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+household: ContextVar[str] = ContextVar("household", default=DEFAULT_HOUSEHOLD)
+
+# Entries of the same type, subtype and value within this many minutes of each other
+# (from different uploads) are treated as duplicates; see services/duplicates.py.
+DUPLICATE_WINDOW_MIN = 10
+
+# "type|subtype|value|bucket", where bucket is the occurred_at time in DUPLICATE_WINDOW_MIN
+# steps (zero-padded so text order is time order). NULL if occurred_at doesn't parse.
+FINGERPRINT_COLUMN = f"""fingerprint TEXT GENERATED ALWAYS AS (
+        CASE WHEN strftime('%s', occurred_at) IS NOT NULL THEN
+            entry_type || '|' || COALESCE(subtype, '') || '|' || COALESCE(value, '') || '|'
+            || printf('%010d', CAST(strftime('%s', occurred_at) AS INTEGER)
+                               / {DUPLICATE_WINDOW_MIN * 60})
+        END
+    ) VIRTUAL"""
+
+SCHEMA = f"""
 CREATE TABLE IF NOT EXISTS uploads (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     filename        TEXT NOT NULL,
     filepath        TEXT NOT NULL,
     status          TEXT NOT NULL DEFAULT 'pending',
     error_message   TEXT,
+    -- 1 when parsing salvaged what it could from malformed or truncated model output.
+    partial         INTEGER NOT NULL DEFAULT 0,
     created_at      TEXT NOT NULL DEFAULT (datetime('now')),
     processed_at    TEXT,
     reviewed        INTEGER NOT NULL DEFAULT 0,
-    reviewed_at     TEXT
+    reviewed_at     TEXT,
+    batch_id        TEXT,
+    kind            TEXT NOT NULL DEFAULT 'image',
+    -- Content hash of the stored file; uploads with equal hashes share one blob.
+    sha256          TEXT,
+    -- 'original', 'retained' (kept after a tiering attempt) or the transcoded format.
+    tier            TEXT NOT NULL DEFAULT 'original',
+    version         INTEGER NOT NULL DEFAULT 0,
+    -- Worker processing the upload (see services/leases.py) and until when its claim
+    -- holds; a worker that dies stops renewing, and the lease lapses.
+    claimed_by      TEXT,
+    lease_expires_at TEXT
 );
 
 CREATE INDEX IF NOT EXISTS idx_uploads_status ON uploads(status);
@@ -35,7 +74,10 @@ CREATE TABLE IF NOT EXISTS entries (
     raw_text        TEXT,
     created_at      TEXT NOT NULL DEFAULT (datetime('now')),
     updated_at      TEXT NOT NULL DEFAULT (datetime('now')),
-    confirmed       INTEGER NOT NULL DEFAULT 0
+    confirmed       INTEGER NOT NULL DEFAULT 0,
+    duplicate_of    INTEGER REFERENCES entries(id) ON DELETE SET NULL,
+    version         INTEGER NOT NULL DEFAULT 0,
+    {FINGERPRINT_COLUMN}
 );
 
 CREATE INDEX IF NOT EXISTS idx_entries_date ON entries(date);
@@ -49,6 +91,109 @@ CREATE TABLE IF NOT EXISTS settings (
 );
 """
 
+# Full-text index over raw_text/notes. It stores its own copy with ё folded into е
+# (unicode61 treats them as different letters) and is kept in sync by triggers.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE entries_fts USING fts5(
+    raw_text, notes, tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER entries_fts_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, raw_text, notes) VALUES (
+        new.id,
+        replace(replace(new.raw_text, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(new.notes, 'ё', 'е'), 'Ё', 'Е')
+    );
+END;
+
+CREATE TRIGGER entries_fts_ad AFTER DELETE ON entries BEGIN
+    DELETE FROM entries_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER entries_fts_au AFTER UPDATE OF raw_text, notes ON entries BEGIN
+    DELETE FROM entries_fts WHERE rowid = old.id;
+    INSERT INTO entries_fts (rowid, raw_text, notes) VALUES (
+        new.id,
+        replace(replace(new.raw_text, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(new.notes, 'ё', 'е'), 'Ё', 'Е')
+    );
+END;
+
+INSERT INTO entries_fts (rowid, raw_text, notes)
+SELECT id,
+       replace(replace(raw_text, 'ё', 'е'), 'Ё', 'Е'),
+       replace(replace(notes, 'ё', 'е'), 'Ё', 'Е')
+FROM entries;
+"""
+
+
+def connection_pragmas() -> str:
+    """The PRAGMA profile (settings.sqlite_*) run on every new connection."""
+    return (
+        "PRAGMA foreign_keys=ON;"
+        f"PRAGMA synchronous={settings.sqlite_synchronous};"
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms};"
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib};"
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024};"
+        f"PRAGMA temp_store={settings.sqlite_temp_store};"
+    )
+
+
+# Change tracking for GET /api/changes. sync_state.version is a counter bumped by every
+# insert, update and delete on entries and uploads; the row takes the new value as its
+# `version`, and a deleted row leaves a tombstone carrying it. Tombstones older than
+# SYNC_TOMBSTONE_DAYS are pruned by maintenance, which records the highest pruned
+# version so clients that synced before it know to start over.
+SYNC_TABLES = ("entries", "uploads")
+
+_VERSION_TRIGGERS = """
+CREATE INDEX idx_{table}_version ON {table}(version);
+
+CREATE TRIGGER {table}_version_ai AFTER INSERT ON {table} BEGIN
+    UPDATE sync_state SET version = version + 1;
+    UPDATE {table} SET version = (SELECT version FROM sync_state) WHERE id = new.id;
+END;
+
+-- The WHEN clause skips the trigger's own version update.
+CREATE TRIGGER {table}_version_au AFTER UPDATE ON {table}
+WHEN new.version = old.version BEGIN
+    UPDATE sync_state SET version = version + 1;
+    UPDATE {table} SET version = (SELECT version FROM sync_state) WHERE id = new.id;
+END;
+
+CREATE TRIGGER {table}_version_ad AFTER DELETE ON {table} BEGIN
+    UPDATE sync_state SET version = version + 1;
+    INSERT INTO tombstones (version, table_name, row_id)
+    VALUES ((SELECT version FROM sync_state), '{table}', old.id);
+END;
+"""
+
+SYNC_SCHEMA = """
+CREATE TABLE sync_state (
+    id              INTEGER PRIMARY KEY CHECK (id = 1),
+    version         INTEGER NOT NULL,
+    pruned_through  INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE tombstones (
+    version         INTEGER PRIMARY KEY,
+    table_name      TEXT NOT NULL,
+    row_id          INTEGER NOT NULL,
+    deleted_at      TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- Rows that predate change tracking are numbered: entries by id, then uploads after them.
+UPDATE entries SET version = id;
+UPDATE uploads SET version = id + (SELECT COALESCE(MAX(id), 0) FROM entries);
+INSERT INTO sync_state (id, version)
+SELECT 1, (SELECT COALESCE(MAX(id), 0) FROM entries) + (SELECT COALESCE(MAX(id), 0) FROM uploads);
+""" + "".join(_VERSION_TRIGGERS.format(table=table) for table in SYNC_TABLES)
+
+
+# Stored in PRAGMA user_version. Bump it whenever SCHEMA, FTS_SCHEMA or _migrate
+# changes: init_db skips all schema work when the database is already at this version.
+SCHEMA_VERSION = 7
+
 
 async def _migrate(db: aiosqlite.Connection) -> None:
     """Run migrations for columns added after initial schema."""
@@ -57,6 +202,22 @@ async def _migrate(db: aiosqlite.Connection) -> None:
     if "confirmed" not in columns:
         await db.execute("ALTER TABLE entries ADD COLUMN confirmed INTEGER NOT NULL DEFAULT 0")
         await db.commit()
+    if "version" not in columns:
+        await db.execute("ALTER TABLE entries ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        await db.commit()
+    if "duplicate_of" not in columns:
+        await db.execute(
+            "ALTER TABLE entries ADD COLUMN duplicate_of INTEGER"
+            " REFERENCES entries(id) ON DELETE SET NULL"
+        )
+        await db.commit()
+    cursor = await db.execute("PRAGMA table_xinfo(entries)")
+    if "fingerprint" not in {row[1] for row in await cursor.fetchall()}:
+        await db.execute(f"ALTER TABLE entries ADD COLUMN {FINGERPRINT_COLUMN}")
+        await db.commit()
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entries_fingerprint ON entries(fingerprint, occurred_at)"
+    )
 
     cursor = await db.execute("PRAGMA table_info(uploads)")
     upload_columns = {row[1] for row in await cursor.fetchall()}
@@ -66,21 +227,206 @@ async def _migrate(db: aiosqlite.Connection) -> None:
     if "reviewed_at" not in upload_columns:
         await db.execute("ALTER TABLE uploads ADD COLUMN reviewed_at TEXT")
         await db.commit()
+    if "batch_id" not in upload_columns:
+        await db.execute("ALTER TABLE uploads ADD COLUMN batch_id TEXT")
+        await db.commit()
+    if "kind" not in upload_columns:
+        await db.execute("ALTER TABLE uploads ADD COLUMN kind TEXT NOT NULL DEFAULT 'image'")
+        await db.commit()
+    if "sha256" not in upload_columns:
+        await db.execute("ALTER TABLE uploads ADD COLUMN sha256 TEXT")
+        await db.commit()
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads(sha256)")
+    if "version" not in upload_columns:
+        await db.execute("ALTER TABLE uploads ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        await db.commit()
+    if "tier" not in upload_columns:
+        await db.execute("ALTER TABLE uploads ADD COLUMN tier TEXT NOT NULL DEFAULT 'original'")
+        await db.commit()
+    if "partial" not in upload_columns:
+        await db.execute("ALTER TABLE uploads ADD COLUMN partial INTEGER NOT NULL DEFAULT 0")
+        await db.commit()
+    if "claimed_by" not in upload_columns:
+        await db.execute("ALTER TABLE uploads ADD COLUMN claimed_by TEXT")
+        await db.commit()
+    if "lease_expires_at" not in upload_columns:
+        await db.execute("ALTER TABLE uploads ADD COLUMN lease_expires_at TEXT")
+        await db.commit()
+
+    cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE name='entries_fts'")
+    if not await cursor.fetchone():
+        # Creates the index, its sync triggers, and backfills existing entries.
+        await db.executescript(FTS_SCHEMA)
+
+    cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE name='sync_state'")
+    if not await cursor.fetchone():
+        # Creates the version triggers and numbers existing rows.
+        await db.executescript(SYNC_SCHEMA)
+
+    # Incremental vacuum (see services/maintenance.py) needs auto_vacuum set, which an
+    # existing file only picks up with a full VACUUM; new files get it before SCHEMA.
+    cursor = await db.execute("PRAGMA auto_vacuum")
+    row = await cursor.fetchone()
+    if row and row[0] != 2:
+        await db.commit()
+        await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        await db.execute("VACUUM")
+
+
+def database_path(household_id: str | None = None) -> str:
+    """Database file of a household (default: the current one)."""
+    household_id = household_id or household.get()
+    if household_id == DEFAULT_HOUSEHOLD:
+        return settings.database_path
+    return str(Path(settings.households_dir) / f"{household_id}.db")
+
 
+def household_ids() -> list[str]:
+    """The default household followed by every household shard on disk."""
+    shards = sorted(path.stem for path in Path(settings.households_dir).glob("*.db"))
+    return [DEFAULT_HOUSEHOLD, *(name for name in shards if HOUSEHOLD_ID.match(name))]
 
-async def init_db() -> None:
-    Path(settings.database_path).parent.mkdir(parents=True, exist_ok=True)
-    async with aiosqlite.connect(settings.database_path) as db:
+
+@contextmanager
+def use_household(household_id: str) -> Iterator[None]:
+    """Run the enclosed block (and tasks it starts) against another household's shard."""
+    token = household.set(household_id)
+    try:
+        yield
+    finally:
+        household.reset(token)
+
+
+# Shard paths whose schema has been brought up to date by this process.
+_ready: set[str] = set()
+_ready_lock = asyncio.Lock()
+
+
+async def init_db(path: str | None = None) -> bool:
+    """Create or migrate the schema of a shard (default: the current household's).
+    Returns False if it was already current."""
+    path = path or database_path()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    async with aiosqlite.connect(path) as db:
+        cursor = await db.execute("PRAGMA user_version")
+        row = await cursor.fetchone()
+        if row and row[0] == SCHEMA_VERSION:
+            _ready.add(path)
+            return False
+
+        # WAL mode and auto_vacuum are persistent, so they only need setting when the
+        # schema is created (auto_vacuum only takes effect before the first table).
+        await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
         await db.execute("PRAGMA journal_mode=WAL")
-        await db.execute("PRAGMA foreign_keys=ON")
+        await db.executescript(connection_pragmas())
         await db.executescript(SCHEMA)
         await _migrate(db)
+        await db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
         await db.commit()
+    _ready.add(path)
+    return True
+
+
+async def _open_shard(path: str) -> None:
+    """Migrate a shard the first time this process touches it.
+
+    The default database is initialised in lifespan; other households are opened
+    lazily, so startup cost doesn't grow with the number of shards.
+    """
+    if path in _ready:
+        return
+    async with _ready_lock:
+        if path not in _ready:
+            await init_db(path)
 
 
 @asynccontextmanager
 async def get_db() -> AsyncGenerator[aiosqlite.Connection]:
-    async with aiosqlite.connect(settings.database_path) as db:
+    path = database_path()
+    await _open_shard(path)
+    async with aiosqlite.connect(path) as db:
         db.row_factory = aiosqlite.Row
-        await db.execute("PRAGMA foreign_keys=ON")
+        await db.executescript(connection_pragmas())
         yield db
+
+
+class ReadPool:
+    """A small pool of long-lived, query-only connections for concurrent reads.
+
+    WAL mode lets readers run alongside the writer, and each aiosqlite connection
+    runs on its own thread, so queries on different pooled connections execute in
+    parallel instead of queueing behind one another.
+    """
+
+    def __init__(self, path: str, size: int) -> None:
+        self.path = path
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[aiosqlite.Connection] = []
+        self._closed = False
+
+    async def acquire(self) -> aiosqlite.Connection:
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            conn = await aiosqlite.connect(self.path)
+            conn.row_factory = aiosqlite.Row
+            await conn.executescript(connection_pragmas() + "PRAGMA query_only=ON;")
+        except BaseException:
+            self._slots.release()
+            raise
+        return conn
+
+    async def release(self, conn: aiosqlite.Connection) -> None:
+        if self._closed:
+            await conn.close()
+        else:
+            self._idle.append(conn)
+        self._slots.release()
+
+    async def close(self) -> None:
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.close()
+
+
+# Read pools by shard path, least recently used first. At most
+# settings.household_pool_cache households keep connections open.
+_read_pools: OrderedDict[str, ReadPool] = OrderedDict()
+
+
+async def close_read_pool() -> None:
+    """Close every household's read pool."""
+    while _read_pools:
+        _, pool = _read_pools.popitem()
+        await pool.close()
+
+
+async def _read_pool(path: str) -> ReadPool:
+    pool = _read_pools.get(path)
+    if pool is not None:
+        _read_pools.move_to_end(path)
+        return pool
+    await _open_shard(path)
+    # A concurrent first request may have created it while this one awaited the shard.
+    pool = _read_pools.get(path)
+    if pool is not None:
+        return pool
+    pool = _read_pools[path] = ReadPool(path, settings.read_pool_size)
+    while len(_read_pools) > max(settings.household_pool_cache, 1):
+        # Connections of the evicted pool still in use are closed on release.
+        _, evicted = _read_pools.popitem(last=False)
+        await evicted.close()
+    return pool
+
+
+@asynccontextmanager
+async def get_read_db() -> AsyncGenerator[aiosqlite.Connection]:
+    """Borrow a pooled read-only connection. Use get_db() for anything that writes."""
+    pool = await _read_pool(database_path())
+    conn = await pool.acquire()
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
@@ -1,3 +1,5 @@
+import asyncio
+import importlib
 import logging
 import time
 from collections.abc import AsyncGenerator
@@ -6,11 +8,19 @@ from pathlib import Path
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.config import settings
-from app.database import get_db, init_db
-from app.routers import dashboard, entries, uploads
-from app.routers import settings as settings_router
+from app.database import (
+    HOUSEHOLD_ID,
+    close_read_pool,
+    init_db,
+    use_household,
+)
+from app.services.leases import acquire_scheduler_lock, release_scheduler_lock
+from app.services.maintenance import activity
+from app.services.providers import clients
+from app.startup import startup
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +32,67 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None]:
         format="%(asctime)s %(levelname)s %(name)s: %(message)s",
         datefmt="%H:%M:%S",
     )
-    await init_db()
+    with startup.step("init_db"):
+        migrated = await init_db()
+    logger.info("Schema %s", "migrated" if migrated else "current; skipped schema setup")
     Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
-    # Reset any uploads stuck in 'processing' back to 'pending'
-    async with get_db() as db:
-        await db.execute("UPDATE uploads SET status='pending' WHERE status='processing'")
-        await db.commit()
+    tasks = []
+    with startup.step("background_tasks"):
+        # Uploads left behind by a dead process (this one before a restart, or another
+        # worker) are taken over once their leases lapse; live leases are left alone.
+        from app.services.upload_processor import run_lease_sweeper, sweep_expired
+
+        if settings.job_sweep_interval_s > 0:
+            tasks.append(asyncio.create_task(run_lease_sweeper(settings.job_sweep_interval_s)))
+        else:
+            tasks.append(asyncio.create_task(sweep_expired()))
+        # With several workers (run_production.sh), only one runs the schedulers.
+        if acquire_scheduler_lock():
+            if settings.backup_interval_hours > 0:
+                from app.services.backup import run_backup_scheduler
+
+                tasks.append(
+                    asyncio.create_task(run_backup_scheduler(settings.backup_interval_hours))
+                )
+            if settings.llm_batch_poll_interval_s > 0:
+                from app.services.batch_processor import run_batch_poller
+
+                tasks.append(
+                    asyncio.create_task(run_batch_poller(settings.llm_batch_poll_interval_s))
+                )
+            if settings.storage_gc_interval_hours > 0:
+                from app.services.storage import run_gc_scheduler
+
+                tasks.append(
+                    asyncio.create_task(run_gc_scheduler(settings.storage_gc_interval_hours))
+                )
+            if settings.db_maintenance_interval_s > 0:
+                from app.services.maintenance import run_maintenance_scheduler
+
+                interval_s = settings.db_maintenance_interval_s
+                tasks.append(asyncio.create_task(run_maintenance_scheduler(interval_s)))
+            if settings.storage_tier_interval_hours > 0:
+                from app.services.tiering import run_tier_scheduler
+
+                interval = settings.storage_tier_interval_hours
+                tasks.append(asyncio.create_task(run_tier_scheduler(interval)))
+    if settings.loop_watchdog:
+        from app.services.watchdog import watchdog
+
+        watchdog.interval_s = settings.loop_watchdog_interval_ms / 1000
+        watchdog.threshold_s = settings.loop_watchdog_threshold_ms / 1000
+        watchdog.start()
+    # LLM SDK clients are created on the first processing job (see ClientRegistry);
+    # shutdown still closes them.
+    startup.report()
     yield
+    for task in tasks:
+        task.cancel()
+    if settings.loop_watchdog:
+        await watchdog.stop()
+    release_scheduler_lock()
+    await clients.aclose()
+    await close_read_pool()
 
 
 app = FastAPI(
@@ -50,7 +114,8 @@ app.add_middleware(
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start = time.monotonic()
-    response = await call_next(request)
+    with activity.track():
+        response = await call_next(request)
     duration_ms = (time.monotonic() - start) * 1000
     logger.info(
         "%s %s %d %.0fms",
@@ -62,12 +127,38 @@ async def log_requests(request: Request, call_next):
     return response
 
 
-app.include_router(uploads.router)
-app.include_router(entries.router)
-app.include_router(dashboard.router)
-app.include_router(settings_router.router)
+@app.middleware("http")
+async def route_household(request: Request, call_next):
+    """Route the request (and background tasks it queues) to its household's database."""
+    household_id = request.headers.get("x-household")
+    if household_id is None:
+        return await call_next(request)
+    if not HOUSEHOLD_ID.match(household_id):
+        return JSONResponse(status_code=400, content={"detail": "Invalid X-Household"})
+    with use_household(household_id):
+        return await call_next(request)
+
+
+# Imported one by one so the startup report shows each router's import time.
+ROUTERS = (
+    "uploads",
+    "entries",
+    "changes",
+    "dashboard",
+    "settings",
+    "export",
+    "imports",
+    "admin",
+)
+for _name in ROUTERS:
+    with startup.step(f"import app.routers.{_name}"):
+        _module = importlib.import_module(f"app.routers.{_name}")
+    app.include_router(_module.router)
 
 
 @app.get("/health")
 async def health_check() -> dict[str, str]:
     return {"status": "ok"}
+
+
+startup.mark("import app.main")
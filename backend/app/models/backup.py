@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+
+class BackupSnapshot(BaseModel):
+    name: str
+    size_bytes: int
+    created_at: str
+    image_count: int = 0
+
+
+class BackupResult(BackupSnapshot):
+    images_copied: int = 0
+    removed: list[str] = []
+    duration_ms: float
+
+
+class BackupListResponse(BaseModel):
+    backups: list[BackupSnapshot]
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class BackfillResponse(BaseModel):
+    submitted: int = 0
+    batches: list[str] = []
+    # Uploads that could not be submitted (e.g. missing image file) and were marked failed.
+    failed: int = 0
+
+
+class BatchPollResponse(BaseModel):
+    ended: list[str] = []
+    done: int = 0
+    failed: int = 0
+    # Batches still being processed by the provider.
+    in_progress: int = 0
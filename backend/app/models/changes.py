@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+
+from app.models.entry import EntryResponse
+
+
+class UploadChange(BaseModel):
+    id: int
+    filename: str
+    status: str
+    error_message: str | None = None
+    # Done, but some of the model's output could not be read (see error_message).
+    partial: bool = False
+    created_at: str
+    processed_at: str | None = None
+    reviewed: bool = False
+    reviewed_at: str | None = None
+    kind: str = "image"
+
+
+class ChangesResponse(BaseModel):
+    # Pass as `since` on the next call.
+    version: int
+    # True if `since` predates pruned tombstones: drop the local copy and apply this
+    # response (a full snapshot) instead.
+    reset: bool = False
+    # More changes past `version`; call again right away.
+    has_more: bool = False
+    # Paging through a reset snapshot: pass `snapshot=true` on the next call.
+    snapshot: bool = False
+    entries: list[EntryResponse] = []
+    uploads: list[UploadChange] = []
+    deleted_entries: list[int] = []
+    deleted_uploads: list[int] = []
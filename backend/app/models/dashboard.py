@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from app.models.entry import EntryResponse
+
 
 class DashboardDay(BaseModel):
     date: str
@@ -34,3 +36,39 @@ class DashboardResponse(BaseModel):
     latest_weight: LatestWeight | None = None
     previous_weight: LatestWeight | None = None
     all_time_totals: AllTimeTotals | None = None
+
+
+class DashboardBundleResponse(BaseModel):
+    """Composite dashboard payload; sections not requested via `include` are null."""
+
+    from_date: str
+    to_date: str
+    days: list[DashboardDay] | None = None
+    latest_weight: LatestWeight | None = None
+    previous_weight: LatestWeight | None = None
+    all_time_totals: AllTimeTotals | None = None
+    feedings: list[EntryResponse] | None = None
+    diapers: list[EntryResponse] | None = None
+    weights: list[EntryResponse] | None = None
+    all_weights: list[EntryResponse] | None = None
+
+
+class TrendSeries(BaseModel):
+    # One value per day of the range; null where nothing was logged.
+    values: list[float | None]
+    # Trailing means keyed by window length in days ("3", "7", "14").
+    moving_averages: dict[str, list[float | None]]
+    slope_per_day: float | None = None
+    # Percentile band of the daily values over the trailing band window.
+    band_low: list[float | None]
+    band_high: list[float | None]
+
+
+class TrendsResponse(BaseModel):
+    from_date: str
+    to_date: str
+    dates: list[str]
+    band_days: int
+    band_percentiles: list[int]
+    # feeding_ml, feeding_count, diaper_count
+    series: dict[str, TrendSeries]
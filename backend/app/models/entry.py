@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 
 class EntryCreate(BaseModel):
@@ -33,9 +35,47 @@ class EntryResponse(BaseModel):
     confidence: str | None = None
     raw_text: str | None = None
     confirmed: bool = False
+    # Earlier entry from another upload this one likely duplicates (set on upload processing).
+    duplicate_of: int | None = None
     created_at: str
     updated_at: str
 
 
 class EntryListResponse(BaseModel):
     entries: list[EntryResponse]
+
+
+class EntrySearchHit(EntryResponse):
+    snippet: str
+    rank: float
+
+
+class EntrySearchResponse(BaseModel):
+    query: str
+    total: int
+    hits: list[EntrySearchHit]
+
+
+class DuplicateCluster(BaseModel):
+    entries: list[EntryResponse]
+
+
+class DuplicateListResponse(BaseModel):
+    clusters: list[DuplicateCluster]
+
+
+class DuplicateMerge(BaseModel):
+    keep_id: int
+    merge_ids: list[int]
+
+
+# An entry as the LLM transcribes it. Its JSON schema constrains the model's reply, so
+# the docstring (which would become the schema's description) is left out.
+class ExtractedEntry(BaseModel):
+    entry_type: Literal["feeding", "diaper", "weight", "pills"]
+    subtype: Literal["breast", "formula", "pee", "poo", "dry", "pee+poo", "vigantol"] | None
+    occurred_at: str = Field(description='"YYYY-MM-DD HH:MM" (or "HH:MM" where the prompt allows)')
+    value: float | None
+    notes: str | None
+    raw_text: str | None
+    confidence: Literal["high", "medium", "low"]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class HouseholdInfo(BaseModel):
+    id: str
+    baby_name: str | None = None
+    size_bytes: int
+    upload_count: int
+    entry_count: int
+    last_entry_at: str | None = None
+
+
+class HouseholdListResponse(BaseModel):
+    households: list[HouseholdInfo]
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+from app.models.entry import EntryCreate
+
+
+class ImportedEntry(EntryCreate):
+    # Carried over from an export, so a restored log keeps its review state.
+    confirmed: bool = False
+
+
+class ImportLineError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResponse(BaseModel):
+    imported: int = 0
+    duplicates: int = 0
+    error_count: int = 0
+    # Capped at MAX_REPORTED_ERRORS; error_count is the full total.
+    errors: list[ImportLineError] = []
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class MaintenanceResult(BaseModel):
+    checkpoint_mode: str
+    checkpoint_ms: float
+    # WAL frames before the checkpoint, and how many of them were copied to the database.
+    wal_pages: int = 0
+    checkpointed_pages: int = 0
+    # Set only for idle runs.
+    vacuum_ms: float | None = None
+    freed_pages: int = 0
+    optimize_ms: float | None = None
+    tombstones_pruned: int = 0
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class MetricsResponse(BaseModel):
+    # group (e.g. "llm:anthropic:<model>") -> counter name -> cumulative value
+    metrics: dict[str, dict[str, float]]
+
+
+class LoopStall(BaseModel):
+    # How long the loop had been blocked when its stack was sampled (at least the
+    # LOOP_WATCHDOG_THRESHOLD_MS).
+    blocked_ms: float
+    at: str
+    stack: str
+
+
+class LoopStallsResponse(BaseModel):
+    enabled: bool
+    stalls: list[LoopStall]
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class GCResult(BaseModel):
+    scanned: int
+    removed: int
+    reclaimed_bytes: int
+    duration_ms: float
+
+
+class TierResult(BaseModel):
+    tiered: int
+    retained: int
+    failed: int
+    bytes_before: int
+    bytes_after: int
+    duration_ms: float
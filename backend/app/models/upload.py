@@ -15,12 +15,15 @@ class UploadListItem(BaseModel):
     filename: str
     status: str
     error_message: str | None = None
+    # Done, but some of the model's output could not be read (see error_message).
+    partial: bool = False
     entry_count: int = 0
     date_counts: dict[str, int] = {}
     created_at: str
     processed_at: str | None = None
     reviewed: bool = False
     reviewed_at: str | None = None
+    kind: str = "image"
 
 
 class UploadListResponse(BaseModel):
@@ -32,12 +35,20 @@ class UploadDetailResponse(BaseModel):
     filename: str
     status: str
     error_message: str | None = None
+    # Done, but some of the model's output could not be read (see error_message).
+    partial: bool = False
     created_at: str
     processed_at: str | None = None
     reviewed: bool = False
     reviewed_at: str | None = None
+    kind: str = "image"
     entries: list[EntryResponse] = []
 
 
 class UploadUpdate(BaseModel):
     reviewed: bool | None = None
+
+
+class TextUploadCreate(BaseModel):
+    text: str
+    filename: str = "typed-log.txt"
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from app.models.backup import BackupListResponse, BackupResult
+from app.models.batch import BackfillResponse, BatchPollResponse
+from app.models.household import HouseholdListResponse
+from app.models.maintenance import MaintenanceResult
+from app.models.metrics import LoopStallsResponse, MetricsResponse
+from app.models.storage import GCResult, TierResult
+from app.services.backup import backup_lock, create_backup, list_backups
+from app.services.batch_processor import poll_batches, submit_backfill
+from app.services.households import list_households
+from app.services.maintenance import run_maintenance
+from app.services.metrics import metrics
+from app.services.storage import collect_garbage, gc_lock
+from app.services.tiering import tier_lock, tier_uploads
+from app.services.watchdog import watchdog
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.post("/backup", status_code=201)
+async def backup(include_images: bool = False) -> BackupResult:
+    if backup_lock.locked():
+        raise HTTPException(status_code=409, detail="A backup is already running")
+    return await create_backup(include_images=include_images)
+
+
+@router.get("/backups")
+async def get_backups() -> BackupListResponse:
+    return BackupListResponse(backups=list_backups())
+
+
+@router.get("/metrics")
+async def get_metrics() -> MetricsResponse:
+    return MetricsResponse(metrics=metrics.snapshot())
+
+
+@router.get("/stalls")
+async def get_stalls() -> LoopStallsResponse:
+    """Latest event-loop stalls caught by the watchdog, with the blocking stack."""
+    return LoopStallsResponse(enabled=watchdog.running, stalls=list(watchdog.stalls))
+
+
+@router.get("/households")
+async def get_households() -> HouseholdListResponse:
+    """Every household database (the default one and each X-Household shard)."""
+    return HouseholdListResponse(households=await list_households())
+
+
+@router.post("/maintenance")
+async def maintenance() -> MaintenanceResult:
+    """Checkpoint, incrementally vacuum and optimize the household's database now."""
+    return await run_maintenance()
+
+
+@router.post("/backfill")
+async def backfill(limit: int | None = Query(default=None, ge=1)) -> BackfillResponse:
+    """Submit pending uploads to the provider's batch API instead of real-time calls."""
+    try:
+        return await submit_backfill(limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.post("/backfill/poll")
+async def backfill_poll() -> BatchPollResponse:
+    """Collect results of ended batches now rather than waiting for the poller."""
+    try:
+        return await poll_batches()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.post("/gc")
+async def gc() -> GCResult:
+    """Remove upload blobs no upload references and report the space reclaimed."""
+    if gc_lock.locked():
+        raise HTTPException(status_code=409, detail="Storage GC is already running")
+    return await collect_garbage()
+
+
+@router.post("/tier")
+async def tier(limit: int | None = Query(default=None, ge=1)) -> TierResult:
+    """Transcode originals of long-reviewed uploads to the space-efficient tier now."""
+    if tier_lock.locked():
+        raise HTTPException(status_code=409, detail="Storage tiering is already running")
+    try:
+        return await tier_uploads(limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
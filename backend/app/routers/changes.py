@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+
+from app.database import get_read_db
+from app.models.changes import ChangesResponse, UploadChange
+from app.routers.entries import entry_encoder
+from app.serialization import RowEncoder
+
+router = APIRouter(prefix="/api/changes", tags=["changes"])
+
+upload_change_encoder = RowEncoder(UploadChange)
+
+# Versions of the changes after `since`, in order; a row updated twice appears once.
+CHANGE_VERSIONS_SQL = """
+SELECT version FROM entries WHERE version > :since
+UNION ALL SELECT version FROM uploads WHERE version > :since
+UNION ALL SELECT version FROM tombstones WHERE version > :since
+ORDER BY version LIMIT 2 OFFSET :limit - 1
+"""
+
+
+@router.get("", response_model=ChangesResponse)
+async def get_changes(
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    snapshot: bool = False,
+) -> JSONResponse:
+    """Entries and uploads inserted, updated or deleted after version `since`.
+
+    Each change takes one version from a counter maintained by triggers (see
+    database.SYNC_SCHEMA), so a client holding a local copy syncs in O(changes):
+    apply the rows, drop the deleted ids, and pass the returned `version` next time.
+
+    A reset snapshot is paged like any other changes, but its pages end below the
+    pruned range; the client passes back `snapshot` so they aren't reset again.
+    """
+    async with get_read_db() as db:
+        # One read transaction, so the counter and the rows come from the same snapshot.
+        await db.execute("BEGIN")
+        try:
+            cursor = await db.execute("SELECT version, pruned_through FROM sync_state")
+            state = await cursor.fetchone()
+            assert state is not None
+            reset = not snapshot and since < state["pruned_through"]
+            if reset:
+                since = 0
+
+            cursor = await db.execute(CHANGE_VERSIONS_SQL, {"since": since, "limit": limit})
+            page = [row[0] for row in await cursor.fetchall()]
+            has_more = len(page) == 2
+            until = page[0] if has_more else state["version"]
+
+            window = (since, until)
+            cursor = await db.execute(
+                "SELECT * FROM entries WHERE version > ? AND version <= ? ORDER BY version", window
+            )
+            entries = entry_encoder.encode_many(await cursor.fetchall())
+            cursor = await db.execute(
+                "SELECT * FROM uploads WHERE version > ? AND version <= ? ORDER BY version", window
+            )
+            uploads = upload_change_encoder.encode_many(await cursor.fetchall())
+            cursor = await db.execute(
+                "SELECT table_name, row_id FROM tombstones WHERE version > ? AND version <= ?"
+                " ORDER BY version",
+                window,
+            )
+            deleted: dict[str, list[int]] = {"entries": [], "uploads": []}
+            for row in await cursor.fetchall():
+                deleted[row["table_name"]].append(row["row_id"])
+        finally:
+            await db.execute("COMMIT")
+
+    return JSONResponse(
+        {
+            "version": until,
+            "reset": reset,
+            "has_more": has_more,
+            "snapshot": (snapshot or reset) and has_more,
+            "entries": entries,
+            "uploads": uploads,
+            "deleted_entries": deleted["entries"],
+            "deleted_uploads": deleted["uploads"],
+        }
+    )
@@ -1,77 +1,61 @@
-from datetime import datetime, timedelta
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+from typing import Any
 
-from fastapi import APIRouter
+import aiosqlite
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 
-from app.database import get_db
-from app.models.dashboard import AllTimeTotals, DashboardDay, DashboardResponse, LatestWeight
+from app.database import get_db, get_read_db
+from app.models.dashboard import (
+    AllTimeTotals,
+    DashboardBundleResponse,
+    DashboardDay,
+    DashboardResponse,
+    LatestWeight,
+    TrendsResponse,
+)
+from app.routers.entries import fetch_entries
+from app.services.analytics import fetch_trends
+from app.services.coalesce import single_flight
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
+BUNDLE_SECTIONS = ("days", "weights", "feedings", "diapers", "totals")
 
-@router.get("")
-async def get_dashboard(
-    from_date: str | None = None,
-    to_date: str | None = None,
-) -> DashboardResponse:
+
+def _default_range(from_date: str | None, to_date: str | None) -> tuple[str, str]:
     if not from_date:
         from_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
     if not to_date:
         to_date = datetime.now().strftime("%Y-%m-%d")
+    return from_date, to_date
 
-    async with get_db() as db:
-        cursor = await db.execute(
-            """
-            SELECT
-                date,
-                SUM(CASE WHEN entry_type='feeding' THEN 1 ELSE 0 END) as feeding_count,
-                SUM(CASE WHEN entry_type='feeding' AND value IS NOT NULL THEN value ELSE 0 END) as feeding_total_ml,
-                SUM(CASE WHEN entry_type='feeding' AND subtype='breast' AND value IS NOT NULL THEN value ELSE 0 END) as feeding_breast_ml,
-                SUM(CASE WHEN entry_type='feeding' AND subtype='formula' AND value IS NOT NULL THEN value ELSE 0 END) as feeding_formula_ml,
-                SUM(CASE WHEN entry_type='diaper' AND subtype='pee' THEN 1 ELSE 0 END) as diaper_pee_count,
-                SUM(CASE WHEN entry_type='diaper' AND subtype='poo' THEN 1 ELSE 0 END) as diaper_poo_count,
-                SUM(CASE WHEN entry_type='diaper' AND subtype='dry' THEN 1 ELSE 0 END) as diaper_dry_count,
-                SUM(CASE WHEN entry_type='diaper' AND subtype='pee+poo' THEN 1 ELSE 0 END) as diaper_pee_poo_count
-            FROM entries
-            WHERE date >= ? AND date <= ?
-            GROUP BY date
-            ORDER BY date ASC
-            """,
-            (from_date, to_date),
-        )
-        day_rows = await cursor.fetchall()
-
-        # Latest weight
-        cursor = await db.execute(
-            """
-            SELECT value, occurred_at, date
-            FROM entries
-            WHERE entry_type='weight' AND value IS NOT NULL
-            ORDER BY occurred_at DESC
-            LIMIT 2
-            """
-        )
-        weight_rows = list(await cursor.fetchall())
-
-        # All-time totals
-        cursor = await db.execute(
-            """
-            SELECT
-                SUM(CASE WHEN entry_type='diaper'
-                    AND subtype != 'dry' THEN 1 ELSE 0 END),
-                SUM(CASE WHEN entry_type='diaper'
-                    AND subtype IN ('pee','pee+poo') THEN 1 ELSE 0 END),
-                SUM(CASE WHEN entry_type='diaper'
-                    AND subtype IN ('poo','pee+poo') THEN 1 ELSE 0 END),
-                SUM(CASE WHEN entry_type='feeding'
-                    AND subtype='breast' THEN 1 ELSE 0 END),
-                SUM(CASE WHEN entry_type='feeding'
-                    AND subtype='formula' THEN 1 ELSE 0 END)
-            FROM entries
-            """
-        )
-        totals_row = await cursor.fetchone()
 
-    days = [
+async def _fetch_days(db: aiosqlite.Connection, from_date: str, to_date: str) -> list[DashboardDay]:
+    cursor = await db.execute(
+        """
+        SELECT
+            date,
+            SUM(CASE WHEN entry_type='feeding' THEN 1 ELSE 0 END) as feeding_count,
+            SUM(CASE WHEN entry_type='feeding' AND value IS NOT NULL THEN value ELSE 0 END) as feeding_total_ml,
+            SUM(CASE WHEN entry_type='feeding' AND subtype='breast' AND value IS NOT NULL THEN value ELSE 0 END) as feeding_breast_ml,
+            SUM(CASE WHEN entry_type='feeding' AND subtype='formula' AND value IS NOT NULL THEN value ELSE 0 END) as feeding_formula_ml,
+            SUM(CASE WHEN entry_type='diaper' AND subtype='pee' THEN 1 ELSE 0 END) as diaper_pee_count,
+            SUM(CASE WHEN entry_type='diaper' AND subtype='poo' THEN 1 ELSE 0 END) as diaper_poo_count,
+            SUM(CASE WHEN entry_type='diaper' AND subtype='dry' THEN 1 ELSE 0 END) as diaper_dry_count,
+            SUM(CASE WHEN entry_type='diaper' AND subtype='pee+poo' THEN 1 ELSE 0 END) as diaper_pee_poo_count
+        FROM entries
+        WHERE date >= ? AND date <= ? AND duplicate_of IS NULL
+        GROUP BY date
+        ORDER BY date ASC
+        """,
+        (from_date, to_date),
+    )
+    day_rows = await cursor.fetchall()
+
+    return [
         DashboardDay(
             date=row["date"],
             feeding_total_ml=row["feeding_total_ml"] or 0,
@@ -86,6 +70,21 @@ async def get_dashboard(
         for row in day_rows
     ]
 
+
+async def _fetch_latest_weights(
+    db: aiosqlite.Connection,
+) -> tuple[LatestWeight | None, LatestWeight | None]:
+    cursor = await db.execute(
+        """
+        SELECT value, occurred_at, date
+        FROM entries
+        WHERE entry_type='weight' AND value IS NOT NULL AND duplicate_of IS NULL
+        ORDER BY occurred_at DESC
+        LIMIT 2
+        """
+    )
+    weight_rows = list(await cursor.fetchall())
+
     latest_weight = None
     previous_weight = None
     if weight_rows:
@@ -100,16 +99,57 @@ async def get_dashboard(
                 occurred_at=weight_rows[1]["occurred_at"],
                 date=weight_rows[1]["date"],
             )
+    return latest_weight, previous_weight
 
-    all_time_totals = None
-    if totals_row and totals_row[0]:
-        all_time_totals = AllTimeTotals(
-            diaper_total=totals_row[0] or 0,
-            diaper_pee=totals_row[1] or 0,
-            diaper_poo=totals_row[2] or 0,
-            feeding_breast=totals_row[3] or 0,
-            feeding_formula=totals_row[4] or 0,
-        )
+
+async def _fetch_all_time_totals(db: aiosqlite.Connection) -> AllTimeTotals | None:
+    cursor = await db.execute(
+        """
+        SELECT
+            SUM(CASE WHEN entry_type='diaper'
+                AND subtype != 'dry' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN entry_type='diaper'
+                AND subtype IN ('pee','pee+poo') THEN 1 ELSE 0 END),
+            SUM(CASE WHEN entry_type='diaper'
+                AND subtype IN ('poo','pee+poo') THEN 1 ELSE 0 END),
+            SUM(CASE WHEN entry_type='feeding'
+                AND subtype='breast' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN entry_type='feeding'
+                AND subtype='formula' THEN 1 ELSE 0 END)
+        FROM entries
+        WHERE duplicate_of IS NULL
+        """
+    )
+    totals_row = await cursor.fetchone()
+
+    if not totals_row or not totals_row[0]:
+        return None
+    return AllTimeTotals(
+        diaper_total=totals_row[0] or 0,
+        diaper_pee=totals_row[1] or 0,
+        diaper_poo=totals_row[2] or 0,
+        feeding_breast=totals_row[3] or 0,
+        feeding_formula=totals_row[4] or 0,
+    )
+
+
+@router.get("")
+async def get_dashboard(
+    from_date: str | None = None,
+    to_date: str | None = None,
+) -> DashboardResponse:
+    from_date, to_date = _default_range(from_date, to_date)
+    # Identical concurrent requests (several family members, aligned pollers) share one run.
+    return await single_flight.run(
+        "dashboard", (from_date, to_date), lambda: _dashboard(from_date, to_date)
+    )
+
+
+async def _dashboard(from_date: str, to_date: str) -> DashboardResponse:
+    async with get_db() as db:
+        days = await _fetch_days(db, from_date, to_date)
+        latest_weight, previous_weight = await _fetch_latest_weights(db)
+        all_time_totals = await _fetch_all_time_totals(db)
 
     return DashboardResponse(
         from_date=from_date,
@@ -119,3 +159,100 @@ async def get_dashboard(
         previous_weight=previous_weight,
         all_time_totals=all_time_totals,
     )
+
+
+@router.get("/trends", response_model=TrendsResponse)
+async def get_trends(from_date: str | None = None, to_date: str | None = None) -> JSONResponse:
+    """Moving averages (3/7/14 days), trend slopes and percentile bands of ml/day,
+    feedings/day and diapers/day. Days before the range are read as padding so the
+    averages are complete at its start."""
+    from_date, to_date = _default_range(from_date, to_date)
+    try:
+        import numpy  # noqa: F401
+    except ImportError as e:
+        raise HTTPException(
+            status_code=501, detail="Trends require numpy (install the 'analytics' extra)"
+        ) from e
+    try:
+        if date.fromisoformat(from_date) > date.fromisoformat(to_date):
+            raise ValueError("from_date is after to_date")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    async with get_read_db() as db:
+        return JSONResponse(await fetch_trends(db, from_date, to_date))
+
+
+async def _on_read_conn(query: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    async with get_read_db() as db:
+        return await query(db, *args)
+
+
+@router.get("/bundle", response_model=DashboardBundleResponse)
+async def get_dashboard_bundle(
+    from_date: str | None = None,
+    to_date: str | None = None,
+    include: str | None = None,
+) -> JSONResponse:
+    """Everything the dashboard page needs in one round trip.
+
+    `include` is a comma-separated subset of days, weights, feedings, diapers, totals
+    (default: all). Each query runs on its own pooled read connection concurrently.
+    """
+    from_date, to_date = _default_range(from_date, to_date)
+
+    sections = set(BUNDLE_SECTIONS)
+    if include:
+        sections = {s.strip() for s in include.split(",") if s.strip()}
+        unknown = sections - set(BUNDLE_SECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown include section(s): {', '.join(sorted(unknown))}"
+            )
+
+    bundle = await single_flight.run(
+        "dashboard_bundle",
+        (from_date, to_date, frozenset(sections)),
+        lambda: _bundle(from_date, to_date, sections),
+    )
+    return JSONResponse(bundle)
+
+
+async def _fetch_originals(
+    db: aiosqlite.Connection, entry_type: str, from_date: str | None, to_date: str
+) -> list[dict[str, Any]]:
+    """Entry lists for the charts, without linked duplicates, so they agree with the
+    day aggregates."""
+    return await fetch_entries(db, entry_type, from_date, to_date, exclude_duplicates=True)
+
+
+async def _bundle(from_date: str, to_date: str, sections: set[str]) -> dict[str, Any]:
+    queries: dict[str, Awaitable[Any]] = {}
+    if "days" in sections:
+        queries["days"] = _on_read_conn(_fetch_days, from_date, to_date)
+    if "weights" in sections:
+        queries["weights"] = _on_read_conn(_fetch_originals, "weight", from_date, to_date)
+        # All-time up to today, like /api/entries: a misdated future weight stays out.
+        today = datetime.now().strftime("%Y-%m-%d")
+        queries["all_weights"] = _on_read_conn(_fetch_originals, "weight", None, today)
+        queries["latest_weights"] = _on_read_conn(_fetch_latest_weights)
+    if "feedings" in sections:
+        queries["feedings"] = _on_read_conn(_fetch_originals, "feeding", from_date, to_date)
+    if "diapers" in sections:
+        queries["diapers"] = _on_read_conn(_fetch_originals, "diaper", from_date, to_date)
+    if "totals" in sections:
+        queries["all_time_totals"] = _on_read_conn(_fetch_all_time_totals)
+
+    results = dict(zip(queries, await asyncio.gather(*queries.values()), strict=True))
+    latest_weight, previous_weight = results.pop("latest_weights", (None, None))
+
+    # Entry lists are already JSON-ready dicts; only the small sections go through the model.
+    head = DashboardBundleResponse(
+        from_date=from_date,
+        to_date=to_date,
+        days=results.pop("days", None),
+        latest_weight=latest_weight,
+        previous_weight=previous_weight,
+        all_time_totals=results.pop("all_time_totals", None),
+    )
+    return {**head.model_dump(), **results}
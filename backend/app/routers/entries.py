@@ -1,12 +1,29 @@
 from datetime import datetime, timedelta
+from typing import Any
 
-from fastapi import APIRouter, HTTPException
+import aiosqlite
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
 
-from app.database import get_db
-from app.models.entry import EntryCreate, EntryListResponse, EntryResponse, EntryUpdate
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.models.entry import (
+    DuplicateListResponse,
+    DuplicateMerge,
+    EntryCreate,
+    EntryListResponse,
+    EntryResponse,
+    EntrySearchResponse,
+    EntryUpdate,
+)
+from app.serialization import RowEncoder
+from app.services.duplicates import find_clusters, same_cluster
+from app.services.search import build_match_query, search_entries
 
 router = APIRouter(prefix="/api/entries", tags=["entries"])
 
+entry_encoder = RowEncoder(EntryResponse)
+
 
 def _row_to_response(row) -> EntryResponse:
     return EntryResponse(
@@ -21,37 +38,153 @@ def _row_to_response(row) -> EntryResponse:
         confidence=row["confidence"],
         raw_text=row["raw_text"],
         confirmed=bool(row["confirmed"]),
+        duplicate_of=row["duplicate_of"],
         created_at=row["created_at"],
         updated_at=row["updated_at"],
     )
 
 
-@router.get("")
+def entries_query(
+    entry_type: str | None,
+    from_date: str | None,
+    to_date: str | None,
+    after: tuple[str, int] | None = None,
+    exclude_duplicates: bool = False,
+) -> tuple[str, list]:
+    """Build the time-ordered entries SELECT. A None date bound leaves that side open.
+
+    With `after`, an (occurred_at, id) key, only rows past it come back, ordered by
+    time then id, so a caller can page through them one short query at a time. `exclude_duplicates`
+    leaves out entries linked to an earlier one, as the dashboard aggregates do.
+    """
+    conditions: list[str] = []
+    params: list = []
+
+    if from_date:
+        conditions.append("date >= ?")
+        params.append(from_date)
+    if to_date:
+        conditions.append("date <= ?")
+        params.append(to_date)
+    if entry_type:
+        conditions.append("entry_type = ?")
+        params.append(entry_type)
+    if exclude_duplicates:
+        conditions.append("duplicate_of IS NULL")
+    if after is not None:
+        conditions.append("(occurred_at, id) > (?, ?)")
+        params.extend(after)
+
+    query = "SELECT * FROM entries"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY occurred_at ASC" + (", id ASC" if after is not None else "")
+    return query, params
+
+
+async def fetch_entries(
+    db: aiosqlite.Connection,
+    entry_type: str | None,
+    from_date: str | None,
+    to_date: str | None,
+    exclude_duplicates: bool = False,
+) -> list[dict[str, Any]]:
+    """Select entries ordered by time, encoded as EntryResponse-shaped dicts."""
+    query, params = entries_query(
+        entry_type, from_date, to_date, exclude_duplicates=exclude_duplicates
+    )
+    cursor = await db.execute(query, params)
+    rows = await cursor.fetchall()
+    return entry_encoder.encode_many(rows)
+
+
+@router.get("", response_model=EntryListResponse)
 async def list_entries(
     type: str | None = None,
     from_date: str | None = None,
     to_date: str | None = None,
-) -> EntryListResponse:
+) -> JSONResponse:
     # Default to last 7 days
     if not from_date:
         from_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
     if not to_date:
         to_date = datetime.now().strftime("%Y-%m-%d")
 
-    query = "SELECT * FROM entries WHERE date >= ? AND date <= ?"
-    params: list = [from_date, to_date]
+    async with get_db() as db:
+        entries = await fetch_entries(db, type, from_date, to_date)
+
+    return JSONResponse({"entries": entries})
+
+
+@router.get("/search", response_model=EntrySearchResponse)
+async def search(
+    q: str,
+    limit: int = Query(default=20, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+) -> JSONResponse:
+    """Full-text search over raw_text and notes, best matches first.
+
+    Words match by (stemmed) prefix; wrap text in double quotes for an exact phrase.
+    """
+    match = build_match_query(q, stemming=settings.search_stemming)
+    if match is None:
+        raise HTTPException(status_code=400, detail="Query has no searchable words")
+
+    async with get_read_db() as db:
+        total, hits = await search_entries(db, match, limit, offset)
 
-    if type:
-        query += " AND entry_type = ?"
-        params.append(type)
+    return JSONResponse({"query": q, "total": total, "hits": hits})
 
-    query += " ORDER BY occurred_at ASC"
+
+@router.get("/duplicates", response_model=DuplicateListResponse)
+async def list_duplicates(from_date: str | None = None, to_date: str | None = None) -> JSONResponse:
+    """Clusters of likely duplicate entries from different uploads, newest first.
+
+    Without dates the full history is scanned.
+    """
+    async with get_read_db() as db:
+        clusters = await find_clusters(db, from_date, to_date)
+
+    return JSONResponse({"clusters": [{"entries": cluster} for cluster in clusters]})
+
+
+@router.post("/duplicates/merge")
+async def merge_duplicates(payload: DuplicateMerge) -> EntryResponse:
+    """Keep one entry of a cluster and delete the others. The kept entry stays
+    confirmed if any merged entry was. Entries outside the keep_id's cluster get 409."""
+    merge_ids = sorted(set(payload.merge_ids) - {payload.keep_id})
+    if not merge_ids:
+        raise HTTPException(status_code=400, detail="No entries to merge")
 
     async with get_db() as db:
-        cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
+        ids = [payload.keep_id, *merge_ids]
+        placeholders = ",".join("?" * len(ids))
+        cursor = await db.execute(
+            "SELECT id, confirmed, fingerprint, upload_id,"
+            " CAST(strftime('%s', occurred_at) AS INTEGER) AS ts"
+            f" FROM entries WHERE id IN ({placeholders})",
+            ids,
+        )
+        rows = list(await cursor.fetchall())
+        if len(rows) != len(ids):
+            raise HTTPException(status_code=404, detail="Entry not found")
+        if not same_cluster(rows):
+            raise HTTPException(status_code=409, detail="Entries are not duplicates of one another")
 
-    return EntryListResponse(entries=[_row_to_response(r) for r in rows])
+        await db.execute(
+            "UPDATE entries SET confirmed=?, duplicate_of=NULL, updated_at=datetime('now')"
+            " WHERE id=?",
+            (int(any(row["confirmed"] for row in rows)), payload.keep_id),
+        )
+        await db.execute(
+            f"DELETE FROM entries WHERE id IN ({','.join('?' * len(merge_ids))})", merge_ids
+        )
+        await db.commit()
+
+        cursor = await db.execute("SELECT * FROM entries WHERE id=?", (payload.keep_id,))
+        row = await cursor.fetchone()
+
+    return _row_to_response(row)
 
 
 @router.post("", status_code=201)
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any, Literal, get_args
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.database import get_db
+from app.models.entry import EntryResponse
+from app.routers.entries import entries_query, entry_encoder
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+# Rows fetched per query; also the Parquet row-group size.
+BATCH_SIZE = 1000
+COLUMNS = tuple(EntryResponse.model_fields)
+
+ExportFormat = Literal["csv", "ndjson", "parquet"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+async def _entry_batches(
+    entry_type: str | None, from_date: str | None, to_date: str | None
+) -> AsyncGenerator[list[dict[str, Any]]]:
+    # Keyset pages in time order, each on its own short-lived connection rather than one
+    # cursor over the whole download: an open read transaction pins the WAL, so a slow
+    # client would hold off checkpoints for as long as it streams. A dedicated connection
+    # rather than the read pool, so a long export doesn't starve dashboard queries either.
+    after = ("", 0)
+    while True:
+        query, params = entries_query(entry_type, from_date, to_date, after=after)
+        async with get_db() as db:
+            cursor = await db.execute(f"{query} LIMIT ?", (*params, BATCH_SIZE))
+            rows = list(await cursor.fetchall())
+        if not rows:
+            return
+        after = (rows[-1]["occurred_at"], rows[-1]["id"])
+        yield entry_encoder.encode_many(rows)
+
+
+async def _csv_chunks(batches: AsyncIterator[list[dict[str, Any]]]) -> AsyncGenerator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    async for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _ndjson_chunks(batches: AsyncIterator[list[dict[str, Any]]]) -> AsyncGenerator[bytes]:
+    async for batch in batches:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch).encode("utf-8")
+
+
+class _DrainSink(io.RawIOBase):
+    """Write-only file the Parquet writer appends to; drained after every row group."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema() -> Any:
+    """Arrow schema of the exported columns, derived from EntryResponse like COLUMNS so
+    Parquet carries the same columns as CSV and NDJSON."""
+    import pyarrow as pa
+
+    arrow_types: dict[Any, Any] = {
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        bool: pa.bool_(),
+    }
+    fields = []
+    for name, field in EntryResponse.model_fields.items():
+        # `X | None` fields map by X; nullability is Arrow's default.
+        kinds = [t for t in get_args(field.annotation) if t is not type(None)]
+        fields.append((name, arrow_types[kinds[0] if kinds else field.annotation]))
+    return pa.schema(fields)
+
+
+async def _parquet_chunks(batches: AsyncIterator[list[dict[str, Any]]]) -> AsyncGenerator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+@router.get("/entries")
+async def export_entries(
+    format: ExportFormat = "csv",
+    type: str | None = None,
+    from_date: str | None = None,
+    to_date: str | None = None,
+) -> StreamingResponse:
+    """Stream entries in fixed-size batches. Without dates the full history is exported."""
+    if format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as e:
+            raise HTTPException(
+                status_code=501,
+                detail="Parquet export requires pyarrow (install the 'export' extra)",
+            ) from e
+
+    batches = _entry_batches(type, from_date, to_date)
+    if format == "csv":
+        chunks = _csv_chunks(batches)
+    elif format == "ndjson":
+        chunks = _ndjson_chunks(batches)
+    else:
+        chunks = _parquet_chunks(batches)
+
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="babylog-entries.{format}"'},
+    )
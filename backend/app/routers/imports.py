@@ -0,0 +1,38 @@
+import asyncio
+import io
+
+from fastapi import APIRouter, HTTPException, UploadFile
+
+from app.models.imports import ImportResponse
+from app.services.importer import ImportFormat, check_utf8, detect_format, import_entries
+
+router = APIRouter(prefix="/api/import", tags=["import"])
+
+
+@router.post("/entries")
+async def import_entries_file(
+    file: UploadFile,
+    format: ImportFormat | None = None,
+    dedupe: bool = False,
+) -> ImportResponse:
+    """Bulk-import entries from a CSV or NDJSON file (e.g. an /api/export download).
+
+    The format is taken from `format`, else from the file extension.
+    """
+    fmt = format or detect_format(file.filename or "")
+    if fmt is None:
+        raise HTTPException(
+            status_code=400, detail="Cannot detect format; pass format=csv or format=ndjson"
+        )
+
+    try:
+        await asyncio.to_thread(check_utf8, file.file)
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded") from e
+
+    # The upload is spooled by Starlette; read it line by line rather than all at once.
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await import_entries(lines, fmt, dedupe=dedupe)
+    finally:
+        lines.detach()
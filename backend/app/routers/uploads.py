@@ -1,57 +1,87 @@
+import asyncio
 import logging
-import uuid
-from pathlib import Path
 
+import aiosqlite
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Response, UploadFile
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 
-from app.config import settings
 from app.database import get_db
-from app.models.entry import EntryResponse
 from app.models.upload import (
+    TextUploadCreate,
     UploadDetailResponse,
     UploadListItem,
     UploadListResponse,
     UploadResponse,
     UploadUpdate,
 )
+from app.routers.entries import entry_encoder
+from app.serialization import RowEncoder
+from app.services.coalesce import single_flight
+from app.services.leases import queue_upload
+from app.services.storage import media_type, release, resolve, write_blob
+from app.services.text_parser import parse_text
 from app.services.upload_processor import process_upload
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/uploads", tags=["uploads"])
 
+upload_list_encoder = RowEncoder(UploadListItem)
+upload_detail_encoder = RowEncoder(UploadDetailResponse)
+
+
+async def _upload_detail(db: aiosqlite.Connection, upload_id: int) -> JSONResponse:
+    cursor = await db.execute("SELECT * FROM uploads WHERE id=?", (upload_id,))
+    upload = await cursor.fetchone()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    cursor = await db.execute(
+        "SELECT * FROM entries WHERE upload_id=? ORDER BY occurred_at ASC",
+        (upload_id,),
+    )
+    entry_rows = await cursor.fetchall()
+
+    detail = upload_detail_encoder.encode(upload)
+    detail["entries"] = entry_encoder.encode_many(entry_rows)
+    return JSONResponse(detail)
+
 
 @router.post("", status_code=201)
-async def create_upload(file: UploadFile, background_tasks: BackgroundTasks) -> UploadResponse:
+async def create_upload(
+    file: UploadFile, background_tasks: BackgroundTasks, defer: bool = False
+) -> UploadResponse:
+    """Store an image and queue it for parsing.
+
+    With `defer`, the upload stays pending for a later backfill batch
+    (POST /api/admin/backfill) instead of being processed right away.
+    """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No filename provided")
 
-    # Save file to disk
-    unique_name = f"{uuid.uuid4()}_{file.filename}"
-    upload_dir = Path(settings.upload_dir)
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    filepath = upload_dir / unique_name
-
+    # Save file to disk; a photo uploaded before reuses its blob
     content = await file.read()
-    filepath.write_bytes(content)
+    sha, filepath = await asyncio.to_thread(write_blob, content)
     size_mb = len(content) / 1024 / 1024
     logger.info("Upload received: %s (%.1f MB)", file.filename, size_mb)
 
     # Insert DB record
     async with get_db() as db:
         cursor = await db.execute(
-            "INSERT INTO uploads (filename, filepath, status) VALUES (?, ?, 'pending')",
-            (file.filename, str(filepath)),
+            "INSERT INTO uploads (filename, filepath, status, sha256) VALUES (?, ?, 'pending', ?)",
+            (file.filename, filepath, sha),
         )
-        await db.commit()
         upload_id = cursor.lastrowid
+        assert upload_id is not None
+        if not defer:
+            await queue_upload(db, upload_id)
+        await db.commit()
 
-    assert upload_id is not None
     logger.info("Upload saved: id=%d filename=%s (%.1f MB)", upload_id, file.filename, size_mb)
 
     # Queue background processing
-    background_tasks.add_task(process_upload, upload_id)
+    if not defer:
+        background_tasks.add_task(process_upload, upload_id)
 
     async with get_db() as db:
         cursor = await db.execute("SELECT * FROM uploads WHERE id=?", (upload_id,))
@@ -66,8 +96,60 @@ async def create_upload(file: UploadFile, background_tasks: BackgroundTasks) ->
     )
 
 
-@router.get("")
-async def list_uploads(status: str | None = None) -> UploadListResponse:
+@router.post("/text", status_code=201)
+async def create_text_upload(
+    payload: TextUploadCreate, background_tasks: BackgroundTasks
+) -> UploadResponse:
+    """Ingest a typed log (notes app, messenger) instead of a photo.
+
+    Lines are parsed by the local rule-based parser. If every line parses, the upload
+    is processed inline and returned as done; otherwise the leftover lines go to the
+    LLM in the background, as for images.
+    """
+    if not payload.text.strip():
+        raise HTTPException(status_code=400, detail="No text provided")
+
+    sha, filepath = await asyncio.to_thread(write_blob, payload.text.encode())
+
+    async with get_db() as db:
+        cursor = await db.execute(
+            "INSERT INTO uploads (filename, filepath, status, kind, sha256)"
+            " VALUES (?, ?, 'pending', 'text', ?)",
+            (payload.filename, filepath, sha),
+        )
+        upload_id = cursor.lastrowid
+        assert upload_id is not None
+        await queue_upload(db, upload_id)
+        await db.commit()
+
+    _, unparsed = parse_text(payload.text)
+    logger.info("Text upload saved: id=%d (%d lines for LLM)", upload_id, len(unparsed))
+    if unparsed:
+        background_tasks.add_task(process_upload, upload_id)
+    else:
+        await process_upload(upload_id)
+
+    async with get_db() as db:
+        cursor = await db.execute("SELECT * FROM uploads WHERE id=?", (upload_id,))
+        row = await cursor.fetchone()
+        assert row is not None
+
+    return UploadResponse(
+        id=row["id"],
+        filename=row["filename"],
+        status=row["status"],
+        created_at=row["created_at"],
+    )
+
+
+@router.get("", response_model=UploadListResponse)
+async def list_uploads(status: str | None = None) -> JSONResponse:
+    # The upload and review pages poll this; identical concurrent polls share one run.
+    uploads = await single_flight.run("uploads", status, lambda: _fetch_uploads(status))
+    return JSONResponse({"uploads": uploads})
+
+
+async def _fetch_uploads(status: str | None) -> list[dict]:
     query = """
         SELECT u.*, COUNT(e.id) as entry_count
         FROM uploads u
@@ -97,88 +179,40 @@ async def list_uploads(status: str | None = None) -> UploadListResponse:
             for dc_row in await dc_cursor.fetchall():
                 date_counts_map.setdefault(dc_row["upload_id"], {})[dc_row["date"]] = dc_row["cnt"]
 
-    return UploadListResponse(
-        uploads=[
-            UploadListItem(
-                id=row["id"],
-                filename=row["filename"],
-                status=row["status"],
-                error_message=row["error_message"],
-                entry_count=row["entry_count"],
-                date_counts=date_counts_map.get(row["id"], {}),
-                created_at=row["created_at"],
-                processed_at=row["processed_at"],
-                reviewed=bool(row["reviewed"]),
-                reviewed_at=row["reviewed_at"],
-            )
-            for row in rows
-        ]
-    )
+    uploads = upload_list_encoder.encode_many(rows)
+    for item in uploads:
+        item["date_counts"] = date_counts_map.get(item["id"], {})
+    return uploads
 
 
-@router.get("/{upload_id}")
-async def get_upload(upload_id: int) -> UploadDetailResponse:
+@router.get("/{upload_id}", response_model=UploadDetailResponse)
+async def get_upload(upload_id: int) -> JSONResponse:
     async with get_db() as db:
-        cursor = await db.execute("SELECT * FROM uploads WHERE id=?", (upload_id,))
-        upload = await cursor.fetchone()
-        if not upload:
-            raise HTTPException(status_code=404, detail="Upload not found")
-
-        cursor = await db.execute(
-            "SELECT * FROM entries WHERE upload_id=? ORDER BY occurred_at ASC",
-            (upload_id,),
-        )
-        entry_rows = await cursor.fetchall()
-
-    return UploadDetailResponse(
-        id=upload["id"],
-        filename=upload["filename"],
-        status=upload["status"],
-        error_message=upload["error_message"],
-        created_at=upload["created_at"],
-        processed_at=upload["processed_at"],
-        reviewed=bool(upload["reviewed"]),
-        reviewed_at=upload["reviewed_at"],
-        entries=[
-            EntryResponse(
-                id=e["id"],
-                upload_id=e["upload_id"],
-                entry_type=e["entry_type"],
-                subtype=e["subtype"],
-                occurred_at=e["occurred_at"],
-                date=e["date"],
-                value=e["value"],
-                notes=e["notes"],
-                confidence=e["confidence"],
-                raw_text=e["raw_text"],
-                confirmed=bool(e["confirmed"]),
-                created_at=e["created_at"],
-                updated_at=e["updated_at"],
-            )
-            for e in entry_rows
-        ],
-    )
+        return await _upload_detail(db, upload_id)
 
 
 @router.get("/{upload_id}/image")
 async def get_upload_image(upload_id: int) -> FileResponse:
     async with get_db() as db:
-        cursor = await db.execute("SELECT filepath, filename FROM uploads WHERE id=?", (upload_id,))
+        cursor = await db.execute(
+            "SELECT filepath, filename, tier FROM uploads WHERE id=?", (upload_id,)
+        )
         row = await cursor.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Upload not found")
 
-    filepath = Path(row["filepath"])
-    if not filepath.exists():
-        filepath = Path(settings.upload_dir) / filepath.name
-    if not filepath.exists():
+    filepath = resolve(row["filepath"])
+    if filepath is None:
         raise HTTPException(status_code=404, detail="Image file not found")
 
-    return FileResponse(filepath, filename=row["filename"])
+    # Tiered uploads are served as their transcoded format under the original name.
+    return FileResponse(
+        filepath, filename=row["filename"], media_type=media_type(row["filename"], row["tier"])
+    )
 
 
-@router.patch("/{upload_id}")
-async def update_upload(upload_id: int, payload: UploadUpdate) -> UploadDetailResponse:
+@router.patch("/{upload_id}", response_model=UploadDetailResponse)
+async def update_upload(upload_id: int, payload: UploadUpdate) -> JSONResponse:
     async with get_db() as db:
         cursor = await db.execute("SELECT id FROM uploads WHERE id=?", (upload_id,))
         if not await cursor.fetchone():
@@ -197,50 +231,13 @@ async def update_upload(upload_id: int, payload: UploadUpdate) -> UploadDetailRe
                 )
             await db.commit()
 
-        cursor = await db.execute("SELECT * FROM uploads WHERE id=?", (upload_id,))
-        upload = await cursor.fetchone()
-        assert upload is not None
-
-        cursor = await db.execute(
-            "SELECT * FROM entries WHERE upload_id=? ORDER BY occurred_at ASC",
-            (upload_id,),
-        )
-        entry_rows = await cursor.fetchall()
-
-    return UploadDetailResponse(
-        id=upload["id"],
-        filename=upload["filename"],
-        status=upload["status"],
-        error_message=upload["error_message"],
-        created_at=upload["created_at"],
-        processed_at=upload["processed_at"],
-        reviewed=bool(upload["reviewed"]),
-        reviewed_at=upload["reviewed_at"],
-        entries=[
-            EntryResponse(
-                id=e["id"],
-                upload_id=e["upload_id"],
-                entry_type=e["entry_type"],
-                subtype=e["subtype"],
-                occurred_at=e["occurred_at"],
-                date=e["date"],
-                value=e["value"],
-                notes=e["notes"],
-                confidence=e["confidence"],
-                raw_text=e["raw_text"],
-                confirmed=bool(e["confirmed"]),
-                created_at=e["created_at"],
-                updated_at=e["updated_at"],
-            )
-            for e in entry_rows
-        ],
-    )
+        return await _upload_detail(db, upload_id)
 
 
 @router.delete("/{upload_id}", status_code=204)
 async def delete_upload(upload_id: int) -> Response:
     async with get_db() as db:
-        cursor = await db.execute("SELECT filepath FROM uploads WHERE id=?", (upload_id,))
+        cursor = await db.execute("SELECT filepath, sha256 FROM uploads WHERE id=?", (upload_id,))
         upload = await cursor.fetchone()
         if not upload:
             raise HTTPException(status_code=404, detail="Upload not found")
@@ -249,20 +246,21 @@ async def delete_upload(upload_id: int) -> Response:
         await db.execute("DELETE FROM uploads WHERE id=?", (upload_id,))
         await db.commit()
 
-    stored = Path(upload["filepath"])
-    for candidate in (stored, Path(settings.upload_dir) / stored.name):
-        if candidate.exists():
-            try:
-                candidate.unlink()
-            except OSError as exc:
-                logger.warning("Failed to remove upload file %s: %s", candidate, exc)
-            break
+    # Blobs, possibly shared with another upload of the same photo, go with the GC pass.
+    await asyncio.to_thread(release, upload["filepath"], upload["sha256"])
 
     return Response(status_code=204)
 
 
 @router.post("/{upload_id}/reprocess")
-async def reprocess_upload(upload_id: int, background_tasks: BackgroundTasks) -> UploadResponse:
+async def reprocess_upload(
+    upload_id: int, background_tasks: BackgroundTasks, keep_confirmed: bool = False
+) -> UploadResponse:
+    """Parse an upload again.
+
+    By default all its entries are replaced. With `keep_confirmed`, confirmed entries
+    stay and only the time ranges around unconfirmed ones are re-extracted and merged.
+    """
     async with get_db() as db:
         cursor = await db.execute("SELECT * FROM uploads WHERE id=?", (upload_id,))
         upload = await cursor.fetchone()
@@ -272,13 +270,24 @@ async def reprocess_upload(upload_id: int, background_tasks: BackgroundTasks) ->
         if upload["status"] not in ("failed", "done"):
             raise HTTPException(status_code=400, detail="Can only reprocess failed or done uploads")
 
-        # Delete old entries and reset status
-        await db.execute("DELETE FROM entries WHERE upload_id=?", (upload_id,))
+        if keep_confirmed:
+            cursor = await db.execute(
+                "SELECT COUNT(*) AS total, SUM(confirmed=0) AS unconfirmed FROM entries"
+                " WHERE upload_id=?",
+                (upload_id,),
+            )
+            counts = await cursor.fetchone()
+            if counts and counts["total"] and not counts["unconfirmed"]:
+                raise HTTPException(status_code=400, detail="All entries are already confirmed")
+        else:
+            # Delete old entries and reset status
+            await db.execute("DELETE FROM entries WHERE upload_id=?", (upload_id,))
         await db.execute(
-            "UPDATE uploads SET status='pending', error_message=NULL, processed_at=NULL,"
-            " reviewed=0, reviewed_at=NULL WHERE id=?",
+            "UPDATE uploads SET status='pending', error_message=NULL, partial=0,"
+            " processed_at=NULL, reviewed=0, reviewed_at=NULL WHERE id=?",
             (upload_id,),
         )
+        await queue_upload(db, upload_id)
         await db.commit()
 
     background_tasks.add_task(process_upload, upload_id)
@@ -0,0 +1,53 @@
+from collections.abc import Iterable
+from typing import Any
+
+import aiosqlite
+from pydantic import BaseModel
+
+
+class RowEncoder:
+    """Maps SQLite rows straight to JSON-ready dicts shaped like a response model.
+
+    Building a validated Pydantic object per row and then serializing it again
+    dominates CPU time for large list responses. The rows come from our own
+    schema, so we only need the model's field order, its defaults for columns the
+    query doesn't return, and the INTEGER → bool coercion SQLite can't do itself.
+    Endpoints keep `response_model=` on the route for OpenAPI and return a
+    JSONResponse built from these dicts.
+    """
+
+    def __init__(self, model: type[BaseModel]) -> None:
+        self.model = model
+        self._fields = tuple(model.model_fields.items())
+        self._plans: dict[tuple[str, ...], list[tuple[str, int | None, bool, Any]]] = {}
+
+    def _plan(self, columns: tuple[str, ...]) -> list[tuple[str, int | None, bool, Any]]:
+        plan = self._plans.get(columns)
+        if plan is None:
+            plan = []
+            for name, field in self._fields:
+                index = columns.index(name) if name in columns else None
+                if index is None and field.is_required():
+                    raise ValueError(f"Row is missing required column {name!r}")
+                default = None
+                if index is None:
+                    default = field.get_default(call_default_factory=True)
+                plan.append((name, index, field.annotation is bool, default))
+            self._plans[columns] = plan
+        return plan
+
+    def encode(self, row: aiosqlite.Row) -> dict[str, Any]:
+        return self.encode_many([row])[0]
+
+    def encode_many(self, rows: Iterable[aiosqlite.Row]) -> list[dict[str, Any]]:
+        rows = list(rows)
+        if not rows:
+            return []
+        plan = self._plan(tuple(rows[0].keys()))
+        return [
+            {
+                name: (default if index is None else bool(row[index]) if as_bool else row[index])
+                for name, index, as_bool, default in plan
+            }
+            for row in rows
+        ]
@@ -0,0 +1,109 @@
+import math
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any
+
+import aiosqlite
+
+# NumPy (the 'analytics' extra) is imported on first use, like pyarrow for exports.
+if TYPE_CHECKING:
+    import numpy as np
+
+MOVING_AVERAGE_DAYS = (3, 7, 14)
+# Days in the rolling window the percentile band is taken over.
+BAND_DAYS = 14
+BAND_PERCENTILES = (10, 90)
+# Days read before from_date so every average and band is complete on the first day.
+PADDING_DAYS = max(*MOVING_AVERAGE_DAYS, BAND_DAYS) - 1
+
+DAILY_SQL = """
+SELECT
+    date,
+    SUM(CASE WHEN entry_type='feeding' AND value IS NOT NULL THEN value ELSE 0 END) AS feeding_ml,
+    SUM(CASE WHEN entry_type='feeding' THEN 1 ELSE 0 END) AS feeding_count,
+    SUM(CASE WHEN entry_type='diaper' AND subtype != 'dry' THEN 1 ELSE 0 END) AS diaper_count
+FROM entries
+WHERE date >= ? AND date <= ? AND duplicate_of IS NULL
+GROUP BY date
+"""
+SERIES = ("feeding_ml", "feeding_count", "diaper_count")
+
+
+def _as_list(values: "np.ndarray") -> list[float | None]:
+    return [None if math.isnan(v) else round(v, 2) for v in values.tolist()]
+
+
+def _moving_average(daily: "np.ndarray", days: int) -> "np.ndarray":
+    """Trailing mean over `days`, skipping days with nothing logged (NaN); from two
+    cumulative sums instead of a loop over windows."""
+    import numpy as np
+
+    logged = ~np.isnan(daily)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(logged, daily, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(logged)))
+    window_sums = sums[days:] - sums[:-days]
+    window_counts = counts[days:] - counts[:-days]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+
+def _slope(values: "np.ndarray") -> float | None:
+    """Least-squares trend over the range, in units per day."""
+    import numpy as np
+
+    days = np.flatnonzero(~np.isnan(values))
+    if len(days) < 2:
+        return None
+    return round(float(np.polyfit(days, values[days], 1)[0]), 3)
+
+
+def compute_trends(daily: dict[str, list[float | None]], days: int) -> dict[str, Any]:
+    """Moving averages, trend slopes and percentile bands for each series.
+
+    `daily` holds one value per day (None where nothing was logged) for the requested
+    `days` plus PADDING_DAYS before them; outputs cover the requested days only.
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    result: dict[str, Any] = {}
+    for name, values in daily.items():
+        padded = np.array([np.nan if v is None else v for v in values], dtype=float)
+        series = padded[PADDING_DAYS:]
+        # Rows of BAND_DAYS trailing days ending on each requested day.
+        windows = sliding_window_view(padded, BAND_DAYS)[-days:]
+        has_data = ~np.isnan(windows).all(axis=1)
+        low, high = np.full(days, np.nan), np.full(days, np.nan)
+        if has_data.any():
+            low[has_data], high[has_data] = np.nanpercentile(
+                windows[has_data], BAND_PERCENTILES, axis=1
+            )
+        result[name] = {
+            "values": _as_list(series),
+            "moving_averages": {
+                str(n): _as_list(_moving_average(padded, n)[-days:]) for n in MOVING_AVERAGE_DAYS
+            },
+            "slope_per_day": _slope(series),
+            "band_low": _as_list(low),
+            "band_high": _as_list(high),
+        }
+    return result
+
+
+async def fetch_trends(db: aiosqlite.Connection, from_date: str, to_date: str) -> dict[str, Any]:
+    """Daily aggregates for the range plus padding, shaped for compute_trends."""
+    start, end = date.fromisoformat(from_date), date.fromisoformat(to_date)
+    days = (end - start).days + 1
+    padded_start = start - timedelta(days=PADDING_DAYS)
+    cursor = await db.execute(DAILY_SQL, (padded_start.isoformat(), to_date))
+    rows = {row["date"]: row for row in await cursor.fetchall()}
+
+    dates = [(padded_start + timedelta(days=i)).isoformat() for i in range(days + PADDING_DAYS)]
+    daily = {name: [rows[d][name] if d in rows else None for d in dates] for name in SERIES}
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "dates": dates[PADDING_DAYS:],
+        "band_days": BAND_DAYS,
+        "band_percentiles": list(BAND_PERCENTILES),
+        "series": compute_trends(daily, days),
+    }
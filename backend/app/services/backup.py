@@ -0,0 +1,203 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.config import settings
+from app.database import DEFAULT_HOUSEHOLD, database_path, household, household_ids, use_household
+from app.models.backup import BackupResult, BackupSnapshot
+from app.services.storage import resolve
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_GLOB = "babylog-*.db.gz"
+BLOB_DIR = "blobs"
+BLOB_INDEX = "index.json"
+
+# Only one backup at a time; a second request while one runs is rejected.
+backup_lock = asyncio.Lock()
+
+
+def _manifest_path(snapshot: Path) -> Path:
+    return snapshot.with_name(snapshot.name.removesuffix(".db.gz") + ".manifest.json")
+
+
+def _backup_root() -> Path:
+    """Backup directory of the current household."""
+    household_id = household.get()
+    if household_id == DEFAULT_HOUSEHOLD:
+        return Path(settings.backup_dir)
+    return Path(settings.backup_dir) / "households" / household_id
+
+
+def _copy_database(dest: Path, pages_per_step: int, step_sleep: float) -> None:
+    """Online backup in small page steps so the source read lock is never held for long.
+
+    Between steps the source is unlocked and writers proceed; SQLite restarts the copy
+    if another connection modifies the source mid-way, which is cheap at our DB size.
+    """
+    source = sqlite3.connect(database_path())
+    target = sqlite3.connect(dest)
+    try:
+        source.backup(target, pages=pages_per_step, sleep=step_sleep)
+    finally:
+        target.close()
+        source.close()
+
+
+def _compress(src: Path, dest: Path) -> None:
+    partial = dest.with_name(dest.name + ".part")
+    with src.open("rb") as raw, gzip.open(partial, "wb", compresslevel=6) as packed:
+        shutil.copyfileobj(raw, packed, length=1024 * 1024)
+    partial.replace(dest)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _bundle_images(backup_dir: Path, snapshot_db: Path, snapshot: Path) -> int:
+    """Copy referenced upload images into a content-addressed blob store.
+
+    A blob is copied only if its hash is new. Uploads store their hash; for older flat
+    files hashes are cached by (size, mtime) so unchanged files are not re-read on
+    every run. Returns the number of new blobs.
+    """
+    blob_dir = backup_dir / BLOB_DIR
+    blob_dir.mkdir(exist_ok=True)
+    index_path = blob_dir / BLOB_INDEX
+    index: dict[str, list] = json.loads(index_path.read_text()) if index_path.exists() else {}
+
+    conn = sqlite3.connect(snapshot_db)
+    try:
+        rows = conn.execute("SELECT id, filename, filepath, sha256 FROM uploads").fetchall()
+    finally:
+        conn.close()
+
+    uploads: dict[str, dict[str, str]] = {}
+    copied = 0
+    for upload_id, filename, filepath, stored_sha in rows:
+        image = resolve(filepath)
+        if image is None:
+            continue
+        stat = image.stat()
+        cached = index.get(str(image))
+        if stored_sha:
+            # Content-addressed uploads already carry their hash.
+            sha = stored_sha
+        elif cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            sha = cached[2]
+        else:
+            sha = _sha256(image)
+            index[str(image)] = [stat.st_size, stat.st_mtime_ns, sha]
+        blob = blob_dir / sha
+        if not blob.exists():
+            shutil.copyfile(image, blob.with_name(sha + ".part"))
+            blob.with_name(sha + ".part").replace(blob)
+            copied += 1
+        uploads[str(upload_id)] = {"filename": filename, "sha256": sha}
+
+    index_path.write_text(json.dumps(index))
+    _manifest_path(snapshot).write_text(json.dumps({"uploads": uploads}, ensure_ascii=False))
+    return copied
+
+
+def _apply_retention(backup_dir: Path, keep: int) -> list[str]:
+    snapshots = sorted(backup_dir.glob(SNAPSHOT_GLOB))
+    removed = []
+    for old in snapshots[: max(len(snapshots) - keep, 0)]:
+        old.unlink()
+        _manifest_path(old).unlink(missing_ok=True)
+        removed.append(old.name)
+
+    # Drop blobs no surviving manifest references.
+    blob_dir = backup_dir / BLOB_DIR
+    if removed and blob_dir.exists():
+        referenced: set[str] = set()
+        for manifest in backup_dir.glob("babylog-*.manifest.json"):
+            uploads = json.loads(manifest.read_text())["uploads"]
+            referenced.update(item["sha256"] for item in uploads.values())
+        for blob in blob_dir.iterdir():
+            if blob.name != BLOB_INDEX and blob.name not in referenced:
+                blob.unlink()
+    return removed
+
+
+def _snapshot_info(snapshot: Path) -> BackupSnapshot:
+    stat = snapshot.stat()
+    manifest = _manifest_path(snapshot)
+    image_count = len(json.loads(manifest.read_text())["uploads"]) if manifest.exists() else 0
+    return BackupSnapshot(
+        name=snapshot.name,
+        size_bytes=stat.st_size,
+        created_at=datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+        image_count=image_count,
+    )
+
+
+def _run_backup(include_images: bool) -> BackupResult:
+    start = time.monotonic()
+    backup_dir = _backup_root()
+    backup_dir.mkdir(parents=True, exist_ok=True)
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    snapshot = backup_dir / f"babylog-{stamp}.db.gz"
+    raw = backup_dir / f".babylog-{stamp}.db"
+    try:
+        _copy_database(raw, settings.backup_pages_per_step, settings.backup_step_sleep_ms / 1000)
+        images_copied = 0
+        if include_images:
+            images_copied = _bundle_images(backup_dir, raw, snapshot)
+        _compress(raw, snapshot)
+    finally:
+        raw.unlink(missing_ok=True)
+
+    removed = _apply_retention(backup_dir, settings.backup_retention)
+    return BackupResult(
+        **_snapshot_info(snapshot).model_dump(),
+        images_copied=images_copied,
+        removed=removed,
+        duration_ms=(time.monotonic() - start) * 1000,
+    )
+
+
+async def create_backup(include_images: bool = False) -> BackupResult:
+    """Snapshot the database (and optionally upload images) off the event loop."""
+    async with backup_lock:
+        result = await asyncio.to_thread(_run_backup, include_images)
+    logger.info(
+        "Backup %s written (%.1f KB, %d images, %d new) in %.0fms",
+        result.name,
+        result.size_bytes / 1024,
+        result.image_count,
+        result.images_copied,
+        result.duration_ms,
+    )
+    return result
+
+
+def list_backups() -> list[BackupSnapshot]:
+    backup_dir = _backup_root()
+    return [_snapshot_info(path) for path in sorted(backup_dir.glob(SNAPSHOT_GLOB), reverse=True)]
+
+
+async def run_backup_scheduler(interval_hours: float) -> None:
+    """Background loop backing up every household; started from lifespan when enabled."""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        for household_id in household_ids():
+            with use_household(household_id):
+                try:
+                    await create_backup(include_images=settings.backup_include_images)
+                except Exception:
+                    logger.exception("Scheduled backup failed for %s", household_id)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+
+from app.config import settings
+from app.database import get_db, household_ids, use_household
+from app.models.batch import BackfillResponse, BatchPollResponse
+from app.services.leases import WORKER_ID, hold_lease, lease_expiry
+from app.services.llm import (
+    SYSTEM_PROMPT,
+    build_user_prompt,
+    encode_image,
+    parse_response,
+    record_usage,
+)
+from app.services.metrics import metrics
+from app.services.providers import BatchProvider, clients
+from app.services.upload_processor import load_image, mark_failed, store_entries
+
+logger = logging.getLogger(__name__)
+
+# Stay under the provider's per-batch payload limit (256 MB for Anthropic).
+BATCH_MAX_BYTES = 200 * 1024 * 1024
+CUSTOM_ID_PREFIX = "upload-"
+
+# Only one submit or poll pass at a time, so an upload is never claimed or stored twice.
+batch_lock = asyncio.Lock()
+
+
+def get_batch_provider() -> BatchProvider:
+    provider = clients.get(settings.llm_provider, settings.llm_model)
+    if not isinstance(provider, BatchProvider):
+        raise ValueError(f"LLM provider {settings.llm_provider!r} does not support batches")
+    return provider
+
+
+async def _claim_pending(limit: int | None) -> list[int]:
+    """Move pending uploads to 'batched' (without a batch id yet) so the real-time
+    processor skips them, under this worker's lease until submitted. Startup and the
+    lease sweeper reset any left in that state by a crash. Uploads that still have
+    entries are queued for a selective reprocess, which batch results (always a full
+    extraction) would duplicate; they stay with the real-time processor."""
+    async with get_db() as db:
+        cursor = await db.execute(
+            "UPDATE uploads SET status='batched', batch_id=NULL, error_message=NULL,"
+            " claimed_by=?, lease_expires_at=datetime('now', ?)"
+            " WHERE id IN (SELECT id FROM uploads u WHERE status='pending' AND kind='image'"
+            " AND NOT EXISTS (SELECT 1 FROM entries WHERE upload_id=u.id)"
+            " ORDER BY id LIMIT ?)"
+            " RETURNING id",
+            (WORKER_ID, lease_expiry(), limit if limit is not None else -1),
+        )
+        ids = sorted(row["id"] for row in await cursor.fetchall())
+        await db.commit()
+    return ids
+
+
+async def _submit(provider: BatchProvider, requests: dict[str, dict], upload_ids: list[int]) -> str:
+    try:
+        batch_id = await provider.submit_batch(requests)
+    except Exception:
+        async with get_db() as db:
+            await db.executemany(
+                "UPDATE uploads SET status='pending', claimed_by=NULL, lease_expires_at=NULL"
+                " WHERE id=? AND claimed_by=?",
+                [(i, WORKER_ID) for i in upload_ids],
+            )
+            await db.commit()
+        raise
+    # Submitted uploads belong to the batch, whose results any worker may collect. One
+    # whose lease lapsed meanwhile went back to pending and its batch result is ignored.
+    async with get_db() as db:
+        await db.executemany(
+            "UPDATE uploads SET batch_id=?, claimed_by=NULL, lease_expires_at=NULL"
+            " WHERE id=? AND claimed_by=?",
+            [(batch_id, i, WORKER_ID) for i in upload_ids],
+        )
+        await db.commit()
+    logger.info("Submitted batch %s with %d uploads", batch_id, len(upload_ids))
+    return batch_id
+
+
+async def submit_backfill(limit: int | None = None) -> BackfillResponse:
+    """Submit pending uploads as provider message batches instead of real-time calls.
+
+    Uploads are grouped up to LLM_BATCH_SIZE requests (and BATCH_MAX_BYTES of image
+    data) per batch. Tiling is not applied: each page goes in whole. Results are
+    collected later by `poll_batches`.
+    """
+    provider = get_batch_provider()
+    result = BackfillResponse()
+    user_prompt = build_user_prompt()
+
+    async with batch_lock:
+        upload_ids = await _claim_pending(limit)
+        async with hold_lease(*upload_ids):
+            requests: dict[str, dict] = {}
+            grouped: list[int] = []
+            size = 0
+            for upload_id in upload_ids:
+                try:
+                    image_bytes, mime_type = await load_image(upload_id)
+                except Exception as e:
+                    logger.warning("Upload %d skipped from backfill: %s", upload_id, e)
+                    await mark_failed(upload_id, str(e))
+                    result.failed += 1
+                    continue
+
+                image_b64 = await encode_image(image_bytes)
+                if grouped and (
+                    len(grouped) >= settings.llm_batch_size
+                    or size + len(image_b64) > BATCH_MAX_BYTES
+                ):
+                    result.batches.append(await _submit(provider, requests, grouped))
+                    result.submitted += len(grouped)
+                    requests, grouped, size = {}, [], 0
+
+                requests[f"{CUSTOM_ID_PREFIX}{upload_id}"] = provider.request_params(
+                    image_b64, mime_type, SYSTEM_PROMPT, user_prompt, 4096
+                )
+                grouped.append(upload_id)
+                size += len(image_b64)
+
+            if grouped:
+                result.batches.append(await _submit(provider, requests, grouped))
+                result.submitted += len(grouped)
+    return result
+
+
+async def _collect(provider: BatchProvider, batch_id: str, result: BatchPollResponse) -> None:
+    async with get_db() as db:
+        cursor = await db.execute(
+            "SELECT id FROM uploads WHERE batch_id=? AND status='batched'", (batch_id,)
+        )
+        waiting = {row["id"] for row in await cursor.fetchall()}
+
+    for item in await provider.batch_results(batch_id):
+        upload_id = int(item.custom_id.removeprefix(CUSTOM_ID_PREFIX))
+        if upload_id not in waiting:
+            # Deleted (or otherwise handled) while the batch was running.
+            continue
+        waiting.discard(upload_id)
+        try:
+            if item.completion is None:
+                raise ValueError(item.error or "Batch request failed")
+            record_usage(provider.name, item.completion)
+            entries, note = parse_response(item.completion.text, item.completion.truncated)
+            if note:
+                metrics.incr(f"llm:{provider.name}", "partial_replies")
+            await store_entries(upload_id, entries, partial=note)
+            result.done += 1
+            logger.info("Batch %s: upload %d -> %d entries", batch_id, upload_id, len(entries))
+        except Exception as e:
+            logger.warning("Batch %s: upload %d failed: %s", batch_id, upload_id, e)
+            await mark_failed(upload_id, str(e))
+            result.failed += 1
+
+    for upload_id in waiting:
+        await mark_failed(upload_id, f"Missing from results of batch {batch_id}")
+        result.failed += 1
+
+
+async def poll_batches() -> BatchPollResponse:
+    """Check submitted batches and fan results of ended ones back into entries."""
+    result = BatchPollResponse()
+    async with batch_lock:
+        async with get_db() as db:
+            cursor = await db.execute(
+                "SELECT DISTINCT batch_id FROM uploads"
+                " WHERE status='batched' AND batch_id IS NOT NULL"
+            )
+            batch_ids = [row["batch_id"] for row in await cursor.fetchall()]
+        if not batch_ids:
+            return result
+
+        provider = get_batch_provider()
+        for batch_id in batch_ids:
+            if not await provider.batch_ended(batch_id):
+                result.in_progress += 1
+                continue
+            await _collect(provider, batch_id, result)
+            result.ended.append(batch_id)
+    return result
+
+
+async def run_batch_poller(interval_s: float) -> None:
+    """Background loop collecting batch results of every household; started from
+    lifespan when enabled."""
+    while True:
+        await asyncio.sleep(interval_s)
+        for household_id in household_ids():
+            with use_household(household_id):
+                try:
+                    await poll_batches()
+                except Exception:
+                    logger.exception("Batch poll failed for %s", household_id)
@@ -0,0 +1,55 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from app.database import get_read_db, household
+from app.services.metrics import metrics
+
+
+async def data_version() -> int:
+    """The current household's change counter (see database.SYNC_SCHEMA); every insert,
+    update or delete of an entry or upload advances it."""
+    async with get_read_db() as db:
+        cursor = await db.execute("SELECT version FROM sync_state")
+        row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+class SingleFlight:
+    """Runs concurrent identical read queries once and hands every caller the result.
+
+    Calls are keyed by name, household, params and the data version read on arrival,
+    so a call made after a write never joins a query started before it: results are
+    shared only while in flight, nothing is cached. The query runs as its own task,
+    so a caller that disconnects doesn't cancel it for the others. Counted under
+    "coalesce" in the metrics as `<name>_calls` and `<name>_coalesced`.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, asyncio.Task] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def _land(self, key: Hashable, task: asyncio.Task) -> None:
+        self._flights.pop(key, None)
+        # Callers re-raise it; this only keeps asyncio from warning if all of them left.
+        if not task.cancelled():
+            task.exception()
+
+    async def run(self, name: str, params: Hashable, query: Callable[[], Awaitable[Any]]) -> Any:
+        key = (name, household.get(), params, await data_version())
+        metrics.incr("coalesce", f"{name}_calls")
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(query())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._land(key, done))
+        else:
+            metrics.incr("coalesce", f"{name}_coalesced")
+        return await asyncio.shield(task)
+
+
+# Process-wide instance; each worker process coalesces its own requests.
+single_flight = SingleFlight()
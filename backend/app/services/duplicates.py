@@ -0,0 +1,113 @@
+from typing import Any
+
+import aiosqlite
+
+from app.database import DUPLICATE_WINDOW_MIN
+from app.models.entry import EntryResponse
+from app.serialization import RowEncoder
+
+duplicate_encoder = RowEncoder(EntryResponse)
+
+WINDOW_S = DUPLICATE_WINDOW_MIN * 60
+
+
+def _key(fingerprint: str) -> str:
+    """The fingerprint without its time bucket: type|subtype|value."""
+    return fingerprint.rsplit("|", 1)[0]
+
+
+def neighbour_fingerprints(fingerprint: str) -> list[str]:
+    """The fingerprint and those of the adjacent time buckets. Any entry within the
+    window of this one falls in one of these three buckets."""
+    key, bucket = fingerprint.rsplit("|", 1)
+    return [f"{key}|{int(bucket) + step:010d}" for step in (-1, 0, 1)]
+
+
+def _same_upload(a: Any, b: Any) -> bool:
+    # Repeated lines on one page (e.g. "10мл+10мл") are separate entries, not duplicates.
+    return a is not None and a == b
+
+
+def same_cluster(rows: list[Any]) -> bool:
+    """Whether the entries (rows with fingerprint, upload_id and ts) make up one cluster
+    as find_clusters groups them: same type, subtype and value, chained less than the
+    window apart, and not all from one upload."""
+    if any(row["fingerprint"] is None for row in rows):
+        return False
+    if len({_key(row["fingerprint"]) for row in rows}) != 1:
+        return False
+    uploads = {row["upload_id"] for row in rows}
+    if len(uploads) == 1 and None not in uploads:
+        return False
+    times = sorted(row["ts"] for row in rows)
+    return all(later - earlier <= WINDOW_S for earlier, later in zip(times, times[1:]))
+
+
+async def find_duplicate(db: aiosqlite.Connection, entry_id: int) -> int | None:
+    """Id of an earlier entry from another upload matching this one, via the
+    fingerprint index (three bucket lookups)."""
+    cursor = await db.execute(
+        "SELECT fingerprint, upload_id, strftime('%s', occurred_at) AS ts FROM entries WHERE id=?",
+        (entry_id,),
+    )
+    row = await cursor.fetchone()
+    if not row or row["fingerprint"] is None:
+        return None
+
+    cursor = await db.execute(
+        """SELECT id, upload_id FROM entries
+           WHERE fingerprint IN (?, ?, ?) AND id < ?
+             AND abs(strftime('%s', occurred_at) - ?) <= ?
+           ORDER BY id""",
+        (*neighbour_fingerprints(row["fingerprint"]), entry_id, int(row["ts"]), WINDOW_S),
+    )
+    for candidate in await cursor.fetchall():
+        if not _same_upload(candidate["upload_id"], row["upload_id"]):
+            return candidate["id"]
+    return None
+
+
+async def find_clusters(
+    db: aiosqlite.Connection, from_date: str | None = None, to_date: str | None = None
+) -> list[list[dict[str, Any]]]:
+    """Group likely duplicates across the whole history (or a date range).
+
+    Entries are read in fingerprint order, which sorts by type, subtype and value and
+    then by time, so a single pass chaining neighbours less than the window apart
+    finds every cluster: O(n log n) for the sort, O(n) for the sweep. Clusters made
+    up only of entries from one upload are skipped.
+    """
+    conditions = ["fingerprint IS NOT NULL"]
+    params: list = []
+    if from_date:
+        conditions.append("date >= ?")
+        params.append(from_date)
+    if to_date:
+        conditions.append("date <= ?")
+        params.append(to_date)
+    cursor = await db.execute(
+        "SELECT *, CAST(strftime('%s', occurred_at) AS INTEGER) AS ts FROM entries"
+        f" WHERE {' AND '.join(conditions)} ORDER BY fingerprint, ts, id",
+        params,
+    )
+
+    clusters: list[list[dict[str, Any]]] = []
+    group: list[Any] = []
+
+    def flush() -> None:
+        uploads = {row["upload_id"] for row in group}
+        if len(group) > 1 and not (len(uploads) == 1 and None not in uploads):
+            clusters.append(duplicate_encoder.encode_many(group))
+
+    async for row in cursor:
+        if group and (
+            _key(row["fingerprint"]) != _key(group[-1]["fingerprint"])
+            or row["ts"] - group[-1]["ts"] > WINDOW_S
+        ):
+            flush()
+            group = []
+        group.append(row)
+    flush()
+
+    clusters.sort(key=lambda cluster: cluster[0]["occurred_at"], reverse=True)
+    return clusters
@@ -0,0 +1,37 @@
+import asyncio
+import sqlite3
+from pathlib import Path
+
+from app.database import database_path, household_ids
+from app.models.household import HouseholdInfo
+
+
+def _summary(household_id: str) -> HouseholdInfo | None:
+    path = Path(database_path(household_id))
+    if not path.exists():
+        return None
+    # Read-only and outside the read-pool LRU, so listing doesn't evict active shards.
+    conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+    try:
+        uploads, entries, last_entry_at, baby_name = conn.execute(
+            """SELECT (SELECT COUNT(*) FROM uploads),
+                      (SELECT COUNT(*) FROM entries),
+                      (SELECT MAX(occurred_at) FROM entries),
+                      (SELECT value FROM settings WHERE key='baby_name')"""
+        ).fetchone()
+    finally:
+        conn.close()
+    return HouseholdInfo(
+        id=household_id,
+        baby_name=baby_name,
+        size_bytes=path.stat().st_size,
+        upload_count=uploads,
+        entry_count=entries,
+        last_entry_at=last_entry_at,
+    )
+
+
+async def list_households() -> list[HouseholdInfo]:
+    """Summaries of every household shard, read off the event loop."""
+    summaries = await asyncio.to_thread(lambda: [_summary(hid) for hid in household_ids()])
+    return [summary for summary in summaries if summary is not None]
@@ -0,0 +1,199 @@
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import time
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Any, BinaryIO, Literal
+
+import aiosqlite
+from pydantic import ValidationError
+
+from app.database import get_db
+from app.models.imports import ImportedEntry, ImportLineError, ImportResponse
+
+logger = logging.getLogger(__name__)
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# Rows validated and written per transaction.
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 200
+
+FORMAT_SUFFIXES: dict[str, ImportFormat] = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+# Rows pointing at an upload that doesn't exist (e.g. a backup restored into a fresh
+# database) keep the entry and drop the link instead of failing the foreign key.
+INSERT_SQL = """INSERT INTO entries (entry_type, subtype, occurred_at, date,
+   value, notes, confidence, raw_text, confirmed, upload_id)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, (SELECT id FROM uploads WHERE id = ?))"""
+
+DedupeKey = tuple[str, str | None, str, float | None]
+
+Records = Iterator[tuple[int, dict[str, Any] | str]]
+
+
+def detect_format(filename: str) -> ImportFormat | None:
+    for suffix, fmt in FORMAT_SUFFIXES.items():
+        if filename.lower().endswith(suffix):
+            return fmt
+    return None
+
+
+def check_utf8(stream: BinaryIO, block_size: int = 1 << 20) -> None:
+    """Decode the whole file once and rewind it, raising UnicodeDecodeError up front
+    rather than after earlier chunks were already committed."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while block := stream.read(block_size):
+        decoder.decode(block)
+    decoder.decode(b"", final=True)
+    stream.seek(0)
+
+
+def _records(lines: Iterable[str], fmt: ImportFormat) -> Records:
+    """Yield (line number, record) pairs, or (line number, error message) for unparsable lines."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells mean NULL; cells beyond the header land under the None key.
+            yield reader.line_num, {k: (v if v != "" else None) for k, v in row.items() if k}
+        return
+
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, f"Expected JSON object, got {type(record).__name__}"
+            continue
+        yield line_no, record
+
+
+def _validate(record: dict[str, Any]) -> ImportedEntry:
+    entry = ImportedEntry.model_validate(record)
+    datetime.strptime(entry.occurred_at[:10], "%Y-%m-%d")
+    return entry
+
+
+def _describe(exc: ValueError) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+        )
+    return f"occurred_at: {exc}"
+
+
+def _report(result: ImportResponse, line_no: int, message: str) -> None:
+    result.error_count += 1
+    if len(result.errors) < MAX_REPORTED_ERRORS:
+        result.errors.append(ImportLineError(line=line_no, error=message))
+
+
+def _dedupe_key(entry_type: str, subtype: str | None, occurred_at: str, value: Any) -> DedupeKey:
+    return (entry_type, subtype, occurred_at, float(value) if value is not None else None)
+
+
+def _read_chunk(records: Records, result: ImportResponse) -> list[ImportedEntry]:
+    """Parse and validate records until CHUNK_SIZE entries are valid or input runs out."""
+    chunk: list[ImportedEntry] = []
+    for line_no, record in records:
+        if isinstance(record, str):
+            _report(result, line_no, record)
+            continue
+        try:
+            chunk.append(_validate(record))
+        except ValueError as e:
+            _report(result, line_no, _describe(e))
+            continue
+        if len(chunk) >= CHUNK_SIZE:
+            break
+    return chunk
+
+
+async def _write_chunk(
+    db: aiosqlite.Connection,
+    chunk: list[ImportedEntry],
+    seen: set[DedupeKey] | None,
+    result: ImportResponse,
+) -> None:
+    if seen is not None:
+        times = list({entry.occurred_at for entry in chunk})
+        placeholders = ",".join("?" * len(times))
+        cursor = await db.execute(
+            "SELECT entry_type, subtype, occurred_at, value FROM entries"
+            f" WHERE occurred_at IN ({placeholders})",
+            times,
+        )
+        seen.update(_dedupe_key(*row) for row in await cursor.fetchall())
+
+        unique = []
+        for entry in chunk:
+            key = _dedupe_key(entry.entry_type, entry.subtype, entry.occurred_at, entry.value)
+            if key in seen:
+                result.duplicates += 1
+                continue
+            seen.add(key)
+            unique.append(entry)
+        chunk = unique
+
+    await db.executemany(
+        INSERT_SQL,
+        [
+            (
+                entry.entry_type,
+                entry.subtype,
+                entry.occurred_at,
+                entry.occurred_at[:10],
+                entry.value,
+                entry.notes,
+                entry.confidence,
+                entry.raw_text,
+                int(entry.confirmed),
+                entry.upload_id,
+            )
+            for entry in chunk
+        ],
+    )
+    await db.commit()
+    result.imported += len(chunk)
+
+
+async def import_entries(
+    lines: Iterable[str], fmt: ImportFormat, dedupe: bool = False
+) -> ImportResponse:
+    """Validate and insert entries from CSV/NDJSON lines in chunked transactions.
+
+    Invalid lines are reported and skipped; valid ones are written regardless. With
+    `dedupe`, rows matching an existing (or earlier imported) entry on type, subtype,
+    time and value are counted as duplicates and not inserted. Callers check the
+    encoding first (`check_utf8`): a decode error midway would leave earlier chunks
+    committed.
+    """
+    start = time.monotonic()
+    result = ImportResponse()
+    seen: set[DedupeKey] | None = set() if dedupe else None
+
+    records = _records(lines, fmt)
+    async with get_db() as db:
+        # Reading, decoding and validating a chunk is CPU-bound; keep it off the loop.
+        while chunk := await asyncio.to_thread(_read_chunk, records, result):
+            await _write_chunk(db, chunk, seen, result)
+
+    logger.info(
+        "Imported %d entries (%d duplicates, %d errors) in %.1fs",
+        result.imported,
+        result.duplicates,
+        result.error_count,
+        time.monotonic() - start,
+    )
+    return result
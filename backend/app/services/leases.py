@@ -0,0 +1,149 @@
+import asyncio
+import fcntl
+import logging
+import os
+import socket
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TextIO
+
+import aiosqlite
+
+from app.config import settings
+from app.database import get_db
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process in uploads.claimed_by; several workers share one database.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Row condition for finishing an upload: this worker holds its lease, or nobody does
+# (batch results, which outlive the submitting process).
+OWNED = "(claimed_by=? OR claimed_by IS NULL)"
+
+
+class LeaseLostError(Exception):
+    """Another worker took over the upload after this one's lease lapsed."""
+
+
+def lease_expiry() -> str:
+    """datetime() modifier for a lease taken or renewed now."""
+    return f"+{settings.job_lease_s} seconds"
+
+
+async def claim_upload(upload_id: int) -> bool:
+    """Atomically claim a pending upload for processing by this worker."""
+    async with get_db() as db:
+        cursor = await db.execute(
+            "UPDATE uploads SET status='processing', claimed_by=?,"
+            " lease_expires_at=datetime('now', ?)"
+            " WHERE id=? AND status='pending' RETURNING id",
+            (WORKER_ID, lease_expiry(), upload_id),
+        )
+        claimed = await cursor.fetchone() is not None
+        await db.commit()
+    if claimed:
+        metrics.incr("jobs", "claimed")
+    return claimed
+
+
+async def queue_upload(db: aiosqlite.Connection, upload_id: int) -> None:
+    """Lease a pending upload to this worker until its BackgroundTask claims it. If the
+    worker dies first the lease lapses and a sweep picks the upload up; pending uploads
+    without a lease are deferred to a backfill batch and left alone. The caller commits."""
+    await db.execute(
+        "UPDATE uploads SET claimed_by=?, lease_expires_at=datetime('now', ?)"
+        " WHERE id=? AND status='pending'",
+        (WORKER_ID, lease_expiry(), upload_id),
+    )
+
+
+async def take_over_expired(limit: int | None = None) -> list[int]:
+    """Claim 'processing' uploads whose worker stopped renewing its lease, and queued
+    'pending' ones whose BackgroundTask died with its worker, up to `limit`."""
+    async with get_db() as db:
+        cursor = await db.execute(
+            "UPDATE uploads SET status='processing', claimed_by=?,"
+            " lease_expires_at=datetime('now', ?)"
+            " WHERE id IN (SELECT id FROM uploads WHERE status IN ('processing', 'pending')"
+            " AND (lease_expires_at < datetime('now')"
+            " OR (status='processing' AND lease_expires_at IS NULL))"
+            " ORDER BY id LIMIT ?)"
+            " RETURNING id",
+            (WORKER_ID, lease_expiry(), limit if limit is not None else -1),
+        )
+        ids = sorted(row["id"] for row in await cursor.fetchall())
+        # Claimed for a batch by a worker that died before submitting it.
+        await db.execute(
+            "UPDATE uploads SET status='pending', claimed_by=NULL, lease_expires_at=NULL"
+            " WHERE status='batched' AND batch_id IS NULL"
+            " AND (lease_expires_at IS NULL OR lease_expires_at < datetime('now'))"
+        )
+        await db.commit()
+    if ids:
+        metrics.incr("jobs", "taken_over", len(ids))
+        logger.warning("Took over %d uploads with lapsed leases: %s", len(ids), ids)
+    return ids
+
+
+async def _renew(upload_ids: list[int]) -> None:
+    if not upload_ids:
+        return
+    marks = ", ".join("?" * len(upload_ids))
+    while True:
+        await asyncio.sleep(settings.job_lease_s / 3)
+        async with get_db() as db:
+            cursor = await db.execute(
+                "UPDATE uploads SET lease_expires_at=datetime('now', ?)"
+                f" WHERE claimed_by=? AND id IN ({marks})",
+                (lease_expiry(), WORKER_ID, *upload_ids),
+            )
+            await db.commit()
+        if cursor.rowcount == 0:
+            metrics.incr("jobs", "leases_lost")
+            logger.warning("Lost the lease on uploads %s", upload_ids)
+            return
+        metrics.incr("jobs", "lease_renewals")
+
+
+@asynccontextmanager
+async def hold_lease(*upload_ids: int) -> AsyncIterator[None]:
+    """Renew this worker's lease on the uploads every third of JOB_LEASE_S while the
+    block runs, so other workers only take them over if this process dies."""
+    task = asyncio.create_task(_renew(list(upload_ids)))
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+# Open lock file while this process runs the singleton schedulers.
+_scheduler_lock: TextIO | None = None
+
+
+def acquire_scheduler_lock() -> bool:
+    """Elect this worker to run backups, GC, tiering, maintenance and batch polling,
+    which must not run once per worker. A non-blocking flock next to the database is
+    held until the process exits, when the OS releases it."""
+    global _scheduler_lock
+    if _scheduler_lock is not None:
+        return True
+    path = Path(settings.database_path).parent / "scheduler.lock"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock = path.open("w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return False
+    _scheduler_lock = lock
+    return True
+
+
+def release_scheduler_lock() -> None:
+    global _scheduler_lock
+    if _scheduler_lock is not None:
+        _scheduler_lock.close()
+        _scheduler_lock = None
@@ -1,11 +1,15 @@
+import asyncio
 import base64
+import io
 import json
 import logging
-from datetime import datetime
-
-import anthropic
+import time
+from collections import Counter
+from datetime import datetime, timedelta
 
 from app.config import settings
+from app.services.metrics import metrics
+from app.services.providers import Completion, LLMProvider, clients, latency
 
 logger = logging.getLogger(__name__)
 
@@ -88,7 +92,8 @@ There are exactly 4 entry types: `feeding`, `diaper`, `weight`, `pills`. Each en
 
 ## Output Format
 
-Return ONLY a JSON array (no wrapping object, no markdown fences). Each element:
+Return the entries as a JSON array (no markdown fences). When a `record_entries` tool or a
+response schema is provided, put the array in its `entries` field. Each element:
 
 ```json
 {
@@ -107,88 +112,383 @@ Return ONLY a JSON array (no wrapping object, no markdown fences). Each element:
 - If text is crossed out or corrected, use the final value.
 - Preserve chronological order.
 - When in doubt, include the raw recognized text in raw_text and set confidence to "low".
-- Return ONLY the JSON array. No explanation, no markdown fences, no wrapper object.
+- Return ONLY the JSON. No explanation, no markdown fences.
 """
 
 
-class LLMService:
-    def __init__(self) -> None:
-        self.client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
-        self.model = settings.llm_model
+TILE_PROMPT_SUFFIX = (
+    "\nThis image is horizontal band {index} of {count} cut from one notebook page, top to bottom; "
+    "neighbouring bands overlap slightly. Transcribe every entry visible in this band. "
+    "If no date header is visible above an entry within this band, set its occurred_at to "
+    'the time only ("HH:MM") — the date will be filled in from the bands above.'
+)
+
+TEXT_PROMPT = (
+    "The following lines were typed (not handwritten) into a baby care log. There is no "
+    "image: apply the same recognition rules to the text. Each line is prefixed with the "
+    "date it belongs to in square brackets. Recognize all entries and return structured "
+    "JSON following the specified format.\n\n"
+)
+
+WINDOWS_PROMPT = (
+    "\nThis page was transcribed before and most of its entries are already confirmed. "
+    "Transcribe only the entries whose date and time fall within these ranges, and leave "
+    "out all others:\n"
+)
+
+VALID_TYPES = {"feeding", "diaper", "weight", "pills"}
+
+
+def _strip_fences(raw_text: str) -> str:
+    text = raw_text.strip()
+    if text.startswith("```"):
+        # Remove opening fence (```json or ```)
+        first_newline = text.index("\n")
+        text = text[first_newline + 1 :]
+        # Remove closing fence
+        if text.endswith("```"):
+            text = text[: -len("```")]
+        text = text.strip()
+    return text
+
+
+def _validate_entries(entries: object) -> list[dict]:
+    if isinstance(entries, dict) and "entries" in entries:
+        # Tool input / structured output wraps the array.
+        entries = entries["entries"]
+    if not isinstance(entries, list):
+        raise ValueError(f"Expected JSON array, got {type(entries).__name__}")
+
+    validated = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("occurred_at"), str):
+            logger.warning("Skipping entry without a time: %r", entry)
+            continue
+        if entry.get("entry_type") not in VALID_TYPES:
+            logger.warning("Skipping entry with unknown type: %s", entry.get("entry_type"))
+            continue
+        validated.append(
+            {
+                "entry_type": entry["entry_type"],
+                "subtype": entry.get("subtype"),
+                "occurred_at": entry["occurred_at"],
+                "value": entry.get("value"),
+                "notes": entry.get("notes"),
+                "raw_text": entry.get("raw_text"),
+                "confidence": entry.get("confidence", "medium"),
+            }
+        )
+    return validated
+
+
+def split_bands(image_bytes: bytes, count: int, overlap: float) -> list[bytes]:
+    """Cut an image into `count` horizontal bands, each extended by `overlap` of a band
+    height into its neighbours, re-encoded as JPEG. Needs Pillow (the 'tiling' extra)."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(image_bytes)) as opened:
+        image = ImageOps.exif_transpose(opened).convert("RGB")
+    width, height = image.size
+    step = height / count
+    pad = step * overlap / 2
+
+    bands = []
+    for i in range(count):
+        top = max(0, round(i * step - pad))
+        bottom = min(height, round((i + 1) * step + pad))
+        buffer = io.BytesIO()
+        image.crop((0, top, width, bottom)).save(buffer, format="JPEG", quality=90)
+        bands.append(buffer.getvalue())
+    return bands
+
+
+def _split_time(occurred_at: str) -> tuple[str | None, str]:
+    """("YYYY-MM-DD", "HH:MM") from a full timestamp, or (None, "HH:MM") for a bare time."""
+    if len(occurred_at) <= 5:
+        return None, occurred_at
+    return occurred_at[:10], occurred_at[11:16]
+
+
+def _merge_key(entry: dict) -> tuple:
+    return (entry["entry_type"], entry["subtype"], entry["occurred_at"], entry["value"])
+
+
+def merge_bands(bands: list[list[dict]], first_date: str | None = None) -> list[dict]:
+    """Merge per-band results in page order.
+
+    Entries repeated in the overlap between a band and the one above it are dropped
+    (matched as a multiset on type, subtype, time and value). Entries without a date
+    inherit the last date seen above them, rolling over to the next day when the
+    time goes backwards (past midnight). Undated entries above the first date header
+    take the page's first date, else `first_date`, else today's.
+    """
+    merged: list[dict] = []
+    page_dates = (_split_time(e["occurred_at"])[0] for band in bands for e in band)
+    fallback = first_date or datetime.now().strftime("%Y-%m-%d")
+    current_date = next((d for d in page_dates if d), fallback)
+    last_time = ""
+    previous_keys: Counter[tuple] = Counter()
+
+    for band in bands:
+        keys: Counter[tuple] = Counter()
+        for entry in band:
+            date, hhmm = _split_time(entry["occurred_at"])
+            if date is None:
+                entry = {**entry, "occurred_at": f"{current_date} {hhmm}"}
+                # An earlier time is past midnight, unless it's the overlap repeating
+                # an entry from the band above.
+                if hhmm < last_time and not previous_keys[_merge_key(entry)]:
+                    next_day = datetime.fromisoformat(current_date) + timedelta(days=1)
+                    entry["occurred_at"] = f"{next_day:%Y-%m-%d} {hhmm}"
+
+            key = _merge_key(entry)
+            keys[key] += 1
+            if previous_keys[key] > 0:
+                previous_keys[key] -= 1
+                continue
+            current_date, last_time = entry["occurred_at"][:10], hhmm
+            merged.append(entry)
+        previous_keys = keys
+
+    return merged
+
+
+def build_user_prompt(year: int | None = None) -> str:
+    if year is None:
+        year = datetime.now().year
+    return (
+        "Please analyze the attached photo of a handwritten baby care log. "
+        "Recognize all entries and return structured JSON following the specified format.\n"
+        f"Year for dates: {year}."
+    )
+
+
+async def encode_image(image_bytes: bytes) -> str:
+    """Base64 for the API payload, encoded off the event loop (photos run to several MB)."""
+    return await asyncio.to_thread(lambda: base64.b64encode(image_bytes).decode("ascii"))
+
+
+def build_windows_prompt(windows: list[tuple[str, str]]) -> str:
+    return WINDOWS_PROMPT + "\n".join(f"- {start} to {end}" for start, end in windows)
+
+
+def recover_entries(text: str) -> tuple[list[object], int]:
+    """Salvage the complete objects of a reply's entries array that is not valid JSON.
+
+    Objects are decoded one at a time from the first "[", so a reply cut off at
+    max_tokens keeps everything before the cut, and stray commas or a missing "]" are
+    ignored. After an object that does not decode, scanning resumes at the next "{".
+    Returns the objects and how many stretches were skipped.
+    """
+    start = text.find("[")
+    if start == -1:
+        return [], 1
+    decoder = json.JSONDecoder()
+    objects: list[object] = []
+    skipped = 0
+    pos = start + 1
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            break
+        if text[pos] == "{":
+            try:
+                obj, pos = decoder.raw_decode(text, pos)
+                objects.append(obj)
+                continue
+            except json.JSONDecodeError:
+                pass
+        skipped += 1
+        pos = text.find("{", pos + 1)
+        if pos == -1:
+            break
+    return objects, skipped
+
+
+def parse_response(text: str, truncated: bool = False) -> tuple[list[dict], str | None]:
+    """Validated entries from a raw model reply, and a note when it was only partly read.
+
+    The reply is the structured {"entries": [...]} object or a bare JSON array, possibly
+    fenced. Output that does not parse (cut off at max_tokens, a broken object) goes
+    through recover_entries; it fails only if nothing at all could be salvaged.
+    """
+    body = _strip_fences(text)
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as e:
+        objects, skipped = recover_entries(body)
+        if not objects:
+            raise ValueError(f"Unreadable model output: {e}") from e
+        entries = _validate_entries(objects)
+        cause = "was cut off at the token limit" if truncated else "was malformed"
+        return entries, (
+            f"Model output {cause}; recovered {len(entries)} entries, skipped {skipped} part(s)"
+        )
+    if truncated:
+        if isinstance(data, dict) and "entries" not in data:
+            # Forced tool use cut off inside the call: the SDK hands back the incomplete
+            # input (often {}), with no raw text left for recover_entries to salvage.
+            return [], "Model output was cut off at the token limit before any entries"
+        return _validate_entries(data), "Model output hit the token limit; entries may be missing"
+    return _validate_entries(data), None
 
-    async def parse_image(
-        self, image_bytes: bytes, mime_type: str, year: int | None = None
-    ) -> list[dict]:
-        if year is None:
-            year = datetime.now().year
 
-        image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+def record_usage(provider: str, completion: Completion) -> None:
+    group = f"llm:{provider}"
+    metrics.incr(group, "calls")
+    metrics.incr(group, "cache_hits" if completion.cache_read_tokens else "cache_misses")
+    metrics.incr(group, "input_tokens", completion.input_tokens)
+    metrics.incr(group, "cache_read_tokens", completion.cache_read_tokens)
+    metrics.incr(group, "cache_write_tokens", completion.cache_write_tokens)
+    metrics.incr(group, "output_tokens", completion.output_tokens)
 
-        user_prompt = (
-            "Please analyze the attached photo of a handwritten baby care log. "
-            "Recognize all entries and return structured JSON following the specified format.\n"
-            f"Year for dates: {year}."
-        )
 
-        response = await self.client.messages.create(
-            model=self.model,
-            max_tokens=4096,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {  # type: ignore[list-item]
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": mime_type,
-                                "data": image_b64,
-                            },
-                        },
-                        {
-                            "type": "text",
-                            "text": user_prompt,
-                        },
-                    ],
-                }
-            ],
+class LLMService:
+    def __init__(
+        self, provider: LLMProvider | None = None, hedge: LLMProvider | None = None
+    ) -> None:
+        self.provider = provider or clients.get(settings.llm_provider, settings.llm_model)
+        if hedge is None and settings.llm_hedge_provider:
+            hedge = clients.get(settings.llm_hedge_provider, settings.llm_hedge_model or None)
+        self.hedge = hedge
+        # Notes from replies that were only partly readable (see parse_response).
+        self.recovery_notes: list[str] = []
+
+    async def _extract_with(
+        self, provider: LLMProvider, image_b64: str | None, mime_type: str, user_prompt: str
+    ) -> list[dict]:
+        start = time.monotonic()
+        # Bounds the whole call, including the SDK's own retries.
+        async with asyncio.timeout(settings.llm_request_deadline_s or None):
+            completion = await provider.complete(
+                image_b64, mime_type, SYSTEM_PROMPT, user_prompt, 4096
+            )
+        record_usage(provider.name, completion)
+        logger.info(
+            "LLM raw response length: %d chars (%s, in=%d cached=%d written=%d out=%d)",
+            len(completion.text),
+            provider.name,
+            completion.input_tokens,
+            completion.cache_read_tokens,
+            completion.cache_write_tokens,
+            completion.output_tokens,
         )
 
-        raw_text = response.content[0].text  # type: ignore[union-attr]
-        logger.info("LLM raw response length: %d chars", len(raw_text))
-
-        # Strip markdown fences if present
-        text = raw_text.strip()
-        if text.startswith("```"):
-            # Remove opening fence (```json or ```)
-            first_newline = text.index("\n")
-            text = text[first_newline + 1 :]
-            # Remove closing fence
-            if text.endswith("```"):
-                text = text[: -len("```")]
-            text = text.strip()
-
-        entries = json.loads(text)
-        if not isinstance(entries, list):
-            raise ValueError(f"Expected JSON array, got {type(entries).__name__}")
-
-        valid_types = {"feeding", "diaper", "weight", "pills"}
-        validated = []
-        for entry in entries:
-            if entry.get("entry_type") not in valid_types:
-                logger.warning("Skipping entry with unknown type: %s", entry.get("entry_type"))
-                continue
-            validated.append(
-                {
-                    "entry_type": entry["entry_type"],
-                    "subtype": entry.get("subtype"),
-                    "occurred_at": entry["occurred_at"],
-                    "value": entry.get("value"),
-                    "notes": entry.get("notes"),
-                    "raw_text": entry.get("raw_text"),
-                    "confidence": entry.get("confidence", "medium"),
-                }
-            )
+        entries, note = parse_response(completion.text, completion.truncated)
+        if note:
+            metrics.incr(f"llm:{provider.name}", "partial_replies")
+            self.recovery_notes.append(note)
+        latency.record(provider.name, time.monotonic() - start)
+        return entries
+
+    async def _extract(
+        self, image_bytes: bytes | None, mime_type: str, user_prompt: str
+    ) -> list[dict]:
+        image_b64 = await encode_image(image_bytes) if image_bytes else None
+        if self.hedge is None:
+            return await self._extract_with(self.provider, image_b64, mime_type, user_prompt)
+        return await self._extract_hedged(self.hedge, image_b64, mime_type, user_prompt)
 
-        return validated
+    async def _extract_hedged(
+        self, hedge: LLMProvider, image_b64: str | None, mime_type: str, user_prompt: str
+    ) -> list[dict]:
+        """Fire the hedge provider if the primary is slower than its usual latency
+        percentile (or fails), and take whichever returns valid entries first."""
+        args = (image_b64, mime_type, user_prompt)
+        delay = latency.hedge_delay(self.provider.name)
+        pending = {asyncio.create_task(self._extract_with(self.provider, *args))}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done or next(iter(done)).exception() is not None:
+                logger.info("Hedging to %s after %.1fs", hedge.name, delay)
+                pending.add(asyncio.create_task(self._extract_with(hedge, *args)))
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    logger.warning("LLM call failed during hedged request: %s", error)
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def parse_image(
+        self, image_bytes: bytes, mime_type: str, year: int | None = None
+    ) -> list[dict]:
+        user_prompt = build_user_prompt(year)
+        if settings.llm_tile_bands > 1:
+            return await self._parse_tiled(image_bytes, user_prompt)
+        return await self._extract(image_bytes, mime_type, user_prompt)
+
+    async def reparse_image(
+        self,
+        image_bytes: bytes,
+        mime_type: str,
+        windows: list[tuple[str, str]],
+        positions: list[float],
+        year: int | None = None,
+    ) -> list[dict]:
+        """Re-extract only the given ("YYYY-MM-DD HH:MM", "YYYY-MM-DD HH:MM") windows.
+
+        The prompt limits the reply to entries inside the windows. With tiling, only the
+        bands holding an entry to redo are sent: `positions` place those entries on the
+        page (0 = top, 1 = bottom) by their rank in time, since a log runs top to bottom.
+        """
+        if not windows:
+            return []
+        user_prompt = build_user_prompt(year) + build_windows_prompt(windows)
+        count = settings.llm_tile_bands
+        if count > 1:
+            indexes = sorted({min(int(p * count), count - 1) for p in positions})
+            return await self._parse_tiled(
+                image_bytes, user_prompt, indexes, first_date=windows[0][0][:10]
+            )
+        return await self._extract(image_bytes, mime_type, user_prompt)
+
+    async def parse_text_lines(self, lines: list[tuple[str, str]]) -> list[dict]:
+        """Extract entries from typed log lines the rule-based parser couldn't read.
+
+        `lines` are (YYYY-MM-DD, line) pairs; the date gives the model the context a
+        date header would on a photographed page.
+        """
+        user_prompt = TEXT_PROMPT + "\n".join(f"[{day}] {line}" for day, line in lines)
+        return await self._extract(None, "text/plain", user_prompt)
+
+    async def _parse_tiled(
+        self,
+        image_bytes: bytes,
+        user_prompt: str,
+        indexes: list[int] | None = None,
+        first_date: str | None = None,
+    ) -> list[dict]:
+        """Extract overlapping bands concurrently, so latency is roughly one band's.
+        `indexes` picks a subset of the bands (in page order) to send."""
+        count = settings.llm_tile_bands
+        bands = await asyncio.to_thread(split_bands, image_bytes, count, settings.llm_tile_overlap)
+        if indexes is None:
+            indexes = list(range(count))
+        results = await asyncio.gather(
+            *(
+                self._extract(
+                    bands[i],
+                    "image/jpeg",
+                    user_prompt + TILE_PROMPT_SUFFIX.format(index=i + 1, count=count),
+                )
+                for i in indexes
+            )
+        )
+        merged = merge_bands(list(results), first_date)
+        logger.info(
+            "Tiled extraction: %d of %d bands, %d entries before merge, %d after",
+            len(indexes),
+            count,
+            sum(len(r) for r in results),
+            len(merged),
+        )
+        return merged
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import aiosqlite
+
+from app.config import settings
+from app.database import get_db, household_ids, use_household
+from app.models.maintenance import MaintenanceResult
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Activity:
+    """Requests in flight and when the last one finished, for idle detection."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.last_seen = time.monotonic()
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.last_seen = time.monotonic()
+
+    def idle_for(self) -> float:
+        return 0.0 if self.in_flight else time.monotonic() - self.last_seen
+
+
+activity = Activity()
+
+
+async def _timed(
+    db: aiosqlite.Connection, task: str, sql: str, script: bool = False
+) -> tuple[float, list]:
+    """Run one maintenance statement; returns its duration (ms) and rows.
+
+    `script` runs it through executescript, which steps it to completion: a plain
+    execute steps PRAGMA incremental_vacuum once, freeing a single page.
+    """
+    start = time.perf_counter()
+    rows: list = []
+    if script:
+        await db.executescript(sql)
+    else:
+        cursor = await db.execute(sql)
+        rows = list(await cursor.fetchall())
+    ms = (time.perf_counter() - start) * 1000
+    metrics.incr("db_maintenance", f"{task}_runs")
+    metrics.incr("db_maintenance", f"{task}_ms", round(ms, 1))
+    metrics.set("db_maintenance", f"last_{task}_ms", round(ms, 1))
+    return ms, rows
+
+
+async def _prune_tombstones(db: aiosqlite.Connection) -> int:
+    """Drop tombstones older than SYNC_TOMBSTONE_DAYS and record the newest version
+    pruned, so /api/changes can tell a client its `since` is too old."""
+    cursor = await db.execute(
+        "SELECT MAX(version) FROM tombstones WHERE deleted_at < datetime('now', ?)",
+        (f"-{settings.sync_tombstone_days} days",),
+    )
+    row = await cursor.fetchone()
+    if not row or row[0] is None:
+        return 0
+    cursor = await db.execute("DELETE FROM tombstones WHERE version <= ?", (row[0],))
+    await db.execute("UPDATE sync_state SET pruned_through=?", (row[0],))
+    await db.commit()
+    return cursor.rowcount
+
+
+async def run_maintenance(idle: bool = True, optimize: bool = True) -> MaintenanceResult:
+    """Checkpoint the WAL of the current household's database, and when idle also
+    return free pages to the filesystem and refresh planner statistics.
+
+    A PASSIVE checkpoint copies what it can without waiting on readers or writers.
+    TRUNCATE waits for them and resets the WAL file to zero bytes, so it only runs idle.
+    """
+    mode = "TRUNCATE" if idle else "PASSIVE"
+    result = MaintenanceResult(checkpoint_mode=mode, checkpoint_ms=0)
+    async with get_db() as db:
+        result.checkpoint_ms, rows = await _timed(
+            db, "checkpoint", f"PRAGMA wal_checkpoint({mode})"
+        )
+        if rows:
+            _, result.wal_pages, result.checkpointed_pages = rows[0]
+
+        if idle:
+            cursor = await db.execute("PRAGMA freelist_count")
+            before = (await cursor.fetchone() or (0,))[0]
+            result.vacuum_ms, _ = await _timed(
+                db,
+                "vacuum",
+                f"PRAGMA incremental_vacuum({settings.db_vacuum_max_pages});",
+                script=True,
+            )
+            cursor = await db.execute("PRAGMA freelist_count")
+            result.freed_pages = before - (await cursor.fetchone() or (0,))[0]
+
+        if idle:
+            result.tombstones_pruned = await _prune_tombstones(db)
+
+        if idle and optimize:
+            result.optimize_ms, _ = await _timed(db, "optimize", "PRAGMA optimize")
+    return result
+
+
+async def run_maintenance_scheduler(interval_s: float) -> None:
+    """Background loop maintaining every household's database; started from lifespan."""
+    last_optimize = time.monotonic()
+    while True:
+        await asyncio.sleep(interval_s)
+        idle = activity.idle_for() >= settings.db_maintenance_idle_s
+        optimize = idle and (
+            time.monotonic() - last_optimize >= settings.db_optimize_interval_hours * 3600
+        )
+        for household_id in household_ids():
+            with use_household(household_id):
+                try:
+                    result = await run_maintenance(idle=idle, optimize=optimize)
+                except Exception:
+                    logger.exception("Database maintenance failed for %s", household_id)
+                    continue
+            if idle:
+                logger.info(
+                    "Database maintenance for %s: checkpoint %d/%d pages in %.0fms,"
+                    " %d pages vacuumed",
+                    household_id,
+                    result.checkpointed_pages,
+                    result.wal_pages,
+                    result.checkpoint_ms,
+                    result.freed_pages,
+                )
+        if optimize:
+            last_optimize = time.monotonic()
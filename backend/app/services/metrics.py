@@ -0,0 +1,33 @@
+from threading import Lock
+
+
+class Metrics:
+    """In-process counters grouped by component, served by GET /api/admin/metrics.
+
+    Values are cumulative since process start; scrape and diff for rates.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._values: dict[str, dict[str, float]] = {}
+
+    def incr(self, group: str, name: str, amount: float = 1) -> None:
+        with self._lock:
+            values = self._values.setdefault(group, {})
+            values[name] = values.get(name, 0) + amount
+
+    def set(self, group: str, name: str, value: float) -> None:
+        """Record a gauge (e.g. the duration of the latest run) rather than a count."""
+        with self._lock:
+            self._values.setdefault(group, {})[name] = value
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {group: dict(values) for group, values in self._values.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,341 @@
+import importlib.util
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING, Any, Protocol, runtime_checkable
+
+from app.config import settings
+from app.models.entry import ExtractedEntry
+
+# The SDKs (and httpx) take most of the app's import time, so they are imported when
+# the first provider is built rather than at startup.
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODELS = {
+    "anthropic": "claude-sonnet-4-20250514",
+    "openai": "gpt-4o",
+}
+
+# Successful call latencies kept per provider/model for the hedge delay percentile.
+LATENCY_WINDOW = 100
+HEDGE_MIN_SAMPLES = 10
+
+# Structured replies come back as the input of this tool (Anthropic) or as a JSON
+# object matching the same schema (OpenAI): {"entries": [...]}.
+ENTRIES_TOOL = "record_entries"
+
+
+@dataclass
+class Completion:
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Prompt tokens served from / written to the provider-side prompt cache.
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    # The reply stopped at max_tokens, so its JSON is likely cut off.
+    truncated: bool = False
+
+
+def _strict(schema: Any) -> Any:
+    """The schema in the subset both providers enforce: every property required, no
+    extra properties, and no titles or defaults."""
+    if isinstance(schema, list):
+        return [_strict(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    strict = {k: _strict(v) for k, v in schema.items() if k not in ("title", "default")}
+    if strict.get("type") == "object":
+        strict["required"] = list(strict.get("properties", {}))
+        strict["additionalProperties"] = False
+    return strict
+
+
+@cache
+def entries_schema() -> dict[str, Any]:
+    """JSON schema of an extraction reply, generated from ExtractedEntry."""
+    return _strict(
+        {
+            "type": "object",
+            "properties": {
+                "entries": {"type": "array", "items": ExtractedEntry.model_json_schema()}
+            },
+        }
+    )
+
+
+class LLMProvider(Protocol):
+    """One vision-capable chat backend. Returns the model's raw text reply and usage.
+
+    `image_b64` is None for text-only requests (typed logs).
+    """
+
+    name: str
+
+    async def complete(
+        self, image_b64: str | None, mime_type: str, system: str, user_prompt: str, max_tokens: int
+    ) -> Completion: ...
+
+
+@dataclass
+class BatchResult:
+    custom_id: str
+    completion: Completion | None = None
+    # Set instead of `completion` when the request errored, expired or was canceled.
+    error: str | None = None
+
+
+@runtime_checkable
+class BatchProvider(Protocol):
+    """A provider that also accepts asynchronous message batches (see batch_processor)."""
+
+    name: str
+
+    async def submit_batch(self, requests: dict[str, dict[str, Any]]) -> str: ...
+
+    async def batch_ended(self, batch_id: str) -> bool: ...
+
+    async def batch_results(self, batch_id: str) -> list[BatchResult]: ...
+
+    def request_params(
+        self, image_b64: str | None, mime_type: str, system: str, user_prompt: str, max_tokens: int
+    ) -> dict[str, Any]: ...
+
+
+class AnthropicProvider:
+    def __init__(self, model: str, http_client: "httpx.AsyncClient | None" = None) -> None:
+        import anthropic
+
+        self.client = anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            http_client=http_client,
+            timeout=http_client.timeout if http_client else anthropic.NOT_GIVEN,
+        )
+        self.model = model
+        self.name = f"anthropic:{model}"
+
+    def request_params(
+        self, image_b64: str | None, mime_type: str, system: str, user_prompt: str, max_tokens: int
+    ) -> dict[str, Any]:
+        content: list[dict[str, Any]] = []
+        if image_b64 is not None:
+            content.append(
+                {
+                    "type": "image",
+                    "source": {"type": "base64", "media_type": mime_type, "data": image_b64},
+                }
+            )
+        content.append({"type": "text", "text": user_prompt})
+        params: dict[str, Any] = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            # The system prompt is identical on every call: mark it as a cache breakpoint
+            # so calls after the first read it from the prompt cache.
+            "system": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}],
+            "messages": [{"role": "user", "content": content}],
+        }
+        if settings.llm_structured_output:
+            # Forced tool use: the reply is the tool input, validated against the schema.
+            params["tools"] = [
+                {
+                    "name": ENTRIES_TOOL,
+                    "description": "Record every entry transcribed from the baby care log.",
+                    "input_schema": entries_schema(),
+                }
+            ]
+            params["tool_choice"] = {"type": "tool", "name": ENTRIES_TOOL}
+        return params
+
+    @staticmethod
+    def _completion(message: Any) -> Completion:
+        usage = message.usage
+        blocks = message.content
+        tool_input = next((b.input for b in blocks if getattr(b, "type", None) == "tool_use"), None)
+        if tool_input is not None:
+            text = json.dumps(tool_input, ensure_ascii=False)
+        else:
+            text = "".join(b.text for b in blocks if getattr(b, "type", "text") == "text")
+        return Completion(
+            text=text,
+            truncated=getattr(message, "stop_reason", None) == "max_tokens",
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=usage.cache_read_input_tokens or 0,
+            cache_write_tokens=usage.cache_creation_input_tokens or 0,
+        )
+
+    async def complete(
+        self, image_b64: str | None, mime_type: str, system: str, user_prompt: str, max_tokens: int
+    ) -> Completion:
+        params = self.request_params(image_b64, mime_type, system, user_prompt, max_tokens)
+        response = await self.client.messages.create(**params)
+        return self._completion(response)
+
+    async def submit_batch(self, requests: dict[str, dict[str, Any]]) -> str:
+        """Submit {custom_id: request params} as one message batch; returns the batch id."""
+        batch = await self.client.messages.batches.create(
+            requests=[
+                {"custom_id": custom_id, "params": params}  # type: ignore[typeddict-item]
+                for custom_id, params in requests.items()
+            ]
+        )
+        return batch.id
+
+    async def batch_ended(self, batch_id: str) -> bool:
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        return batch.processing_status == "ended"
+
+    async def batch_results(self, batch_id: str) -> list[BatchResult]:
+        results = []
+        async for item in await self.client.messages.batches.results(batch_id):
+            if item.result.type == "succeeded":
+                completion = self._completion(item.result.message)
+                results.append(BatchResult(item.custom_id, completion=completion))
+            elif item.result.type == "errored":
+                error = item.result.error.error
+                results.append(BatchResult(item.custom_id, error=f"{error.type}: {error.message}"))
+            else:
+                results.append(
+                    BatchResult(item.custom_id, error=f"Batch request {item.result.type}")
+                )
+        return results
+
+
+class OpenAIProvider:
+    def __init__(self, model: str, http_client: "httpx.AsyncClient | None" = None) -> None:
+        import openai
+
+        self.client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=http_client,
+            timeout=http_client.timeout if http_client else openai.NOT_GIVEN,
+        )
+        self.model = model
+        self.name = f"openai:{model}"
+
+    async def complete(
+        self, image_b64: str | None, mime_type: str, system: str, user_prompt: str, max_tokens: int
+    ) -> Completion:
+        content: list[dict[str, Any]] = []
+        if image_b64 is not None:
+            content.append(
+                {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_b64}"}}
+            )
+        content.append({"type": "text", "text": user_prompt})
+        # OpenAI caches long prompt prefixes automatically; the system prompt goes first
+        # so the static part forms that prefix.
+        extra: dict[str, Any] = {}
+        if settings.llm_structured_output:
+            extra["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "entries", "schema": entries_schema(), "strict": True},
+            }
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            max_completion_tokens=max_tokens,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": content},  # type: ignore[list-item, misc]
+            ],
+            **extra,
+        )
+        usage = response.usage
+        details = usage.prompt_tokens_details if usage else None
+        choice = response.choices[0]
+        return Completion(
+            text=choice.message.content or "",
+            truncated=choice.finish_reason == "length",
+            input_tokens=usage.prompt_tokens if usage else 0,
+            output_tokens=usage.completion_tokens if usage else 0,
+            cache_read_tokens=(details.cached_tokens or 0) if details else 0,
+        )
+
+
+PROVIDERS: dict[str, type[AnthropicProvider] | type[OpenAIProvider]] = {
+    "anthropic": AnthropicProvider,
+    "openai": OpenAIProvider,
+}
+
+
+def build_provider(
+    name: str, model: str | None = None, http_client: "httpx.AsyncClient | None" = None
+) -> LLMProvider:
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider {name!r}; expected one of {sorted(PROVIDERS)}")
+    return PROVIDERS[name](model or DEFAULT_MODELS[name], http_client)
+
+
+def _http_client() -> "httpx.AsyncClient":
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry_s,
+    )
+    timeout = httpx.Timeout(settings.llm_read_timeout_s, connect=settings.llm_connect_timeout_s)
+    http2 = settings.llm_http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("LLM_HTTP2 is set but h2 is not installed (the 'http2' extra)")
+        http2 = False
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+class ClientRegistry:
+    """Process-wide LLM providers sharing one pooled HTTP client.
+
+    Opened in lifespan and closed on shutdown, so TLS connections to the provider
+    APIs stay warm across uploads instead of each upload opening (and leaking) its
+    own pool. Used outside lifespan (tests, CLI) it opens lazily on first use.
+    """
+
+    def __init__(self) -> None:
+        self._http: httpx.AsyncClient | None = None
+        self._providers: dict[tuple[str, str | None], LLMProvider] = {}
+
+    def open(self) -> None:
+        if self._http is None:
+            self._http = _http_client()
+
+    def get(self, name: str, model: str | None = None) -> LLMProvider:
+        key = (name, model)
+        if key not in self._providers:
+            self.open()
+            self._providers[key] = build_provider(name, model, self._http)
+        return self._providers[key]
+
+    async def aclose(self) -> None:
+        self._providers.clear()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+clients = ClientRegistry()
+
+
+class LatencyTracker:
+    """Rolling window of successful call durations, per provider."""
+
+    def __init__(self) -> None:
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, provider: str, seconds: float) -> None:
+        self._samples.setdefault(provider, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on `provider` before hedging: the configured latency percentile
+        once enough samples exist, else the static LLM_HEDGE_DELAY_S."""
+        samples = sorted(self._samples.get(provider, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return settings.llm_hedge_delay_s
+        index = min(len(samples) - 1, int(settings.llm_hedge_percentile * len(samples)))
+        return samples[index]
+
+
+latency = LatencyTracker()
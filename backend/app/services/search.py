@@ -0,0 +1,117 @@
+import html
+import re
+from typing import Any
+
+import aiosqlite
+
+from app.models.entry import EntrySearchHit
+from app.serialization import RowEncoder
+
+hit_encoder = RowEncoder(EntrySearchHit)
+
+_TOKEN = re.compile(r"\w+")
+_PHRASE = re.compile(r'"([^"]*)"')
+
+# Noun/adjective/verb endings stripped from query terms, longest first. A light
+# approximation of a Russian Snowball stemmer: the stem is then matched as an FTS
+# prefix, so "капли" finds "капля"/"каплю" and "смеси" finds "смесь".
+_RU_ENDINGS = sorted(
+    (
+        "ями ами ого его ому ему ыми ими ая яя ое ее ые ие ый ий ой ей ом ем ам ям ах ях "
+        "ов ев ую юю ть ла ло ли ет ит ут ют ат ят а я о е ы и у ю ь й"
+    ).split(),
+    key=len,
+    reverse=True,
+)
+_MIN_STEM = 3
+
+# Control characters snippet() brackets matches and elided ends with; replaced after
+# the text around them is HTML-escaped.
+_OPEN, _CLOSE, _ELLIPSIS = "\x02", "\x03", "\x04"
+
+
+def normalize(text: str) -> str:
+    """Fold ё into е, which the unicode61 tokenizer treats as a distinct letter."""
+    return text.lower().replace("ё", "е")
+
+
+def fold_yo(text: str) -> str:
+    """The ё→е folding the entries_fts triggers apply; it keeps every offset in place."""
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+
+def stem_ru(token: str) -> str:
+    for ending in _RU_ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= _MIN_STEM:
+            return token[: -len(ending)]
+    return token
+
+
+def build_match_query(q: str, stemming: bool = True) -> str | None:
+    """Turn user input into an FTS5 MATCH expression.
+
+    Quoted segments become exact phrases; other words become (stemmed) prefix terms.
+    All parts must match. Returns None if the input has no searchable words.
+    """
+    q = normalize(q)
+    parts = []
+    for phrase in _PHRASE.findall(q):
+        tokens = _TOKEN.findall(phrase)
+        if tokens:
+            parts.append('"' + " ".join(tokens) + '"')
+    for token in _TOKEN.findall(_PHRASE.sub(" ", q)):
+        term = stem_ru(token) if stemming else token
+        parts.append(f'"{term}"*')
+    return " AND ".join(parts) or None
+
+
+def _render_snippet(snippet: str, hit: dict[str, Any]) -> str:
+    """Put the original text back into snippet() output from the folded index copy,
+    HTML-escape it, then turn the control markers into <mark> tags and ellipses."""
+    fragment = snippet.strip(_ELLIPSIS)
+    plain = fragment.replace(_OPEN, "").replace(_CLOSE, "")
+    for text in (hit["raw_text"], hit["notes"]):
+        start = fold_yo(text).find(plain) if text else -1
+        if start >= 0:
+            original = iter(text[start : start + len(plain)])
+            restored = "".join(c if c in (_OPEN, _CLOSE) else next(original, c) for c in fragment)
+            snippet = snippet.replace(fragment, restored, 1)
+            break
+    return (
+        html.escape(snippet)
+        .replace(_OPEN, "<mark>")
+        .replace(_CLOSE, "</mark>")
+        .replace(_ELLIPSIS, "…")
+    )
+
+
+async def search_entries(
+    db: aiosqlite.Connection, match: str, limit: int, offset: int
+) -> tuple[int, list[dict[str, Any]]]:
+    """Ranked (bm25) hits with a highlighted snippet, plus the total hit count.
+
+    The snippet is the entry's original text, HTML-escaped, with matches in <mark>.
+    """
+    cursor = await db.execute(
+        "SELECT COUNT(*) FROM entries_fts WHERE entries_fts MATCH ?", (match,)
+    )
+    row = await cursor.fetchone()
+    total = row[0] if row else 0
+
+    cursor = await db.execute(
+        """
+        SELECT e.*,
+               snippet(entries_fts, -1, char(2), char(3), char(4), 12) AS snippet,
+               bm25(entries_fts) AS rank
+        FROM entries_fts
+        JOIN entries e ON e.id = entries_fts.rowid
+        WHERE entries_fts MATCH ?
+        ORDER BY rank, e.occurred_at DESC
+        LIMIT ? OFFSET ?
+        """,
+        (match, limit, offset),
+    )
+    hits = hit_encoder.encode_many(await cursor.fetchall())
+    for hit in hits:
+        hit["snippet"] = _render_snippet(hit["snippet"], hit)
+    return total, hits
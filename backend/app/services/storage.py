@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import time
+from pathlib import Path
+
+import aiosqlite
+
+from app.config import settings
+from app.database import DEFAULT_HOUSEHOLD, get_db, household, household_ids, use_household
+from app.models.storage import GCResult
+
+logger = logging.getLogger(__name__)
+
+# Upload files live at upload_dir/blobs/ab/cd/<sha256>: two levels of 256 shard
+# directories keep each directory small however many photos accumulate.
+BLOB_DIR = "blobs"
+# Blobs younger than this are never collected: an upload writes its blob before
+# inserting the row that references it.
+GC_GRACE_S = 3600
+
+# Only one GC pass at a time.
+gc_lock = asyncio.Lock()
+
+
+def upload_root() -> Path:
+    """Upload directory of the current household; blob paths are relative to it."""
+    household_id = household.get()
+    if household_id == DEFAULT_HOUSEHOLD:
+        return Path(settings.upload_dir)
+    return Path(settings.upload_dir) / "households" / household_id
+
+
+def blob_relpath(sha: str) -> str:
+    """Path of a blob relative to upload_dir, as stored in uploads.filepath."""
+    return f"{BLOB_DIR}/{sha[:2]}/{sha[2:4]}/{sha}"
+
+
+def write_blob(content: bytes) -> tuple[str, str]:
+    """Store content under its SHA-256 unless an identical blob already exists.
+
+    Returns (sha256, filepath relative to upload_dir). A reused blob has its mtime
+    refreshed so a concurrent GC pass treats it as new.
+    """
+    sha = hashlib.sha256(content).hexdigest()
+    relpath = blob_relpath(sha)
+    path = upload_root() / relpath
+    if path.exists():
+        os.utime(path)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{sha}.part")
+        partial.write_bytes(content)
+        partial.replace(path)
+    return sha, relpath
+
+
+def resolve(filepath: str) -> Path | None:
+    """The file behind an uploads.filepath value, or None if it is missing.
+
+    Blob paths are relative to upload_dir. Rows written before content addressing hold
+    an absolute path, which may point into an old location of the upload dir, so
+    those fall back to the file name inside the current one.
+    """
+    stored = Path(filepath)
+    if not stored.is_absolute():
+        path = upload_root() / stored
+        return path if path.exists() else None
+    for candidate in (stored, upload_root() / stored.name):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def media_type(filename: str, tier: str) -> str | None:
+    """MIME type of an upload's stored file: the transcoded format once tiered
+    (uploads.tier is 'webp' or 'jpeg'), else guessed from the original filename."""
+    if tier in ("webp", "jpeg"):
+        return f"image/{tier}"
+    return mimetypes.guess_type(filename)[0]
+
+
+async def references(db: aiosqlite.Connection, sha: str) -> int:
+    """Number of uploads sharing the blob (an index lookup on uploads.sha256)."""
+    cursor = await db.execute("SELECT COUNT(*) FROM uploads WHERE sha256=?", (sha,))
+    row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+def remove_file(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError as exc:
+        logger.warning("Failed to remove upload file %s: %s", path, exc)
+
+
+def release(filepath: str, sha: str | None) -> None:
+    """Delete the file of a deleted upload if it was never shared (no sha256).
+
+    Blobs are left to the GC pass even when nothing references them any more: an
+    upload of the same photo may have reused the blob (write_blob) and be about to
+    insert its row, and only the GC's grace period covers that gap.
+    """
+    if sha is not None:
+        return
+    path = resolve(filepath)
+    if path is not None:
+        remove_file(path)
+
+
+async def release_blob(db: aiosqlite.Connection, sha: str, filepath: str) -> bool:
+    """Delete a blob right away if nothing references it; call inside the write
+    transaction that dropped the last reference, before committing it, so no new
+    reference can be inserted in between. Blobs touched within GC_GRACE_S may have
+    been reused by an upload still on its way to the database and are left to GC.
+    Returns whether the blob was removed."""
+    if await references(db, sha) > 0:
+        return False
+    path = resolve(filepath)
+    if path is None:
+        return False
+    try:
+        if time.time() - path.stat().st_mtime < GC_GRACE_S:
+            return False
+    except OSError:
+        return False
+    await asyncio.to_thread(remove_file, path)
+    return True
+
+
+def _collect(referenced: set[str], grace_s: float) -> GCResult:
+    start = time.monotonic()
+    cutoff = time.time() - grace_s
+    scanned = removed = reclaimed = 0
+    root = upload_root() / BLOB_DIR
+    if root.exists():
+        for blob in root.glob("*/*/*"):
+            scanned += 1
+            # Leftover .part files from interrupted writes are named after their blob,
+            # so they are never in `referenced` either.
+            if blob.name in referenced:
+                continue
+            stat = blob.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            remove_file(blob)
+            removed += 1
+            reclaimed += stat.st_size
+    return GCResult(
+        scanned=scanned,
+        removed=removed,
+        reclaimed_bytes=reclaimed,
+        duration_ms=(time.monotonic() - start) * 1000,
+    )
+
+
+async def collect_garbage(grace_s: float = GC_GRACE_S) -> GCResult:
+    """Remove blobs no upload references and report the space reclaimed."""
+    async with gc_lock:
+        async with get_db() as db:
+            cursor = await db.execute(
+                "SELECT DISTINCT sha256 FROM uploads WHERE sha256 IS NOT NULL"
+            )
+            referenced = {row[0] for row in await cursor.fetchall()}
+        result = await asyncio.to_thread(_collect, referenced, grace_s)
+    logger.info(
+        "Storage GC: %d of %d blobs removed, %.1f MB reclaimed in %.0fms",
+        result.removed,
+        result.scanned,
+        result.reclaimed_bytes / 1024 / 1024,
+        result.duration_ms,
+    )
+    return result
+
+
+async def migrate_legacy_uploads() -> int:
+    """Move flat `{uuid}_{filename}` files into the blob store. Returns the number moved.
+
+    Identical photos uploaded twice collapse into one blob. Rows whose file is missing
+    are left as they are.
+    """
+    async with get_db() as db:
+        cursor = await db.execute("SELECT id, filepath FROM uploads WHERE sha256 IS NULL")
+        rows = list(await cursor.fetchall())
+
+    moved = 0
+    for row in rows:
+        path = resolve(row["filepath"])
+        if path is None:
+            continue
+        content = await asyncio.to_thread(path.read_bytes)
+        sha, relpath = await asyncio.to_thread(write_blob, content)
+        async with get_db() as db:
+            await db.execute(
+                "UPDATE uploads SET filepath=?, sha256=? WHERE id=?", (relpath, sha, row["id"])
+            )
+            await db.commit()
+        remove_file(path)
+        moved += 1
+    return moved
+
+
+async def run_gc_scheduler(interval_hours: float) -> None:
+    """Background loop for scheduled GC of every household; started from lifespan."""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        for household_id in household_ids():
+            with use_household(household_id):
+                try:
+                    await collect_garbage()
+                except Exception:
+                    logger.exception("Scheduled storage GC failed for %s", household_id)
@@ -0,0 +1,157 @@
+import re
+from datetime import date, datetime, timedelta
+
+# Pattern table for typed logs, mirroring the recognition rules in llm.SYSTEM_PROMPT.
+# Matching runs on lowercased text with ё folded into е.
+_DATE = re.compile(r"^(\d{1,2})\.(\d{1,2})(?:\.(\d{2}|\d{4}))?(?!\d)\s*")
+_TIME = re.compile(r"^(\d{1,2}):(\d{2})(?!\d)\s*[-–—]?\s*")
+# Events on one line are separated by ";" or "," (but not a decimal comma).
+_SEGMENT_SPLIT = re.compile(r";|,(?!\d)")
+
+_DIAPER = re.compile(r"памперс|подгузник|(?<!\w)п\.")
+# Stems, so inflected forms match too ("мочой", "какашками", "калом").
+_PEE = re.compile(r"моч|мокр|пис")
+_POO = re.compile(r"кака|как[иу](?!\w)|(?<!\w)кал(?:а|ом|е|у)?(?!\w)")
+_DRY = re.compile(r"сух")
+
+_WEIGHT = re.compile(r"(?<!\w)(вес|взвешивание|взвесили)")
+_WEIGHT_VALUE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(кг|гр|г)(?!\w)")
+
+_VIGANTOL = re.compile(r"вигантол|витамин\s*[дd](?!\w)|vit\.?\s*d(?!\w)|вит\.?\s*д(?!\w)")
+_DOSE = re.compile(r"\d+\s*(?:капл\w*|drops?)")
+
+_FEEDING = re.compile(r"поел|(?<!\w)ел[аи]?(?!\w)|покорм|кормл|смес|мамин|бутыл")
+_SUCKLING = re.compile(r"сосал[аи]?\s+(?:тит|пип|груд|сис)")
+_BREAST = re.compile(r"мамин|мамы")
+_ML = re.compile(r"(\d+(?:[.,]\d+)?)\s*мл(?!\w)")
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def _entry(
+    entry_type: str, subtype: str | None, value: float | None = None, notes: str | None = None
+) -> dict:
+    return {"entry_type": entry_type, "subtype": subtype, "value": value, "notes": notes}
+
+
+def _diaper(segment: str) -> list[dict] | None:
+    pee, poo = bool(_PEE.search(segment)), bool(_POO.search(segment))
+    if pee and poo:
+        return [_entry("diaper", "pee+poo")]
+    if pee or poo:
+        return [_entry("diaper", "pee" if pee else "poo")]
+    if _DRY.search(segment):
+        return [_entry("diaper", "dry")]
+    return None
+
+
+def _weight(segment: str) -> list[dict] | None:
+    match = _WEIGHT_VALUE.search(segment)
+    if not match:
+        return None
+    grams = _number(match.group(1)) * (1000 if match.group(2) == "кг" else 1)
+    return [_entry("weight", None, grams)]
+
+
+def _pills(segment: str) -> list[dict]:
+    dose = _DOSE.search(segment)
+    return [_entry("pills", "vigantol", notes=dose.group(0) if dose else None)]
+
+
+def _feedings(segment: str) -> list[dict] | None:
+    """One entry per "+"-separated amount, each with its own breast/formula marker."""
+    if _SUCKLING.search(segment) and not _ML.search(segment):
+        return [_entry("feeding", "breast")]
+    parts = segment.split("+")
+    entries = []
+    for part in parts:
+        amounts = _ML.findall(part)
+        if len(amounts) != 1:
+            return None
+        subtype = "breast" if _BREAST.search(part) else "formula"
+        entries.append(_entry("feeding", subtype, _number(amounts[0])))
+    return entries
+
+
+def parse_event(segment: str) -> list[dict] | None:
+    """Entries for one event description (the text after the time), or None if it
+    doesn't match the pattern table unambiguously."""
+    if _DIAPER.search(segment):
+        return _diaper(segment)
+    if _WEIGHT.search(segment):
+        return _weight(segment)
+    if _VIGANTOL.search(segment):
+        return _pills(segment)
+    if _FEEDING.search(segment) or _SUCKLING.search(segment) or _ML.search(segment):
+        return _feedings(segment)
+    return None
+
+
+def _normalize(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+
+def _header_date(match: re.Match, year: int) -> date | None:
+    day, month, given_year = match.groups()
+    if given_year:
+        year = int(given_year) + (2000 if len(given_year) == 2 else 0)
+    try:
+        return date(year, int(month), int(day))
+    except ValueError:
+        return None
+
+
+def parse_text(text: str, today: date | None = None) -> tuple[list[dict], list[tuple[str, str]]]:
+    """Parse a typed log into entries without calling the LLM.
+
+    "DD.MM" lines (or prefixes) set the date for the lines below; each entry line starts
+    with "HH:MM" and may hold several comma-separated events. A time earlier than the
+    previous one on the same date rolls over to the next day. Returns the parsed entries
+    and the (date, line) pairs that need the LLM.
+    """
+    today = today or datetime.now().date()
+    current = today
+    last_time = ""
+    entries: list[dict] = []
+    unparsed: list[tuple[str, str]] = []
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        rest = _normalize(line)
+
+        date_match = _DATE.match(rest)
+        if date_match and (header := _header_date(date_match, today.year)):
+            current, last_time = header, ""
+            rest = rest[date_match.end() :]
+            if not rest:
+                continue
+
+        time_match = _TIME.match(rest)
+        if not time_match or int(time_match.group(1)) > 23 or int(time_match.group(2)) > 59:
+            unparsed.append((current.isoformat(), line))
+            continue
+        hhmm = f"{int(time_match.group(1)):02d}:{time_match.group(2)}"
+        if hhmm < last_time:
+            current += timedelta(days=1)
+        last_time = hhmm
+
+        segments = [s for s in _SEGMENT_SPLIT.split(rest[time_match.end() :]) if s.strip()]
+        events = [parse_event(segment) for segment in segments]
+        if not events or any(event is None for event in events):
+            unparsed.append((current.isoformat(), line))
+            continue
+        for event in events:
+            for entry in event or ():
+                entries.append(
+                    {
+                        **entry,
+                        "occurred_at": f"{current.isoformat()} {hhmm}",
+                        "raw_text": line,
+                        "confidence": "high",
+                    }
+                )
+    return entries, unparsed
@@ -0,0 +1,166 @@
+import asyncio
+import importlib.util
+import io
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import settings
+from app.database import get_db, household_ids, use_household
+from app.models.storage import TierResult
+from app.services.storage import release_blob, resolve, write_blob
+
+logger = logging.getLogger(__name__)
+
+# uploads.tier values besides the target formats: not yet considered, or considered and
+# kept because transcoding would not have saved space.
+ORIGINAL = "original"
+RETAINED = "retained"
+# Target format name (also its MIME subtype) -> Pillow encoder.
+FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+# Only one tiering pass at a time.
+tier_lock = asyncio.Lock()
+
+# A blob shared by several uploads is transcoded only when all of them are eligible.
+CANDIDATES_SQL = f"""
+SELECT sha256, MIN(filepath) AS filepath FROM uploads
+WHERE kind='image' AND tier='{ORIGINAL}' AND sha256 IS NOT NULL
+GROUP BY sha256
+HAVING SUM(reviewed=1 AND reviewed_at <= datetime('now', ?)) = COUNT(*)
+ORDER BY MIN(reviewed_at)
+LIMIT ?
+"""
+
+
+def transcode(path: str, fmt: str, quality: int) -> bytes:
+    """Re-encode an image file. Runs in a worker process; needs Pillow.
+
+    EXIF orientation is applied to the pixels, since the re-encoded file has no EXIF.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format=FORMATS[fmt], quality=quality)
+    return buffer.getvalue()
+
+
+async def _swap(sha: str, filepath: str, fmt: str, content: bytes, age: str) -> None:
+    """Point the uploads at the transcoded blob, then drop the original if unused."""
+    new_sha, new_path = await asyncio.to_thread(write_blob, content)
+    async with get_db() as db:
+        await db.execute(
+            "UPDATE uploads SET filepath=?, sha256=?, tier=?"
+            f" WHERE sha256=? AND tier='{ORIGINAL}' AND reviewed=1"
+            " AND reviewed_at <= datetime('now', ?)",
+            (new_path, new_sha, fmt, sha, age),
+        )
+        # Before committing: uploaded again (unreviewed) since the candidates were
+        # picked, or being uploaded right now, the original stays.
+        await release_blob(db, sha, filepath)
+        await db.commit()
+
+
+async def _retain(sha: str) -> None:
+    async with get_db() as db:
+        await db.execute(
+            f"UPDATE uploads SET tier='{RETAINED}' WHERE sha256=? AND tier='{ORIGINAL}'", (sha,)
+        )
+        await db.commit()
+
+
+async def tier_uploads(limit: int | None = None) -> TierResult:
+    """Transcode originals of uploads reviewed more than STORAGE_TIER_AFTER_DAYS ago.
+
+    Images are re-encoded to STORAGE_TIER_FORMAT in a process pool (Pillow is
+    CPU-bound and holds the GIL), written as a new blob, and the rows are switched
+    over to it in one UPDATE; the original blob is removed once nothing references it.
+    Originals that would not shrink are kept and marked 'retained'.
+    """
+    fmt = settings.storage_tier_format
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown STORAGE_TIER_FORMAT {fmt!r}; expected one of {sorted(FORMATS)}")
+    if importlib.util.find_spec("PIL") is None:
+        raise ValueError("Storage tiering needs Pillow (the 'tiering' extra)")
+
+    start = time.monotonic()
+    age = f"-{settings.storage_tier_after_days} days"
+    async with tier_lock:
+        async with get_db() as db:
+            cursor = await db.execute(CANDIDATES_SQL, (age, -1 if limit is None else limit))
+            candidates = [(row["sha256"], row["filepath"]) for row in await cursor.fetchall()]
+
+        tiered = retained = failed = bytes_before = bytes_after = 0
+        if candidates:
+            loop = asyncio.get_running_loop()
+            # Spawned, not forked: the parent runs aiosqlite and executor threads.
+            pool = ProcessPoolExecutor(
+                max_workers=settings.storage_tier_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            try:
+                jobs = []
+                for sha, filepath in candidates:
+                    path = resolve(filepath)
+                    if path is None:
+                        failed += 1
+                        continue
+                    job = loop.run_in_executor(
+                        pool, transcode, str(path), fmt, settings.storage_tier_quality
+                    )
+                    jobs.append((sha, filepath, path.stat().st_size, job))
+
+                for sha, filepath, size, job in jobs:
+                    try:
+                        content = await job
+                    except Exception:
+                        logger.exception("Failed to transcode %s", filepath)
+                        failed += 1
+                        continue
+                    if len(content) >= size:
+                        await _retain(sha)
+                        retained += 1
+                        continue
+                    await _swap(sha, filepath, fmt, content, age)
+                    tiered += 1
+                    bytes_before += size
+                    bytes_after += len(content)
+            finally:
+                await asyncio.to_thread(pool.shutdown)
+
+    result = TierResult(
+        tiered=tiered,
+        retained=retained,
+        failed=failed,
+        bytes_before=bytes_before,
+        bytes_after=bytes_after,
+        duration_ms=(time.monotonic() - start) * 1000,
+    )
+    logger.info(
+        "Storage tiering: %d images to %s (%.1f MB -> %.1f MB), %d retained, %d failed in %.0fms",
+        tiered,
+        fmt,
+        bytes_before / 1024 / 1024,
+        bytes_after / 1024 / 1024,
+        retained,
+        failed,
+        result.duration_ms,
+    )
+    return result
+
+
+async def run_tier_scheduler(interval_hours: float) -> None:
+    """Background loop tiering every household; started from lifespan when enabled."""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        for household_id in household_ids():
+            with use_household(household_id):
+                try:
+                    await tier_uploads()
+                except Exception:
+                    logger.exception("Scheduled storage tiering failed for %s", household_id)
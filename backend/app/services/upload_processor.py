@@ -1,95 +1,351 @@
+import asyncio
 import logging
-import mimetypes
 import time
+from collections import Counter
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from app.config import settings
-from app.database import get_db
+import aiosqlite
+
+from app.database import get_db, household_ids, use_household
+from app.services.duplicates import find_duplicate
+from app.services.leases import (
+    OWNED,
+    WORKER_ID,
+    LeaseLostError,
+    claim_upload,
+    hold_lease,
+    take_over_expired,
+)
 from app.services.llm import LLMService
+from app.services.metrics import metrics
+from app.services.storage import media_type, resolve
+from app.services.text_parser import parse_text
 
 logger = logging.getLogger(__name__)
 
+# Minutes either side of an unconfirmed entry that a selective reprocess re-extracts.
+REEXTRACT_PAD_MIN = 30
 
-async def process_upload(upload_id: int) -> None:
-    start = time.monotonic()
-    logger.info("Processing upload %d", upload_id)
 
+async def _upload_file(upload_id: int) -> tuple[str, Path, str, str | None]:
+    """Filename, path on disk, kind ('image' | 'text') and stored MIME type of an upload."""
     async with get_db() as db:
-        await db.execute("UPDATE uploads SET status='processing' WHERE id=?", (upload_id,))
-        await db.commit()
+        cursor = await db.execute(
+            "SELECT filepath, filename, kind, tier FROM uploads WHERE id=?", (upload_id,)
+        )
+        row = await cursor.fetchone()
+        if not row:
+            raise ValueError(f"Upload {upload_id} not found")
 
-    try:
-        # Read upload record
-        async with get_db() as db:
-            cursor = await db.execute(
-                "SELECT filepath, filename FROM uploads WHERE id=?", (upload_id,)
+    path = resolve(row["filepath"])
+    if path is None:
+        raise FileNotFoundError(f"Upload file not found: {row['filepath']}")
+    return row["filename"], path, row["kind"], media_type(row["filename"], row["tier"])
+
+
+async def load_image(upload_id: int) -> tuple[bytes, str]:
+    """Image bytes and MIME type for an upload."""
+    filename, image_path, _, mime_type = await _upload_file(upload_id)
+    image_bytes = await asyncio.to_thread(image_path.read_bytes)
+    size_mb = len(image_bytes) / 1024 / 1024
+    logger.info("Upload %d: file=%s size=%.1f MB", upload_id, filename, size_mb)
+
+    if not mime_type or not mime_type.startswith("image/"):
+        mime_type = "image/jpeg"
+    return image_bytes, mime_type
+
+
+async def parse_typed_log(text: str) -> tuple[list[dict], list[str]]:
+    """Rule-based parse of a typed log; only lines it can't read go to the LLM.
+    Also returns the LLM's recovery notes (see parse_response)."""
+    entries, unparsed = parse_text(text)
+    metrics.incr("text_parser", "lines_parsed", len({e["raw_text"] for e in entries}))
+    metrics.incr("text_parser", "lines_llm", len(unparsed))
+    if not unparsed:
+        return entries, []
+    llm = LLMService()
+    entries += await llm.parse_text_lines(unparsed)
+    return entries, llm.recovery_notes
+
+
+def _minute(occurred_at: str) -> str:
+    """ "YYYY-MM-DD HH:MM" of a stored ("T"-separated, with seconds) or extracted timestamp."""
+    return f"{occurred_at[:10]} {occurred_at[11:16]}"
+
+
+def _in_windows(minute: str, windows: list[tuple[str, str]]) -> bool:
+    return any(start <= minute <= end for start, end in windows)
+
+
+def reextract_windows(minutes: list[str]) -> list[tuple[str, str]]:
+    """Time ranges REEXTRACT_PAD_MIN either side of each minute, overlaps merged."""
+    pad = timedelta(minutes=REEXTRACT_PAD_MIN)
+    windows: list[list[datetime]] = []
+    for moment in sorted(datetime.fromisoformat(m) for m in minutes):
+        if windows and moment - pad <= windows[-1][1]:
+            windows[-1][1] = moment + pad
+        else:
+            windows.append([moment - pad, moment + pad])
+    return [(f"{start:%Y-%m-%d %H:%M}", f"{end:%Y-%m-%d %H:%M}") for start, end in windows]
+
+
+async def reextract_targets(upload_id: int) -> tuple[list[tuple[str, str]], list[float]] | None:
+    """Windows around the upload's unconfirmed entries and their places on the page
+    (0 = top, 1 = bottom, by rank in time), or None when it has no entries yet and
+    needs a full extraction."""
+    async with get_db() as db:
+        cursor = await db.execute(
+            "SELECT occurred_at, confirmed FROM entries WHERE upload_id=? ORDER BY occurred_at, id",
+            (upload_id,),
+        )
+        rows = list(await cursor.fetchall())
+    if not rows:
+        return None
+    targets = [
+        (i, _minute(row["occurred_at"])) for i, row in enumerate(rows) if not row["confirmed"]
+    ]
+    windows = reextract_windows([minute for _, minute in targets])
+    return windows, [(i + 0.5) / len(rows) for i, _ in targets]
+
+
+async def _insert_entries(db: aiosqlite.Connection, upload_id: int, entries: list[dict]) -> int:
+    """Insert entries for an upload; returns how many look like duplicates.
+
+    Entries matching one from another upload (same page photographed twice, pages
+    overlapping by a day) are linked to it through `duplicate_of`.
+    """
+    duplicates = 0
+    for entry in entries:
+        date = entry["occurred_at"][:10]
+        cursor = await db.execute(
+            """INSERT INTO entries
+               (upload_id, entry_type, subtype, occurred_at, date, value, notes, confidence, raw_text)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                upload_id,
+                entry["entry_type"],
+                entry.get("subtype"),
+                entry["occurred_at"],
+                date,
+                entry.get("value"),
+                entry.get("notes"),
+                entry.get("confidence"),
+                entry.get("raw_text"),
+            ),
+        )
+        assert cursor.lastrowid is not None
+        duplicate_of = await find_duplicate(db, cursor.lastrowid)
+        if duplicate_of is not None:
+            duplicates += 1
+            await db.execute(
+                "UPDATE entries SET duplicate_of=? WHERE id=?", (duplicate_of, cursor.lastrowid)
             )
-            row = await cursor.fetchone()
-            if not row:
-                raise ValueError(f"Upload {upload_id} not found")
-            filepath = row["filepath"]
-            filename = row["filename"]
-
-        # Read image file
-        image_path = Path(filepath)
-        if not image_path.exists():
-            image_path = Path(settings.upload_dir) / image_path.name
-        if not image_path.exists():
-            raise FileNotFoundError(f"Image file not found: {filepath}")
-        image_bytes = image_path.read_bytes()
-        size_mb = len(image_bytes) / 1024 / 1024
-        logger.info("Upload %d: file=%s size=%.1f MB", upload_id, filename, size_mb)
-
-        # Determine MIME type
-        mime_type, _ = mimetypes.guess_type(filename)
-        if not mime_type or not mime_type.startswith("image/"):
-            mime_type = "image/jpeg"
+    return duplicates
 
-        # Call LLM
-        llm = LLMService()
-        llm_start = time.monotonic()
-        entries = await llm.parse_image(image_bytes, mime_type)
-        llm_duration = time.monotonic() - llm_start
-        logger.info(
-            "LLM returned %d entries for upload %d in %.1fs", len(entries), upload_id, llm_duration
+
+async def _mark_done(db: aiosqlite.Connection, upload_id: int, partial: str | None) -> None:
+    """Mark the upload done; `partial` says what could not be read of the model output.
+    Raises LeaseLostError, leaving the caller's transaction uncommitted, if another worker
+    has taken the upload over."""
+    cursor = await db.execute(
+        "UPDATE uploads SET status='done', processed_at=datetime('now'), partial=?,"
+        " error_message=?, claimed_by=NULL, lease_expires_at=NULL"
+        f" WHERE id=? AND status IN ('processing', 'batched') AND {OWNED}",
+        (int(partial is not None), partial, upload_id, WORKER_ID),
+    )
+    if cursor.rowcount == 0:
+        raise LeaseLostError(f"Upload {upload_id} was taken over by another worker")
+    if partial:
+        logger.warning("Upload %d partly parsed: %s", upload_id, partial)
+
+
+async def store_entries(upload_id: int, entries: list[dict], partial: str | None = None) -> None:
+    """Insert parsed entries for an upload and mark it done, in one transaction."""
+    async with get_db() as db:
+        duplicates = await _insert_entries(db, upload_id, entries)
+        await _mark_done(db, upload_id, partial)
+        await db.commit()
+    if duplicates:
+        logger.info("Upload %d: %d entries look like duplicates", upload_id, duplicates)
+
+
+async def merge_entries(
+    upload_id: int,
+    entries: list[dict],
+    windows: list[tuple[str, str]],
+    partial: str | None = None,
+) -> None:
+    """Merge a selective re-extraction into the upload's entries and mark it done.
+
+    Only the windows are redone; extracted entries outside them are ignored. Within
+    them, entries are matched on type, subtype and minute: a match with a confirmed
+    entry is dropped (the confirmed one is never touched), a match with an unconfirmed
+    one updates it in place, and the rest are inserted. Unconfirmed entries in the
+    windows that nothing matched are deleted.
+    """
+    async with get_db() as db:
+        cursor = await db.execute(
+            "SELECT id, entry_type, subtype, occurred_at, confirmed FROM entries"
+            " WHERE upload_id=? ORDER BY occurred_at, id",
+            (upload_id,),
         )
+        confirmed: Counter[tuple] = Counter()
+        unconfirmed: dict[tuple, list[int]] = {}
+        for row in await cursor.fetchall():
+            minute = _minute(row["occurred_at"])
+            if not _in_windows(minute, windows):
+                continue
+            key = (row["entry_type"], row["subtype"], minute)
+            if row["confirmed"]:
+                confirmed[key] += 1
+            else:
+                unconfirmed.setdefault(key, []).append(row["id"])
 
-        # Insert entries
-        async with get_db() as db:
-            for entry in entries:
-                date = entry["occurred_at"][:10]
+        kept = updated = 0
+        new = []
+        for entry in entries:
+            minute = _minute(entry["occurred_at"])
+            if not _in_windows(minute, windows):
+                continue
+            key = (entry["entry_type"], entry.get("subtype"), minute)
+            if confirmed[key]:
+                confirmed[key] -= 1
+                kept += 1
+            elif unconfirmed.get(key):
                 await db.execute(
-                    """INSERT INTO entries
-                       (upload_id, entry_type, subtype, occurred_at, date, value, notes, confidence, raw_text)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    "UPDATE entries SET value=?, notes=?, confidence=?, raw_text=?,"
+                    " updated_at=datetime('now') WHERE id=?",
                     (
-                        upload_id,
-                        entry["entry_type"],
-                        entry.get("subtype"),
-                        entry["occurred_at"],
-                        date,
                         entry.get("value"),
                         entry.get("notes"),
                         entry.get("confidence"),
                         entry.get("raw_text"),
+                        unconfirmed[key].pop(0),
                     ),
                 )
+                updated += 1
+            else:
+                new.append(entry)
+
+        stale = [entry_id for ids in unconfirmed.values() for entry_id in ids]
+        await db.executemany("DELETE FROM entries WHERE id=?", [(i,) for i in stale])
+        await _insert_entries(db, upload_id, new)
+        await _mark_done(db, upload_id, partial)
+        await db.commit()
+    metrics.incr("reextract", "entries_matched_confirmed", kept)
+    metrics.incr("reextract", "entries_updated", updated)
+    metrics.incr("reextract", "entries_inserted", len(new))
+    metrics.incr("reextract", "entries_removed", len(stale))
+    logger.info(
+        "Upload %d re-extracted in %d windows: %d updated, %d added, %d removed",
+        upload_id,
+        len(windows),
+        updated,
+        len(new),
+        len(stale),
+    )
 
-            await db.execute(
-                "UPDATE uploads SET status='done', processed_at=datetime('now') WHERE id=?",
-                (upload_id,),
-            )
-            await db.commit()
 
+async def mark_failed(upload_id: int, message: str) -> None:
+    """Mark the upload failed, unless another worker has taken it over."""
+    async with get_db() as db:
+        cursor = await db.execute(
+            "UPDATE uploads SET status='failed', error_message=?, claimed_by=NULL,"
+            " lease_expires_at=NULL WHERE id=? AND status IN ('processing', 'batched')"
+            f" AND {OWNED}",
+            (message, upload_id, WORKER_ID),
+        )
+        await db.commit()
+    if cursor.rowcount == 0:
+        logger.warning("Upload %d was taken over by another worker; not failing it", upload_id)
+
+
+async def process_upload(upload_id: int) -> None:
+    # Only claim pending uploads, so one already handed to a backfill batch (or to
+    # another worker) is left alone.
+    if not await claim_upload(upload_id):
+        logger.info("Upload %d is no longer pending; skipping", upload_id)
+        return
+    await process_claimed(upload_id)
+
+
+async def process_claimed(upload_id: int) -> None:
+    """Process an upload this worker holds the lease on, renewing it meanwhile."""
+    start = time.monotonic()
+    logger.info("Processing upload %d", upload_id)
+    try:
+        async with hold_lease(upload_id):
+            await _process(upload_id)
         total_duration = time.monotonic() - start
         logger.info("Upload %d processed successfully in %.1fs", upload_id, total_duration)
 
+    except LeaseLostError:
+        # The other worker redoes it from scratch; nothing here was committed.
+        logger.warning("Upload %d was taken over by another worker; dropping results", upload_id)
     except Exception as e:
         total_duration = time.monotonic() - start
         logger.exception("Failed to process upload %d after %.1fs", upload_id, total_duration)
-        async with get_db() as db:
-            await db.execute(
-                "UPDATE uploads SET status='failed', error_message=? WHERE id=?",
-                (str(e), upload_id),
-            )
-            await db.commit()
+        await mark_failed(upload_id, str(e))
+
+
+async def _process(upload_id: int) -> None:
+    _, path, kind, _ = await _upload_file(upload_id)
+    # Entries left by a selective reprocess: only the unconfirmed ones are redone.
+    reextract = await reextract_targets(upload_id)
+    notes: list[str] = []
+    if kind == "text":
+        text = await asyncio.to_thread(path.read_text, encoding="utf-8")
+        entries, notes = await parse_typed_log(text)
+    elif reextract is not None and not reextract[0]:
+        entries = []
+    else:
+        image_bytes, mime_type = await load_image(upload_id)
+
+        # Call LLM
+        llm = LLMService()
+        llm_start = time.monotonic()
+        if reextract is None:
+            entries = await llm.parse_image(image_bytes, mime_type)
+        else:
+            entries = await llm.reparse_image(image_bytes, mime_type, *reextract)
+        notes = llm.recovery_notes
+        llm_duration = time.monotonic() - llm_start
+        logger.info(
+            "LLM returned %d entries for upload %d in %.1fs",
+            len(entries),
+            upload_id,
+            llm_duration,
+        )
+
+    partial = "; ".join(notes) or None
+    if reextract is None:
+        await store_entries(upload_id, entries, partial)
+    else:
+        await merge_entries(upload_id, entries, reextract[0], partial)
+
+
+async def sweep_expired() -> None:
+    """Take over, in every household, the uploads of workers that died mid-job (their
+    leases lapsed) and queued uploads whose BackgroundTask died with its worker, and
+    process them. One upload at a time: only the one being processed is leased to
+    this worker, so the rest can't lapse behind it while it runs."""
+    for household_id in household_ids():
+        with use_household(household_id):
+            while True:
+                try:
+                    upload_ids = await take_over_expired(limit=1)
+                except Exception:
+                    logger.exception("Lease sweep failed for %s", household_id)
+                    break
+                if not upload_ids:
+                    break
+                await process_claimed(upload_ids[0])
+
+
+async def run_lease_sweeper(interval_s: float) -> None:
+    """Background loop, in every worker; started from lifespan. The first sweep runs
+    at once, so jobs whose leases lapsed during a restart resume straight away."""
+    while True:
+        await sweep_expired()
+        await asyncio.sleep(interval_s)
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import UTC, datetime
+
+from app.models.metrics import LoopStall
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the lag histogram buckets in the "event_loop" metrics group;
+# lags above the last one count as lag_bucket_inf.
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def _bucket(lag_ms: float) -> str:
+    for bound in LAG_BUCKETS_MS:
+        if lag_ms <= bound:
+            return f"lag_bucket_{bound}ms"
+    return "lag_bucket_inf"
+
+
+class LoopWatchdog:
+    """Measures event-loop lag and captures the code blocking the loop.
+
+    A heartbeat task sleeps `interval_s` and records how late it wakes up. A watcher
+    thread checks the heartbeat; once it is `threshold_s` overdue, the loop thread is
+    stuck in synchronous code, and its current stack (which ends in the blocking call
+    of the running coroutine) is logged and kept in `stalls`, once per stall.
+    """
+
+    def __init__(self, interval_s: float = 0.1, threshold_s: float = 0.25, keep: int = 20):
+        self.interval_s = interval_s
+        self.threshold_s = threshold_s
+        self.stalls: deque[LoopStall] = deque(maxlen=keep)
+        self.max_lag_ms = 0.0
+        self._beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watcher: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    async def __aenter__(self) -> "LoopWatchdog":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start watching the running loop; must be called from it."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watcher = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watcher.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._stopped.set()
+        if self._watcher is not None:
+            await asyncio.to_thread(self._watcher.join)
+            self._watcher = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            now = time.monotonic()
+            lag_ms = max(0.0, now - self._beat - self.interval_s) * 1000
+            self._beat = now
+            self._record(lag_ms)
+
+    def _record(self, lag_ms: float) -> None:
+        metrics.incr("event_loop", "lag_samples")
+        metrics.incr("event_loop", "lag_sum_ms", round(lag_ms, 3))
+        metrics.incr("event_loop", _bucket(lag_ms))
+        if lag_ms > self.max_lag_ms:
+            self.max_lag_ms = lag_ms
+            metrics.set("event_loop", "lag_max_ms", round(lag_ms, 1))
+
+    def _watch(self) -> None:
+        """Watcher thread: sample the loop thread's stack when the heartbeat is late."""
+        poll_s = min(self.interval_s, self.threshold_s) / 2
+        captured_beat = None
+        while not self._stopped.wait(poll_s):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval_s
+            if overdue < self.threshold_s or beat == captured_beat:
+                continue
+            captured_beat = beat
+            frame = sys._current_frames().get(self._loop_thread or 0)
+            if frame is None:
+                continue
+            stall = LoopStall(
+                blocked_ms=round(overdue * 1000, 1),
+                at=datetime.now(UTC).isoformat(timespec="seconds"),
+                stack="".join(traceback.format_stack(frame)),
+            )
+            self.stalls.append(stall)
+            metrics.incr("event_loop", "stalls")
+            logger.warning(
+                "Event loop blocked for over %.0fms, stack of the loop thread:\n%s",
+                stall.blocked_ms,
+                stall.stack,
+            )
+
+
+# Process-wide instance started from lifespan when LOOP_WATCHDOG is on.
+watchdog = LoopWatchdog()
@@ -0,0 +1,45 @@
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from app import IMPORT_STARTED
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Durations of module imports and lifespan steps, reported once the app is ready."""
+
+    def __init__(self) -> None:
+        self.steps: list[tuple[str, float]] = []
+
+    def record(self, name: str, ms: float) -> None:
+        self.steps.append((name, ms))
+        metrics.incr("startup", f"{name}_ms", round(ms, 1))
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def mark(self, name: str) -> None:
+        """Record the time from the first app import until now."""
+        self.record(name, (time.perf_counter() - IMPORT_STARTED) * 1000)
+
+    def report(self) -> None:
+        total = (time.perf_counter() - IMPORT_STARTED) * 1000
+        metrics.incr("startup", "ready_ms", round(total, 1))
+        logger.info(
+            "Startup ready in %.0fms: %s",
+            total,
+            ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.steps),
+        )
+        self.steps.clear()
+
+
+startup = StartupTimer()
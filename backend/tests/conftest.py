@@ -10,8 +10,9 @@ import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 
 from app.config import Settings
-from app.database import init_db
+from app.database import close_read_pool, init_db
 from app.main import app
+from app.services.watchdog import LoopWatchdog
 
 
 @pytest.fixture(autouse=True)
@@ -20,16 +21,25 @@ def _tmp_settings(tmp_path: Path):
     db_path = str(tmp_path / "test.db")
     upload_dir = str(tmp_path / "uploads")
     Path(upload_dir).mkdir()
+    backup_dir = str(tmp_path / "backups")
 
     test_settings = Settings(
         database_path=db_path,
         upload_dir=upload_dir,
+        backup_dir=backup_dir,
+        households_dir=str(tmp_path / "households"),
         anthropic_api_key="test-key",
         llm_provider="anthropic",
     )
-    with patch("app.database.settings", test_settings), patch(
-        "app.config.settings", test_settings
-    ), patch("app.routers.uploads.settings", test_settings):
+    with (
+        patch("app.database.settings", test_settings),
+        patch("app.config.settings", test_settings),
+        patch("app.services.backup.settings", test_settings),
+        patch("app.services.storage.settings", test_settings),
+        patch("app.services.batch_processor.settings", test_settings),
+        patch("app.services.tiering.settings", test_settings),
+        patch("app.services.leases.settings", test_settings),
+    ):
         yield test_settings
 
 
@@ -37,6 +47,8 @@ def _tmp_settings(tmp_path: Path):
 async def db(_tmp_settings):
     """Initialize the DB schema for the current test."""
     await init_db()
+    yield
+    await close_read_pool()
 
 
 @pytest_asyncio.fixture
@@ -47,6 +59,15 @@ async def client(db) -> AsyncGenerator[AsyncClient]:
         yield ac
 
 
+@pytest_asyncio.fixture
+async def no_blocking() -> AsyncGenerator[LoopWatchdog]:
+    """Fail the test if anything blocks the event loop for longer than 200ms."""
+    async with LoopWatchdog(interval_s=0.01, threshold_s=0.2) as watchdog:
+        yield watchdog
+    if watchdog.stalls:
+        pytest.fail(f"Event loop blocked; stack of the loop thread:\n{watchdog.stalls[0].stack}")
+
+
 async def seed_entry(client: AsyncClient, **overrides) -> dict:
     """Helper: create an entry and return the JSON response."""
     data = {
@@ -0,0 +1,56 @@
+import gzip
+import sqlite3
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from tests.conftest import seed_entry
+
+
+def _restore(snapshot: Path, dest: Path) -> sqlite3.Connection:
+    dest.write_bytes(gzip.decompress(snapshot.read_bytes()))
+    return sqlite3.connect(dest)
+
+
+@pytest.mark.asyncio
+async def test_backup_snapshot_is_consistent_copy(client: AsyncClient, _tmp_settings, tmp_path):
+    await seed_entry(client)
+    await seed_entry(client, occurred_at="2026-03-10T09:00:00")
+
+    resp = await client.post("/api/admin/backup")
+    assert resp.status_code == 201
+    data = resp.json()
+    assert data["name"].startswith("babylog-") and data["name"].endswith(".db.gz")
+    assert data["size_bytes"] > 0
+
+    conn = _restore(Path(_tmp_settings.backup_dir) / data["name"], tmp_path / "restored.db")
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 2
+    conn.close()
+
+
+@pytest.mark.asyncio
+async def test_backup_retention(client: AsyncClient, _tmp_settings):
+    _tmp_settings.backup_retention = 2
+    names = [(await client.post("/api/admin/backup")).json()["name"] for _ in range(3)]
+
+    listed = (await client.get("/api/admin/backups")).json()["backups"]
+    assert [b["name"] for b in listed] == [names[2], names[1]]
+
+
+@pytest.mark.asyncio
+async def test_backup_bundles_images_incrementally(client: AsyncClient, _tmp_settings):
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        await client.post("/api/uploads", files={"file": ("a.jpg", b"same-bytes", "image/jpeg")})
+        await client.post("/api/uploads", files={"file": ("b.jpg", b"same-bytes", "image/jpeg")})
+
+    first = (await client.post("/api/admin/backup", params={"include_images": True})).json()
+    assert (first["image_count"], first["images_copied"]) == (2, 1)
+
+    second = (await client.post("/api/admin/backup", params={"include_images": True})).json()
+    assert (second["image_count"], second["images_copied"]) == (2, 0)
+
+    blobs = [p for p in (Path(_tmp_settings.backup_dir) / "blobs").iterdir()]
+    assert len([b for b in blobs if b.name != "index.json"]) == 1
@@ -0,0 +1,164 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db
+from app.services.providers import BatchResult, Completion
+
+
+class FakeBatchProvider:
+    """Local stand-in for a provider batch API: batches end once `finish()` is called."""
+
+    name = "fake:batch"
+
+    def __init__(self) -> None:
+        self.batches: dict[str, dict[str, dict]] = {}
+        self.ended: set[str] = set()
+        self.replies: dict[str, BatchResult] = {}
+
+    def request_params(self, image_b64, mime_type, system, user_prompt, max_tokens) -> dict:
+        return {"image": image_b64, "prompt": user_prompt}
+
+    async def submit_batch(self, requests: dict[str, dict]) -> str:
+        batch_id = f"batch-{len(self.batches) + 1}"
+        self.batches[batch_id] = requests
+        return batch_id
+
+    async def batch_ended(self, batch_id: str) -> bool:
+        return batch_id in self.ended
+
+    async def batch_results(self, batch_id: str) -> list[BatchResult]:
+        return [self.replies[custom_id] for custom_id in self.batches[batch_id]]
+
+    def finish(self, batch_id: str, custom_id: str, reply: list | str | None) -> None:
+        self.ended.add(batch_id)
+        if reply is None:
+            self.replies[custom_id] = BatchResult(custom_id, error="overloaded_error: busy")
+        else:
+            text = reply if isinstance(reply, str) else json.dumps(reply)
+            self.replies[custom_id] = BatchResult(custom_id, completion=Completion(text=text))
+
+
+ENTRY = {
+    "entry_type": "feeding",
+    "subtype": "formula",
+    "occurred_at": "2025-02-25 10:00",
+    "value": 40,
+    "confidence": "high",
+}
+
+
+@pytest.fixture
+def provider():
+    fake = FakeBatchProvider()
+    with patch("app.services.batch_processor.get_batch_provider", return_value=fake):
+        yield fake
+
+
+async def _deferred_uploads(client: AsyncClient, count: int) -> list[int]:
+    ids = []
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock) as mock_proc:
+        for i in range(count):
+            resp = await client.post(
+                "/api/uploads",
+                params={"defer": "true"},
+                files={"file": (f"page{i}.jpg", b"fake-image-data", "image/jpeg")},
+            )
+            assert resp.status_code == 201
+            ids.append(resp.json()["id"])
+    mock_proc.assert_not_called()
+    return ids
+
+
+async def _statuses() -> dict[int, tuple[str, str | None]]:
+    async with get_db() as db:
+        cursor = await db.execute("SELECT id, status, batch_id FROM uploads")
+        return {row["id"]: (row["status"], row["batch_id"]) for row in await cursor.fetchall()}
+
+
+@pytest.mark.asyncio
+async def test_backfill_groups_pending_uploads_into_batches(client, provider, _tmp_settings):
+    _tmp_settings.llm_batch_size = 2
+    ids = await _deferred_uploads(client, 3)
+
+    resp = await client.post("/api/admin/backfill")
+    assert resp.status_code == 200
+    assert resp.json() == {"submitted": 3, "batches": ["batch-1", "batch-2"], "failed": 0}
+    assert list(provider.batches["batch-1"]) == [f"upload-{ids[0]}", f"upload-{ids[1]}"]
+
+    statuses = await _statuses()
+    assert statuses[ids[2]] == ("batched", "batch-2")
+
+    # Real-time processing leaves batched uploads alone.
+    from app.services.upload_processor import process_upload
+
+    with patch("app.services.upload_processor.LLMService") as llm:
+        await process_upload(ids[0])
+    llm.assert_not_called()
+
+    # Nothing left to submit.
+    resp = await client.post("/api/admin/backfill")
+    assert resp.json()["submitted"] == 0
+
+
+@pytest.mark.asyncio
+async def test_poll_stores_results_and_tracks_per_upload_status(client, provider):
+    ids = await _deferred_uploads(client, 3)
+    await client.post("/api/admin/backfill")
+
+    resp = await client.post("/api/admin/backfill/poll")
+    assert resp.json() == {"ended": [], "done": 0, "failed": 0, "in_progress": 1}
+
+    provider.finish("batch-1", f"upload-{ids[0]}", [ENTRY])
+    provider.finish("batch-1", f"upload-{ids[1]}", "not json")
+    provider.finish("batch-1", f"upload-{ids[2]}", None)
+    resp = await client.post("/api/admin/backfill/poll")
+    assert resp.json() == {"ended": ["batch-1"], "done": 1, "failed": 2, "in_progress": 0}
+
+    detail = (await client.get(f"/api/uploads/{ids[0]}")).json()
+    assert detail["status"] == "done"
+    assert [e["value"] for e in detail["entries"]] == [40]
+
+    detail = (await client.get(f"/api/uploads/{ids[2]}")).json()
+    assert detail["status"] == "failed"
+    assert detail["error_message"] == "overloaded_error: busy"
+    assert (await client.get(f"/api/uploads/{ids[1]}")).json()["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_failed_submission_returns_uploads_to_pending(client, provider):
+    ids = await _deferred_uploads(client, 1)
+    provider.submit_batch = AsyncMock(side_effect=RuntimeError("rate limited"))
+
+    with pytest.raises(RuntimeError):
+        await client.post("/api/admin/backfill")
+    assert (await _statuses())[ids[0]] == ("pending", None)
+
+
+@pytest.mark.asyncio
+async def test_backfill_skips_uploads_queued_for_selective_reprocess(client, provider):
+    ids = await _deferred_uploads(client, 2)
+    async with get_db() as db:
+        await db.execute(
+            "INSERT INTO entries (upload_id, entry_type, subtype, occurred_at, date, confirmed)"
+            " VALUES (?, 'feeding', 'formula', '2025-02-25 10:00', '2025-02-25', 1)",
+            (ids[0],),
+        )
+        await db.commit()
+
+    resp = await client.post("/api/admin/backfill")
+    assert resp.json()["submitted"] == 1
+    assert list(provider.batches["batch-1"]) == [f"upload-{ids[1]}"]
+    assert (await _statuses())[ids[0]] == ("pending", None)
+
+
+@pytest.mark.asyncio
+async def test_backfill_rejects_provider_without_batches(client, _tmp_settings):
+    _tmp_settings.llm_provider = "openai"
+    _tmp_settings.openai_api_key = "test-key"
+    with patch("app.services.providers.settings", _tmp_settings):
+        resp = await client.post("/api/admin/backfill")
+    assert resp.status_code == 400
+    assert "does not support batches" in resp.json()["detail"]
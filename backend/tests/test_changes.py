@@ -0,0 +1,100 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db
+from app.services.maintenance import run_maintenance
+from tests.conftest import seed_entry
+
+
+async def _changes(client: AsyncClient, since: int, **params) -> dict:
+    resp = await client.get("/api/changes", params={"since": since, **params})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_changes_return_only_rows_touched_since(client: AsyncClient):
+    a = await seed_entry(client, value=10)
+    b = await seed_entry(client, value=20)
+    first = await _changes(client, 0)
+    assert [e["id"] for e in first["entries"]] == [a["id"], b["id"]]
+
+    await client.patch(f"/api/entries/{a['id']}", json={"value": 15})
+    c = await seed_entry(client, value=30)
+    await client.delete(f"/api/entries/{b['id']}")
+
+    second = await _changes(client, first["version"])
+    assert [(e["id"], e["value"]) for e in second["entries"]] == [(a["id"], 15), (c["id"], 30)]
+    assert second["deleted_entries"] == [b["id"]]
+    assert second["version"] > first["version"]
+    assert (await _changes(client, second["version"]))["entries"] == []
+
+
+@pytest.mark.asyncio
+async def test_changes_track_uploads_and_their_deleted_entries(client: AsyncClient):
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post("/api/uploads", files={"file": ("p.jpg", b"img", "image/jpeg")})
+    upload_id = resp.json()["id"]
+    entry = await seed_entry(client, upload_id=upload_id)
+    since = (await _changes(client, 0))["version"]
+
+    await client.delete(f"/api/uploads/{upload_id}")
+
+    changes = await _changes(client, since)
+    assert changes["deleted_uploads"] == [upload_id]
+    assert changes["deleted_entries"] == [entry["id"]]
+
+
+@pytest.mark.asyncio
+async def test_changes_paginate_by_limit(client: AsyncClient):
+    ids = [(await seed_entry(client, value=v))["id"] for v in (1, 2, 3)]
+
+    page = await _changes(client, 0, limit=2)
+    assert page["has_more"] is True
+    assert [e["id"] for e in page["entries"]] == ids[:2]
+    rest = await _changes(client, page["version"], limit=2)
+    assert rest["has_more"] is False
+    assert [e["id"] for e in rest["entries"]] == ids[2:]
+
+
+@pytest.mark.asyncio
+async def test_pruned_tombstones_force_a_reset(client: AsyncClient):
+    kept = await seed_entry(client, value=1)
+    gone = await seed_entry(client, value=2)
+    since = (await _changes(client, 0))["version"]
+    await client.delete(f"/api/entries/{gone['id']}")
+    async with get_db() as db:
+        await db.execute("UPDATE tombstones SET deleted_at=datetime('now', '-90 days')")
+        await db.commit()
+
+    assert (await run_maintenance()).tombstones_pruned == 1
+
+    changes = await _changes(client, since)
+    assert changes["reset"] is True
+    assert [e["id"] for e in changes["entries"]] == [kept["id"]]
+
+
+@pytest.mark.asyncio
+async def test_reset_snapshot_pages_to_the_end(client: AsyncClient):
+    ids = [(await seed_entry(client, value=v))["id"] for v in range(6)]
+    async with get_db() as db:
+        await db.execute("UPDATE sync_state SET pruned_through=5")
+        await db.commit()
+
+    page = await _changes(client, 0, limit=2)
+    assert page["reset"] is True
+    seen = [e["id"] for e in page["entries"]]
+    for _ in range(5):
+        if not page["has_more"]:
+            break
+        assert page["snapshot"] is True
+        page = await _changes(client, page["version"], limit=2, snapshot=page["snapshot"])
+        assert page["reset"] is False
+        seen += [e["id"] for e in page["entries"]]
+    assert page["has_more"] is False and page["snapshot"] is False
+    assert seen == ids
+    # A caught-up client syncs normally; a stale one is reset again.
+    assert (await _changes(client, page["version"]))["reset"] is False
+    assert (await _changes(client, 2))["reset"] is True
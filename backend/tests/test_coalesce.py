@@ -0,0 +1,85 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.routers import uploads
+from app.services.coalesce import SingleFlight
+from app.services.metrics import metrics
+from tests.conftest import seed_entry
+
+
+def _gated_query(gate: asyncio.Event, calls: list[int]):
+    async def query() -> object:
+        calls.append(1)
+        await gate.wait()
+        return object()
+
+    return query
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_run(db):
+    flight, gate, calls = SingleFlight(), asyncio.Event(), []
+    metrics.reset()
+
+    waiting = [asyncio.create_task(flight.run("q", ("a",), _gated_query(gate, calls)))]
+    waiting += [asyncio.create_task(flight.run("q", ("a",), _gated_query(gate, calls)))]
+    other = asyncio.create_task(flight.run("q", ("b",), _gated_query(gate, calls)))
+    await asyncio.sleep(0.05)
+    gate.set()
+
+    first, second = await asyncio.gather(*waiting)
+    assert first is second
+    assert await other is not first
+    assert len(calls) == 2
+    assert flight.in_flight == 0
+    counters = metrics.snapshot()["coalesce"]
+    assert counters == {"q_calls": 3, "q_coalesced": 1}
+
+
+@pytest.mark.asyncio
+async def test_call_after_a_write_does_not_join_earlier_run(client: AsyncClient):
+    flight, gate, calls = SingleFlight(), asyncio.Event(), []
+
+    before = asyncio.create_task(flight.run("q", (), _gated_query(gate, calls)))
+    await asyncio.sleep(0.05)
+    await seed_entry(client)
+    after = asyncio.create_task(flight.run("q", (), _gated_query(gate, calls)))
+    await asyncio.sleep(0.05)
+    gate.set()
+
+    assert await before is not await after
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_leaves_run_to_the_others(db):
+    flight, gate, calls = SingleFlight(), asyncio.Event(), []
+
+    first = asyncio.create_task(flight.run("q", (), _gated_query(gate, calls)))
+    second = asyncio.create_task(flight.run("q", (), _gated_query(gate, calls)))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    gate.set()
+
+    assert await second is not None
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_list_uploads_coalesces_concurrent_polls(client: AsyncClient):
+    fetch = uploads._fetch_uploads
+
+    async def slow_fetch(status: str | None) -> list[dict]:
+        await asyncio.sleep(0.1)
+        return await fetch(status)
+
+    metrics.reset()
+    with patch("app.routers.uploads._fetch_uploads", side_effect=slow_fetch) as fetched:
+        responses = await asyncio.gather(*(client.get("/api/uploads") for _ in range(3)))
+
+    assert [r.json() for r in responses] == [{"uploads": []}] * 3
+    assert fetched.call_count == 1
+    assert metrics.snapshot()["coalesce"] == {"uploads_calls": 3, "uploads_coalesced": 2}
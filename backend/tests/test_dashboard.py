@@ -96,3 +96,72 @@ async def test_dashboard_multi_day(client: AsyncClient):
     assert days[0]["feeding_total_ml"] == 50
     assert days[1]["date"] == "2026-03-10"
     assert days[1]["feeding_total_ml"] == 70
+
+
+@pytest.mark.asyncio
+async def test_dashboard_bundle_matches_separate_endpoints(client: AsyncClient):
+    await seed_entry(
+        client, entry_type="feeding", subtype="breast", value=60, occurred_at="2026-03-10T08:00:00"
+    )
+    await seed_entry(
+        client, entry_type="diaper", subtype="pee", value=None, occurred_at="2026-03-10T09:00:00"
+    )
+    await seed_entry(
+        client, entry_type="weight", subtype=None, value=3400, occurred_at="2026-03-01T10:00:00"
+    )
+    await seed_entry(
+        client, entry_type="weight", subtype=None, value=3500, occurred_at="2026-03-10T10:00:00"
+    )
+
+    params = {"from_date": "2026-03-10", "to_date": "2026-03-10"}
+    resp = await client.get("/api/dashboard/bundle", params=params)
+    assert resp.status_code == 200
+    bundle = resp.json()
+    dashboard = (await client.get("/api/dashboard", params=params)).json()
+
+    assert bundle["days"] == dashboard["days"]
+    assert bundle["latest_weight"] == dashboard["latest_weight"]
+    assert bundle["previous_weight"] == dashboard["previous_weight"]
+    assert bundle["all_time_totals"] == dashboard["all_time_totals"]
+    assert [e["value"] for e in bundle["feedings"]] == [60]
+    assert [e["subtype"] for e in bundle["diapers"]] == ["pee"]
+    assert [e["value"] for e in bundle["weights"]] == [3500]
+    assert [e["value"] for e in bundle["all_weights"]] == [3400, 3500]
+
+
+@pytest.mark.asyncio
+async def test_dashboard_bundle_all_weights_stop_at_today(client: AsyncClient):
+    await seed_entry(
+        client, entry_type="weight", subtype=None, value=3400, occurred_at="2026-03-01T10:00:00"
+    )
+    await seed_entry(
+        client, entry_type="weight", subtype=None, value=9999, occurred_at="2099-03-01T10:00:00"
+    )
+
+    resp = await client.get("/api/dashboard/bundle", params={"include": "weights"})
+    assert [e["value"] for e in resp.json()["all_weights"]] == [3400]
+
+
+@pytest.mark.asyncio
+async def test_dashboard_bundle_include_subset(client: AsyncClient):
+    await seed_entry(
+        client, entry_type="feeding", subtype="formula", value=90, occurred_at="2026-03-10T12:00:00"
+    )
+
+    resp = await client.get(
+        "/api/dashboard/bundle",
+        params={"from_date": "2026-03-10", "to_date": "2026-03-10", "include": "days,feedings"},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["days"][0]["feeding_total_ml"] == 90
+    assert len(data["feedings"]) == 1
+    assert data["diapers"] is None
+    assert data["weights"] is None
+    assert data["all_time_totals"] is None
+
+
+@pytest.mark.asyncio
+async def test_dashboard_bundle_unknown_include(client: AsyncClient):
+    resp = await client.get("/api/dashboard/bundle", params={"include": "days,bogus"})
+    assert resp.status_code == 400
@@ -0,0 +1,146 @@
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db
+from app.services.upload_processor import store_entries
+from tests.conftest import seed_entry
+
+
+async def _upload(name: str) -> int:
+    async with get_db() as db:
+        cursor = await db.execute(
+            "INSERT INTO uploads (filename, filepath, status) VALUES (?, ?, 'processing')",
+            (name, f"/tmp/{name}"),
+        )
+        await db.commit()
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+
+def _feeding(occurred_at: str, value: float = 40) -> dict:
+    return {
+        "entry_type": "feeding",
+        "subtype": "formula",
+        "occurred_at": occurred_at,
+        "value": value,
+    }
+
+
+@pytest.mark.asyncio
+async def test_store_entries_links_duplicates_from_other_uploads(client: AsyncClient):
+    first = await _upload("page.jpg")
+    # A split feeding ("20мл+20мл") on one page is two entries, not a duplicate.
+    await store_entries(first, [_feeding("2026-03-10 10:00", 20), _feeding("2026-03-10 10:00", 20)])
+    second = await _upload("page-again.jpg")
+    await store_entries(
+        second, [_feeding("2026-03-10 10:04", 20), _feeding("2026-03-10 13:00", 20)]
+    )
+
+    first_entries = (await client.get(f"/api/uploads/{first}")).json()["entries"]
+    assert [e["duplicate_of"] for e in first_entries] == [None, None]
+    second_entries = (await client.get(f"/api/uploads/{second}")).json()["entries"]
+    assert [e["duplicate_of"] for e in second_entries] == [first_entries[0]["id"], None]
+
+
+@pytest.mark.asyncio
+async def test_list_duplicates_clusters_across_bucket_boundaries(client: AsyncClient):
+    a = await seed_entry(client, occurred_at="2026-03-10T10:09:00", value=60)
+    # 10:11 falls in the next 10-minute bucket but is within the window.
+    b = await seed_entry(client, occurred_at="2026-03-10T10:11:00", value=60)
+    await seed_entry(client, occurred_at="2026-03-10T10:10:00", value=90)
+    await seed_entry(client, occurred_at="2026-03-10T11:30:00", value=60)
+    c = await seed_entry(
+        client, entry_type="diaper", subtype="pee", occurred_at="2026-03-11T08:00:00"
+    )
+    d = await seed_entry(client, entry_type="diaper", subtype="pee", occurred_at="2026-03-11 08:05")
+
+    resp = await client.get("/api/entries/duplicates")
+    assert resp.status_code == 200
+    clusters = [[e["id"] for e in cluster["entries"]] for cluster in resp.json()["clusters"]]
+    assert clusters == [[c["id"], d["id"]], [a["id"], b["id"]]]
+
+    resp = await client.get("/api/entries/duplicates", params={"to_date": "2026-03-10"})
+    assert len(resp.json()["clusters"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_list_duplicates_skips_same_upload_clusters(client: AsyncClient):
+    upload = await _upload("page.jpg")
+    await store_entries(
+        upload, [_feeding("2026-03-10 10:00", 20), _feeding("2026-03-10 10:00", 20)]
+    )
+
+    resp = await client.get("/api/entries/duplicates")
+    assert resp.json()["clusters"] == []
+
+
+@pytest.mark.asyncio
+async def test_merge_duplicates_keeps_one_entry(client: AsyncClient):
+    a = await seed_entry(client, occurred_at="2026-03-10T10:00:00")
+    b = await seed_entry(client, occurred_at="2026-03-10T10:02:00")
+    await client.patch(f"/api/entries/{b['id']}", json={"confirmed": True})
+
+    resp = await client.post(
+        "/api/entries/duplicates/merge", json={"keep_id": a["id"], "merge_ids": [b["id"]]}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["id"] == a["id"]
+    assert resp.json()["confirmed"] is True
+
+    resp = await client.get(
+        "/api/entries", params={"from_date": "2026-03-10", "to_date": "2026-03-10"}
+    )
+    assert [e["id"] for e in resp.json()["entries"]] == [a["id"]]
+    assert (await client.get("/api/entries/duplicates")).json()["clusters"] == []
+
+
+@pytest.mark.asyncio
+async def test_merge_duplicates_validates_ids(client: AsyncClient):
+    a = await seed_entry(client)
+    resp = await client.post(
+        "/api/entries/duplicates/merge", json={"keep_id": a["id"], "merge_ids": [a["id"]]}
+    )
+    assert resp.status_code == 400
+    resp = await client.post(
+        "/api/entries/duplicates/merge", json={"keep_id": a["id"], "merge_ids": [9999]}
+    )
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_dashboard_leaves_out_linked_duplicates(client: AsyncClient):
+    first = await _upload("page.jpg")
+    diaper = {"entry_type": "diaper", "subtype": "pee", "occurred_at": "2026-03-10 11:00"}
+    await store_entries(first, [_feeding("2026-03-10 10:00", 20), diaper])
+    second = await _upload("page-again.jpg")
+    await store_entries(second, [_feeding("2026-03-10 10:04", 20), diaper])
+
+    resp = await client.get(
+        "/api/dashboard", params={"from_date": "2026-03-10", "to_date": "2026-03-10"}
+    )
+    data = resp.json()
+    assert (data["days"][0]["feeding_count"], data["days"][0]["feeding_total_ml"]) == (1, 20)
+    totals = data["all_time_totals"]
+    assert (totals["feeding_formula"], totals["diaper_total"]) == (1, 1)
+
+    resp = await client.get(
+        "/api/dashboard/bundle", params={"from_date": "2026-03-10", "to_date": "2026-03-10"}
+    )
+    bundle = resp.json()
+    assert (len(bundle["feedings"]), len(bundle["diapers"])) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_merge_rejects_entries_outside_the_cluster(client: AsyncClient):
+    a = await seed_entry(client, occurred_at="2026-03-10T10:00:00")
+    other_value = await seed_entry(client, occurred_at="2026-03-10T10:02:00", value=90)
+    hours_later = await seed_entry(client, occurred_at="2026-03-10T14:00:00")
+
+    for unrelated in (other_value, hours_later):
+        resp = await client.post(
+            "/api/entries/duplicates/merge",
+            json={"keep_id": a["id"], "merge_ids": [unrelated["id"]]},
+        )
+        assert resp.status_code == 409
+    resp = await client.get("/api/entries", params={"from_date": "2026-03-10"})
+    assert len(resp.json()["entries"]) == 3
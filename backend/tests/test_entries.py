@@ -104,3 +104,22 @@ async def test_delete_entry(client: AsyncClient):
 async def test_delete_nonexistent_entry(client: AsyncClient):
     resp = await client.delete("/api/entries/9999")
     assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_entries_fast_path_matches_single_entry_shape(client: AsyncClient):
+    created = await seed_entry(client, occurred_at="2026-03-10T08:00:00")
+    patched = (
+        await client.patch(f"/api/entries/{created['id']}", json={"confirmed": True})
+    ).json()
+
+    listed = (await client.get("/api/entries", params={"from_date": "2026-03-10"})).json()
+    assert listed["entries"] == [patched]
+    assert listed["entries"][0]["confirmed"] is True
+
+
+@pytest.mark.asyncio
+async def test_list_entries_keeps_openapi_schema(client: AsyncClient):
+    schema = (await client.get("/openapi.json")).json()
+    ok = schema["paths"]["/api/entries"]["get"]["responses"]["200"]
+    assert ok["content"]["application/json"]["schema"]["$ref"].endswith("/EntryListResponse")
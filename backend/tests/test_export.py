@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.routers.export import COLUMNS
+from tests.conftest import seed_entry
+
+
+async def _seed(client: AsyncClient) -> None:
+    await seed_entry(client, occurred_at="2026-03-09T08:00:00", value=50)
+    await seed_entry(client, occurred_at="2026-03-10T08:00:00", value=70, notes="вигантол")
+    await seed_entry(
+        client, entry_type="diaper", subtype="pee", value=None, occurred_at="2026-03-11T08:00:00"
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_csv(client: AsyncClient):
+    await _seed(client)
+
+    resp = await client.get("/api/export/entries", params={"format": "csv"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert "babylog-entries.csv" in resp.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [r["occurred_at"] for r in rows] == [
+        "2026-03-09T08:00:00",
+        "2026-03-10T08:00:00",
+        "2026-03-11T08:00:00",
+    ]
+    assert rows[1]["notes"] == "вигантол"
+
+
+@pytest.mark.asyncio
+async def test_export_csv_empty_has_header(client: AsyncClient):
+    resp = await client.get("/api/export/entries", params={"format": "csv"})
+    assert resp.status_code == 200
+    assert resp.text.splitlines()[0].startswith("id,upload_id,entry_type")
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_with_range_and_type(client: AsyncClient):
+    await _seed(client)
+
+    resp = await client.get(
+        "/api/export/entries",
+        params={"format": "ndjson", "type": "feeding", "from_date": "2026-03-10"},
+    )
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [(e["value"], e["confirmed"]) for e in lines] == [(70, False)]
+
+
+@pytest.mark.asyncio
+async def test_export_streams_multiple_batches(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr("app.routers.export.BATCH_SIZE", 1)
+    await _seed(client)
+    # Logged later for an earlier time, and twice for the same time.
+    await seed_entry(client, occurred_at="2026-03-10T07:00:00", value=30)
+    await seed_entry(client, occurred_at="2026-03-10T07:00:00", value=40)
+
+    resp = await client.get("/api/export/entries", params={"format": "ndjson"})
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row["value"] for row in rows] == [50, 30, 40, 70, None]
+
+
+@pytest.mark.asyncio
+async def test_export_parquet(client: AsyncClient, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr("app.routers.export.BATCH_SIZE", 2)
+    await _seed(client)
+
+    resp = await client.get("/api/export/entries", params={"format": "parquet"})
+    assert resp.status_code == 200
+    parquet = pq.ParquetFile(io.BytesIO(resp.content))
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read()
+    assert table.column_names == [*COLUMNS]
+    assert table.column("value").to_pylist() == [50, 70, None]
+
+
+@pytest.mark.asyncio
+async def test_export_rejects_unknown_format(client: AsyncClient):
+    resp = await client.get("/api/export/entries", params={"format": "xlsx"})
+    assert resp.status_code == 422
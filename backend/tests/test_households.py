@@ -0,0 +1,94 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app import database
+from tests.conftest import seed_entry
+
+SMITH = {"X-Household": "smith"}
+
+
+@pytest.mark.asyncio
+async def test_households_have_separate_databases(client: AsyncClient, _tmp_settings):
+    await seed_entry(client, value=60)
+    resp = await client.post(
+        "/api/entries",
+        headers=SMITH,
+        json={"entry_type": "feeding", "occurred_at": "2026-03-10T09:00:00", "value": 90},
+    )
+    assert resp.status_code == 201
+    await client.put("/api/settings", headers=SMITH, json={"baby_name": "Ada"})
+
+    day = {"from_date": "2026-03-10", "to_date": "2026-03-10"}
+    default_entries = (await client.get("/api/entries", params=day)).json()["entries"]
+    smith_entries = (await client.get("/api/entries", params=day, headers=SMITH)).json()["entries"]
+    assert [e["value"] for e in default_entries] == [60]
+    assert [e["value"] for e in smith_entries] == [90]
+    assert (await client.get("/api/settings")).json()["baby_name"] is None
+    assert Path(_tmp_settings.households_dir, "smith.db").exists()
+
+
+@pytest.mark.asyncio
+async def test_invalid_household_rejected(client: AsyncClient):
+    resp = await client.get("/api/entries", headers={"X-Household": "../etc"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_household_uploads_stored_apart(client: AsyncClient, _tmp_settings):
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post(
+            "/api/uploads", headers=SMITH, files={"file": ("p.jpg", b"smith-page", "image/jpeg")}
+        )
+    upload_id = resp.json()["id"]
+
+    root = Path(_tmp_settings.upload_dir)
+    assert list((root / "households" / "smith" / "blobs").glob("*/*/*"))
+    assert not (root / "blobs").exists()
+    image = await client.get(f"/api/uploads/{upload_id}/image", headers=SMITH)
+    assert image.content == b"smith-page"
+    assert (await client.get(f"/api/uploads/{upload_id}/image")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_admin_lists_every_household(client: AsyncClient):
+    await seed_entry(client)
+    await client.put("/api/settings", headers=SMITH, json={"baby_name": "Ada"})
+    await client.post(
+        "/api/entries",
+        headers=SMITH,
+        json={"entry_type": "diaper", "subtype": "pee", "occurred_at": "2026-03-10T09:00:00"},
+    )
+
+    resp = await client.get("/api/admin/households")
+    households = {h["id"]: h for h in resp.json()["households"]}
+    assert set(households) == {"default", "smith"}
+    assert households["smith"]["baby_name"] == "Ada"
+    assert households["smith"]["entry_count"] == 1
+    assert households["default"]["entry_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_read_pools_are_lru_bounded(client: AsyncClient, _tmp_settings):
+    _tmp_settings.household_pool_cache = 2
+    for household_id in ("a", "b", "c"):
+        resp = await client.get("/api/entries/duplicates", headers={"X-Household": household_id})
+        assert resp.status_code == 200
+    await client.get("/api/entries/duplicates", headers={"X-Household": "b"})
+
+    assert list(database._read_pools) == [
+        database.database_path("c"),
+        database.database_path("b"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_reads_share_one_pool(db):
+    path = database.database_path("fresh")
+    pools = await asyncio.gather(*(database._read_pool(path) for _ in range(3)))
+
+    assert pools[0] is pools[1] is pools[2]
+    assert database._read_pools[path] is pools[0]
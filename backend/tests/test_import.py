@@ -0,0 +1,148 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.cli import main as cli_main
+from tests.conftest import seed_entry
+
+CSV_BODY = (
+    "entry_type,subtype,occurred_at,value,notes\n"
+    "feeding,breast,2026-03-10 08:00,60,\n"
+    "feeding,formula,not-a-date,90,\n"
+    "diaper,pee,2026-03-10 09:00,,мокрый\n"
+    ",formula,2026-03-10 10:00,30,\n"
+)
+
+
+async def _list(client: AsyncClient) -> list[dict]:
+    resp = await client.get("/api/entries", params={"from_date": "2026-01-01"})
+    return resp.json()["entries"]
+
+
+@pytest.mark.asyncio
+async def test_import_csv_reports_line_errors(client: AsyncClient):
+    resp = await client.post(
+        "/api/import/entries", files={"file": ("log.csv", CSV_BODY.encode(), "text/csv")}
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["imported"] == 2
+    assert data["error_count"] == 2
+    assert [e["line"] for e in data["errors"]] == [3, 5]
+    assert data["errors"][0]["error"].startswith("occurred_at")
+
+    entries = await _list(client)
+    assert [(e["subtype"], e["value"], e["notes"]) for e in entries] == [
+        ("breast", 60, None),
+        ("pee", None, "мокрый"),
+    ]
+    assert entries[0]["date"] == "2026-03-10"
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson_bad_lines(client: AsyncClient):
+    body = "\n".join(
+        [
+            json.dumps({"entry_type": "weight", "occurred_at": "2026-03-10 10:00", "value": 3500}),
+            "{not json",
+            "[1, 2]",
+            json.dumps({"entry_type": "feeding", "occurred_at": "2026-03-10 11:00", "value": "x"}),
+        ]
+    )
+    resp = await client.post(
+        "/api/import/entries",
+        params={"format": "ndjson"},
+        files={"file": ("backup.txt", body.encode(), "application/x-ndjson")},
+    )
+    data = resp.json()
+    assert data["imported"] == 1
+    assert [e["line"] for e in data["errors"]] == [2, 3, 4]
+    assert data["errors"][2]["error"].startswith("value")
+
+
+@pytest.mark.asyncio
+async def test_import_dedupe_against_existing_and_within_file(client: AsyncClient):
+    await seed_entry(client, occurred_at="2026-03-10 08:00", value=60)
+    body = (
+        "entry_type,subtype,occurred_at,value\n"
+        "feeding,breast,2026-03-10 08:00,60\n"
+        "feeding,breast,2026-03-10 12:00,70\n"
+        "feeding,breast,2026-03-10 12:00,70\n"
+    )
+    resp = await client.post(
+        "/api/import/entries",
+        params={"dedupe": "true"},
+        files={"file": ("log.csv", body.encode(), "text/csv")},
+    )
+    data = resp.json()
+    assert (data["imported"], data["duplicates"]) == (1, 2)
+    assert len(await _list(client)) == 2
+
+
+@pytest.mark.asyncio
+async def test_import_roundtrips_export(client: AsyncClient):
+    await seed_entry(client, occurred_at="2026-03-10T08:00:00", value=60)
+    await seed_entry(client, entry_type="diaper", subtype="poo", value=None)
+    exported = (await client.get("/api/export/entries", params={"format": "ndjson"})).content
+
+    resp = await client.post(
+        "/api/import/entries", files={"file": ("entries.ndjson", exported, "application/x-ndjson")}
+    )
+    assert resp.json()["imported"] == 2
+    assert len(await _list(client)) == 4
+
+
+@pytest.mark.asyncio
+async def test_import_drops_unknown_upload_link(client: AsyncClient):
+    body = json.dumps(
+        {"entry_type": "feeding", "occurred_at": "2026-03-10 08:00", "upload_id": 999}
+    )
+    resp = await client.post(
+        "/api/import/entries", files={"file": ("e.jsonl", body.encode(), "application/x-ndjson")}
+    )
+    assert resp.json()["imported"] == 1
+    assert (await _list(client))[0]["upload_id"] is None
+
+
+@pytest.mark.asyncio
+async def test_import_unknown_format(client: AsyncClient):
+    resp = await client.post(
+        "/api/import/entries", files={"file": ("log.xlsx", b"data", "application/octet-stream")}
+    )
+    assert resp.status_code == 400
+
+
+def test_cli_import_entries(_tmp_settings, tmp_path, capsys):
+    path = tmp_path / "log.csv"
+    path.write_text(CSV_BODY, encoding="utf-8")
+
+    assert cli_main(["import-entries", str(path)]) == 1
+    out = capsys.readouterr()
+    assert "Imported 2 entries" in out.out
+    assert "line 3:" in out.err
+
+
+@pytest.mark.asyncio
+async def test_import_carries_confirmed_over(client: AsyncClient):
+    entry = await seed_entry(client, occurred_at="2026-03-10T08:00:00", value=60)
+    await client.patch(f"/api/entries/{entry['id']}", json={"confirmed": True})
+    await seed_entry(client, occurred_at="2026-03-10T09:00:00", value=70)
+    exported = (await client.get("/api/export/entries")).content
+
+    resp = await client.post(
+        "/api/import/entries", files={"file": ("entries.csv", exported, "text/csv")}
+    )
+    assert resp.json()["imported"] == 2
+    imported = [e for e in await _list(client) if e["id"] > entry["id"] + 1]
+    assert [(e["value"], e["confirmed"]) for e in imported] == [(60, True), (70, False)]
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_bad_encoding_before_writing(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr("app.services.importer.CHUNK_SIZE", 1)
+    body = CSV_BODY.encode() + "feeding,breast,2026-03-11 08:00,60,сыт\n".encode("cp1251")
+
+    resp = await client.post("/api/import/entries", files={"file": ("log.csv", body, "text/csv")})
+    assert resp.status_code == 400
+    assert await _list(client) == []
@@ -0,0 +1,148 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db
+from app.services.leases import (
+    WORKER_ID,
+    LeaseLostError,
+    claim_upload,
+    hold_lease,
+    take_over_expired,
+)
+from app.services.upload_processor import mark_failed, store_entries, sweep_expired
+
+
+async def _upload(status: str = "pending", claimed_by: str | None = None, lease: str = "") -> int:
+    """An upload row; `lease` is a datetime() modifier for lease_expires_at."""
+    async with get_db() as db:
+        cursor = await db.execute(
+            "INSERT INTO uploads (filename, filepath, status, claimed_by, lease_expires_at)"
+            " VALUES ('p.jpg', '/tmp/p.jpg', ?, ?, CASE WHEN ? = '' THEN NULL"
+            " ELSE datetime('now', ?) END)",
+            (status, claimed_by, lease, lease),
+        )
+        await db.commit()
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+
+async def _row(upload_id: int) -> dict:
+    async with get_db() as db:
+        cursor = await db.execute(
+            "SELECT status, claimed_by, lease_expires_at,"
+            " lease_expires_at > datetime('now') AS live FROM uploads WHERE id=?",
+            (upload_id,),
+        )
+        return dict(await cursor.fetchone())
+
+
+@pytest.mark.asyncio
+async def test_claim_is_exclusive(db):
+    upload_id = await _upload()
+
+    claims = await asyncio.gather(*(claim_upload(upload_id) for _ in range(5)))
+    assert claims.count(True) == 1
+    row = await _row(upload_id)
+    assert row["status"] == "processing"
+    assert row["claimed_by"] == WORKER_ID and row["live"]
+
+
+@pytest.mark.asyncio
+async def test_sweep_processes_left_behind_uploads_one_at_a_time(db):
+    live = await _upload("processing", "other:1", "+60 seconds")
+    lapsed = await _upload("processing", "other:2", "-60 seconds")
+    unleased = await _upload("processing")
+    # Queued by a worker that died before its BackgroundTask claimed it.
+    orphaned = await _upload("pending", "other:2", "-1 second")
+    deferred = await _upload("pending")
+    seen: list[tuple[int, list[str]]] = []
+
+    async def process(upload_id: int) -> None:
+        async with get_db() as db_:
+            cursor = await db_.execute(
+                "SELECT status FROM uploads WHERE id IN (?, ?, ?) ORDER BY id",
+                (lapsed, unleased, orphaned),
+            )
+            seen.append((upload_id, [row[0] for row in await cursor.fetchall()]))
+            await db_.execute("UPDATE uploads SET status='done' WHERE id=?", (upload_id,))
+            await db_.commit()
+
+    with patch("app.services.upload_processor.process_claimed", side_effect=process):
+        await sweep_expired()
+
+    # Each upload is taken over only when its turn comes, so none lapses while queued.
+    assert seen == [
+        (lapsed, ["processing", "processing", "pending"]),
+        (unleased, ["done", "processing", "pending"]),
+        (orphaned, ["done", "done", "processing"]),
+    ]
+    assert (await _row(live))["claimed_by"] == "other:1"
+    assert (await _row(deferred))["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_queued_uploads_are_leased_until_claimed(client: AsyncClient):
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        queued = await client.post("/api/uploads", files={"file": ("p.jpg", b"a", "image/jpeg")})
+        deferred = await client.post(
+            "/api/uploads",
+            params={"defer": "true"},
+            files={"file": ("q.jpg", b"b", "image/jpeg")},
+        )
+
+    row = await _row(queued.json()["id"])
+    assert (row["status"], row["claimed_by"], row["live"]) == ("pending", WORKER_ID, 1)
+    assert (await _row(deferred.json()["id"]))["claimed_by"] is None
+
+
+@pytest.mark.asyncio
+async def test_sweeper_takes_over_lapsed_leases(db):
+    await _upload("processing", "other:1", "+60 seconds")
+    lapsed = await _upload("processing", "other:2", "-60 seconds")
+    # Claimed for a backfill batch by a worker that died before submitting it.
+    unsubmitted = await _upload("batched", "other:2", "-1 second")
+
+    assert await take_over_expired() == [lapsed]
+    assert (await _row(lapsed))["claimed_by"] == WORKER_ID
+    assert (await _row(unsubmitted))["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_renews_lease(db, _tmp_settings):
+    upload_id = await _upload("processing", WORKER_ID, "+1 second")
+    _tmp_settings.job_lease_s = 3
+
+    async with hold_lease(upload_id):
+        await asyncio.sleep(1.2)
+    # datetime('now') has whole seconds: the unrenewed lease would have lapsed by now,
+    # the renewed one (3 s from about 1 s in) is at least 2 s past the original.
+    async with get_db() as db_:
+        cursor = await db_.execute(
+            "SELECT lease_expires_at > datetime('now', '+1 second') FROM uploads WHERE id=?",
+            (upload_id,),
+        )
+        assert (await cursor.fetchone())[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_results_dropped_after_takeover(db):
+    upload_id = await _upload("processing", "other:1", "+60 seconds")
+    entry = {"entry_type": "feeding", "subtype": "formula", "occurred_at": "2026-03-10 10:00"}
+
+    with pytest.raises(LeaseLostError):
+        await store_entries(upload_id, [entry])
+    await mark_failed(upload_id, "boom")
+
+    row = await _row(upload_id)
+    assert (row["status"], row["claimed_by"]) == ("processing", "other:1")
+    async with get_db() as db_:
+        cursor = await db_.execute("SELECT COUNT(*) FROM entries")
+        assert (await cursor.fetchone())[0] == 0
+
+    # Batch results still land on uploads nobody holds a lease on.
+    batched = await _upload("batched")
+    await store_entries(batched, [entry])
+    assert (await _row(batched))["status"] == "done"
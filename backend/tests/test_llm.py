@@ -0,0 +1,349 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.llm import LLMService, merge_bands, parse_response
+from app.services.metrics import metrics
+from app.services.providers import (
+    AnthropicProvider,
+    ClientRegistry,
+    Completion,
+    LatencyTracker,
+    build_provider,
+    entries_schema,
+)
+from app.services.upload_processor import process_upload
+
+
+class FakeProvider:
+    """Local stand-in for a provider: replies with canned entry lists after a delay."""
+
+    def __init__(self, name: str, replies: list, delay: float = 0) -> None:
+        self.name = name
+        self.replies = list(replies)
+        self.delay = delay
+        self.prompts: list[str] = []
+        self.cancelled = False
+
+    async def complete(self, image_b64, mime_type, system, user_prompt, max_tokens) -> Completion:
+        self.prompts.append(user_prompt)
+        reply = self.replies.pop(0)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(reply, Exception):
+            raise reply
+        return Completion(text=reply if isinstance(reply, str) else json.dumps(reply))
+
+
+def _entry(occurred_at: str, entry_type: str = "feeding", value: float | None = 30) -> dict:
+    return {
+        "entry_type": entry_type,
+        "subtype": "formula" if entry_type == "feeding" else "pee",
+        "occurred_at": occurred_at,
+        "value": value,
+        "notes": None,
+        "raw_text": None,
+        "confidence": "high",
+    }
+
+
+def test_merge_bands_drops_overlap_and_propagates_dates():
+    top = [
+        _entry("2026-02-25 21:00"),
+        _entry("2026-02-25 23:00"),
+        _entry("2026-02-25 23:30", "diaper", None),
+    ]
+    # The overlap repeats 23:00/23:30 without the date header; 01:00 is past midnight.
+    bottom = [_entry("23:00"), _entry("23:30", "diaper", None), _entry("01:00")]
+
+    merged = merge_bands([top, bottom])
+    assert [e["occurred_at"] for e in merged] == [
+        "2026-02-25 21:00",
+        "2026-02-25 23:00",
+        "2026-02-25 23:30",
+        "2026-02-26 01:00",
+    ]
+
+
+def test_merge_bands_keeps_repeats_within_a_band():
+    # A mixed feeding split into two identical-looking parts stays as two entries.
+    band = [_entry("2026-02-25 10:00"), _entry("2026-02-25 10:00")]
+    assert len(merge_bands([band, [_entry("10:00")]])) == 2
+
+
+def test_merge_bands_dates_entries_above_first_header():
+    merged = merge_bands([[_entry("06:00")], [_entry("2026-02-26 09:00")]])
+    assert merged[0]["occurred_at"] == "2026-02-26 06:00"
+
+
+@pytest.mark.asyncio
+async def test_parse_image_tiled_runs_band_per_call(_tmp_settings):
+    image_module = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    image_module.new("RGB", (40, 300), "white").save(buffer, format="PNG")
+
+    _tmp_settings.llm_tile_bands = 3
+    provider = FakeProvider(
+        "fake",
+        [[_entry("2026-02-25 08:00")], [_entry("08:00"), _entry("11:00")], [_entry("14:00")]],
+    )
+    with patch("app.services.llm.settings", _tmp_settings):
+        entries = await LLMService(provider).parse_image(buffer.getvalue(), "image/png", year=2026)
+
+    assert len(provider.prompts) == 3
+    assert "band 2 of 3" in provider.prompts[1]
+    assert [e["occurred_at"] for e in entries] == [
+        "2026-02-25 08:00",
+        "2026-02-25 11:00",
+        "2026-02-25 14:00",
+    ]
+
+
+async def test_reparse_image_sends_only_bands_to_redo(_tmp_settings):
+    image_module = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    image_module.new("RGB", (40, 400), "white").save(buffer, format="PNG")
+
+    _tmp_settings.llm_tile_bands = 4
+    provider = FakeProvider("fake", [[_entry("09:10")], [_entry("21:00")]])
+    windows = [("2026-02-25 08:30", "2026-02-25 09:30"), ("2026-02-25 20:30", "2026-02-25 21:30")]
+    with patch("app.services.llm.settings", _tmp_settings):
+        entries = await LLMService(provider).reparse_image(
+            buffer.getvalue(), "image/png", windows, [0.1, 0.2, 0.9], year=2026
+        )
+
+    assert len(provider.prompts) == 2
+    assert "band 1 of 4" in provider.prompts[0]
+    assert "band 4 of 4" in provider.prompts[1]
+    assert "- 2026-02-25 20:30 to 2026-02-25 21:30" in provider.prompts[0]
+    assert [e["occurred_at"] for e in entries] == ["2026-02-25 09:10", "2026-02-25 21:00"]
+
+
+@pytest.fixture
+def _hedge_settings(_tmp_settings):
+    _tmp_settings.llm_hedge_delay_s = 0.05
+    with (
+        patch("app.services.providers.settings", _tmp_settings),
+        patch("app.services.providers.latency", LatencyTracker()),
+        patch("app.services.llm.latency", LatencyTracker()),
+    ):
+        yield _tmp_settings
+
+
+@pytest.mark.asyncio
+async def test_hedge_not_fired_when_primary_is_fast(_hedge_settings):
+    primary = FakeProvider("primary", [[_entry("2026-02-25 08:00")]])
+    hedge = FakeProvider("hedge", [[_entry("2026-02-25 09:00")]])
+
+    entries = await LLMService(primary, hedge).parse_image(b"img", "image/jpeg")
+    assert entries[0]["occurred_at"] == "2026-02-25 08:00"
+    assert hedge.prompts == []
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_when_primary_is_slow(_hedge_settings):
+    primary = FakeProvider("primary", [[_entry("2026-02-25 08:00")]], delay=5)
+    hedge = FakeProvider("hedge", [[_entry("2026-02-25 09:00")]])
+
+    entries = await LLMService(primary, hedge).parse_image(b"img", "image/jpeg")
+    assert entries[0]["occurred_at"] == "2026-02-25 09:00"
+    await asyncio.sleep(0)
+    assert primary.cancelled
+
+
+@pytest.mark.asyncio
+async def test_hedge_covers_invalid_primary_output(_hedge_settings):
+    primary = FakeProvider("primary", ["not json"])
+    hedge = FakeProvider("hedge", [[_entry("2026-02-25 09:00")]], delay=0.01)
+
+    entries = await LLMService(primary, hedge).parse_image(b"img", "image/jpeg")
+    assert entries[0]["occurred_at"] == "2026-02-25 09:00"
+
+
+@pytest.mark.asyncio
+async def test_hedge_raises_when_both_fail(_hedge_settings):
+    primary = FakeProvider("primary", [RuntimeError("down")])
+    hedge = FakeProvider("hedge", ["[{]"])
+
+    with pytest.raises((RuntimeError, ValueError)):
+        await LLMService(primary, hedge).parse_image(b"img", "image/jpeg")
+
+
+def test_hedge_delay_uses_latency_percentile(_hedge_settings):
+    _hedge_settings.llm_hedge_percentile = 0.9
+    tracker = LatencyTracker()
+    assert tracker.hedge_delay("p") == 0.05
+    for seconds in range(1, 21):
+        tracker.record("p", float(seconds))
+    assert tracker.hedge_delay("p") == 19.0
+
+
+def test_build_provider_rejects_unknown():
+    with pytest.raises(ValueError):
+        build_provider("gemini")
+    assert build_provider("anthropic").name == "anthropic:claude-sonnet-4-20250514"
+
+
+@pytest.mark.asyncio
+async def test_client_registry_shares_one_pooled_http_client(_tmp_settings):
+    _tmp_settings.llm_max_connections = 3
+    _tmp_settings.llm_read_timeout_s = 42
+    registry = ClientRegistry()
+    with patch("app.services.providers.settings", _tmp_settings):
+        provider = registry.get("anthropic", "claude-test")
+        assert registry.get("anthropic", "claude-test") is provider
+        assert registry.get("anthropic", "claude-other") is not provider
+
+    http = provider.client._client  # type: ignore[attr-defined]
+    assert http is registry.get("anthropic", "claude-other").client._client  # type: ignore[attr-defined]
+    assert http.timeout.read == 42
+    assert provider.client.timeout.read == 42  # type: ignore[attr-defined]
+
+    await registry.aclose()
+    assert http.is_closed
+    # Reopens lazily after being closed (e.g. between test apps).
+    assert not registry.get("anthropic", "claude-test").client._client.is_closed  # type: ignore[attr-defined]
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_llm_call_deadline(_hedge_settings):
+    _hedge_settings.llm_request_deadline_s = 0.05
+    slow = FakeProvider("slow", [[_entry("2026-02-25 08:00")]], delay=5)
+
+    with patch("app.services.llm.settings", _hedge_settings), pytest.raises(TimeoutError):
+        await LLMService(slow).parse_image(b"img", "image/jpeg")
+    assert slow.cancelled
+
+
+@pytest.mark.asyncio
+async def test_anthropic_system_prompt_is_cached_and_usage_recorded(client):
+    usage = SimpleNamespace(
+        input_tokens=900,
+        output_tokens=120,
+        cache_read_input_tokens=1800,
+        cache_creation_input_tokens=0,
+    )
+    create = AsyncMock(
+        return_value=SimpleNamespace(
+            content=[SimpleNamespace(text=json.dumps([_entry("2026-02-25 08:00")]))], usage=usage
+        )
+    )
+    provider = AnthropicProvider("claude-test")
+    provider.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    metrics.reset()
+
+    await LLMService(provider).parse_image(b"img", "image/jpeg")
+
+    system = create.await_args.kwargs["system"]
+    assert system[0]["cache_control"] == {"type": "ephemeral"}
+    resp = await client.get("/api/admin/metrics")
+    counters = resp.json()["metrics"]["llm:anthropic:claude-test"]
+    assert counters["cache_hits"] == 1
+    assert counters["cache_read_tokens"] == 1800
+    assert counters["input_tokens"] == 900
+
+
+def test_parse_response_salvages_truncated_output():
+    complete = json.dumps([_entry("2026-02-25 08:00"), _entry("2026-02-25 11:00")])
+    cut = complete[:-1] + ', {"entry_type": "feeding", "subtype": "for'
+
+    entries, note = parse_response(cut, truncated=True)
+
+    assert [e["occurred_at"] for e in entries] == ["2026-02-25 08:00", "2026-02-25 11:00"]
+    assert "cut off" in note
+
+
+def test_parse_response_skips_broken_object():
+    good = json.dumps(_entry("2026-02-25 08:00"))
+    text = f'{{"entries": [{good}, {{"entry_type": "diaper",, }}, {good.replace("08:", "09:")},]}}'
+
+    entries, note = parse_response(text)
+
+    assert [e["occurred_at"] for e in entries] == ["2026-02-25 08:00", "2026-02-25 09:00"]
+    assert "skipped 1" in note
+    assert parse_response(json.dumps({"entries": [_entry("2026-02-25 08:00")]}))[1] is None
+    with pytest.raises(ValueError):
+        parse_response("I could not read this page.")
+
+
+def test_entries_schema_is_strict():
+    item = entries_schema()["properties"]["entries"]["items"]
+    assert item["additionalProperties"] is False
+    assert set(item["required"]) == set(_entry("08:00"))
+    assert item["properties"]["entry_type"]["enum"] == ["feeding", "diaper", "weight", "pills"]
+
+
+@pytest.mark.asyncio
+async def test_anthropic_tool_use_reply_and_partial_upload(client):
+    usage = SimpleNamespace(
+        input_tokens=900,
+        output_tokens=4096,
+        cache_read_input_tokens=0,
+        cache_creation_input_tokens=0,
+    )
+    tool_use = SimpleNamespace(type="tool_use", input={"entries": [_entry("2026-02-25 08:00")]})
+    create = AsyncMock(
+        return_value=SimpleNamespace(content=[tool_use], usage=usage, stop_reason="max_tokens")
+    )
+    provider = AnthropicProvider("claude-test")
+    provider.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post("/api/uploads", files={"file": ("p.jpg", b"page", "image/jpeg")})
+    upload_id = resp.json()["id"]
+    with patch("app.services.upload_processor.LLMService", lambda: LLMService(provider)):
+        await process_upload(upload_id)
+
+    params = create.await_args.kwargs
+    assert params["tool_choice"] == {"type": "tool", "name": "record_entries"}
+    assert params["tools"][0]["input_schema"] == entries_schema()
+    detail = (await client.get(f"/api/uploads/{upload_id}")).json()
+    assert detail["status"] == "done"
+    assert detail["partial"] is True
+    assert "token limit" in detail["error_message"]
+    assert len(detail["entries"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_anthropic_tool_use_cut_off_before_entries(client):
+    usage = SimpleNamespace(
+        input_tokens=900,
+        output_tokens=4096,
+        cache_read_input_tokens=0,
+        cache_creation_input_tokens=0,
+    )
+    tool_use = SimpleNamespace(type="tool_use", input={})
+    create = AsyncMock(
+        return_value=SimpleNamespace(content=[tool_use], usage=usage, stop_reason="max_tokens")
+    )
+    provider = AnthropicProvider("claude-test")
+    provider.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post("/api/uploads", files={"file": ("p.jpg", b"page", "image/jpeg")})
+    upload_id = resp.json()["id"]
+    with patch("app.services.upload_processor.LLMService", lambda: LLMService(provider)):
+        await process_upload(upload_id)
+
+    detail = (await client.get(f"/api/uploads/{upload_id}")).json()
+    assert detail["status"] == "done"
+    assert detail["partial"] is True
+    assert "token limit" in detail["error_message"]
+    assert detail["entries"] == []
+    with pytest.raises(ValueError):
+        parse_response("{}")
+
+
+@pytest.mark.asyncio
+async def test_reparse_image_without_windows_skips_the_call():
+    provider = AsyncMock()
+    assert await LLMService(provider).reparse_image(b"img", "image/jpeg", [], []) == []
+    provider.complete.assert_not_called()
@@ -0,0 +1,72 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db, get_read_db, init_db
+from app.services.maintenance import run_maintenance
+from app.services.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_pragma_profile_applied_to_every_connection(db):
+    for connect in (get_db, get_read_db):
+        async with connect() as conn:
+            values = []
+            for pragma in ("synchronous", "temp_store", "busy_timeout", "cache_size"):
+                cursor = await conn.execute(f"PRAGMA {pragma}")
+                values.append((await cursor.fetchone())[0])
+        assert values == [1, 2, 5000, -8192]
+
+
+@pytest.mark.asyncio
+async def test_existing_database_migrated_to_incremental_vacuum(tmp_path: Path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+    conn.close()
+
+    assert await init_db(path) is True
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_maintenance_checkpoints_and_frees_pages(db):
+    metrics.reset()
+    async with get_db() as conn:
+        await conn.executemany(
+            "INSERT INTO settings (key, value) VALUES (?, ?)",
+            [(f"k{i}", "x" * 500) for i in range(500)],
+        )
+        await conn.commit()
+        await conn.execute("DELETE FROM settings")
+        await conn.commit()
+        cursor = await conn.execute("PRAGMA freelist_count")
+        free = (await cursor.fetchone())[0]
+    assert free > 1
+
+    result = await run_maintenance()
+    assert result.checkpoint_mode == "TRUNCATE"
+    assert result.freed_pages == free
+    async with get_db() as conn:
+        cursor = await conn.execute("PRAGMA freelist_count")
+        assert (await cursor.fetchone())[0] == 0
+    assert result.optimize_ms is not None
+    assert result.checkpointed_pages == result.wal_pages
+    counters = metrics.snapshot()["db_maintenance"]
+    assert counters["checkpoint_runs"] == counters["vacuum_runs"] == 1
+    assert "last_optimize_ms" in counters
+
+
+@pytest.mark.asyncio
+async def test_busy_maintenance_only_checkpoints(client: AsyncClient):
+    result = await run_maintenance(idle=False)
+    assert result.checkpoint_mode == "PASSIVE"
+    assert result.vacuum_ms is None and result.optimize_ms is None
+
+    resp = await client.post("/api/admin/maintenance")
+    assert resp.status_code == 200
+    assert resp.json()["checkpoint_mode"] == "TRUNCATE"
@@ -0,0 +1,112 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db
+from app.services.upload_processor import process_upload, reextract_windows
+
+
+def _extracted(occurred_at: str, value: float, subtype: str = "formula") -> dict:
+    return {
+        "entry_type": "feeding",
+        "subtype": subtype,
+        "occurred_at": occurred_at,
+        "value": value,
+        "notes": None,
+        "raw_text": None,
+        "confidence": "high",
+    }
+
+
+async def _processed_upload(client: AsyncClient, entries: list[dict]) -> int:
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post("/api/uploads", files={"file": ("p.jpg", b"page", "image/jpeg")})
+    upload_id = resp.json()["id"]
+    with patch("app.services.upload_processor.LLMService") as llm:
+        llm.return_value.parse_image = AsyncMock(return_value=entries)
+        await process_upload(upload_id)
+    return upload_id
+
+
+def test_reextract_windows_pad_and_merge():
+    assert reextract_windows(["2026-03-10 08:00", "2026-03-10 08:40", "2026-03-10 12:00"]) == [
+        ("2026-03-10 07:30", "2026-03-10 09:10"),
+        ("2026-03-10 11:30", "2026-03-10 12:30"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reprocess_keeps_confirmed_and_merges_windows(client: AsyncClient):
+    upload_id = await _processed_upload(
+        client,
+        [
+            _extracted("2026-03-10 08:00", 60),
+            _extracted("2026-03-10 11:00", 70),
+            _extracted("2026-03-10 11:20", 5),
+            _extracted("2026-03-10 18:00", 90),
+        ],
+    )
+    entries = (await client.get(f"/api/uploads/{upload_id}")).json()["entries"]
+    by_time = {e["occurred_at"][11:16]: e for e in entries}
+    for hhmm in ("08:00", "18:00"):
+        resp = await client.patch(f"/api/entries/{by_time[hhmm]['id']}", json={"confirmed": True})
+        assert resp.status_code == 200
+
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock) as queued:
+        resp = await client.post(f"/api/uploads/{upload_id}/reprocess?keep_confirmed=true")
+    assert resp.status_code == 200
+    queued.assert_called_once_with(upload_id)
+
+    with patch("app.services.upload_processor.LLMService") as llm:
+        llm.return_value.reparse_image = AsyncMock(
+            return_value=[
+                _extracted("2026-03-10 08:00", 65),  # outside the windows: ignored
+                _extracted("2026-03-10 11:00", 75),  # same feeding, value re-read
+                _extracted("2026-03-10 11:30", 20),  # missed the first time
+            ]
+        )
+        await process_upload(upload_id)
+    _, _, windows, positions = llm.return_value.reparse_image.call_args.args
+    assert windows == [("2026-03-10 10:30", "2026-03-10 11:50")]
+    assert positions == [0.375, 0.625]
+
+    detail = (await client.get(f"/api/uploads/{upload_id}")).json()
+    assert detail["status"] == "done"
+    after = {e["occurred_at"][11:16]: e for e in detail["entries"]}
+    assert sorted(after) == ["08:00", "11:00", "11:30", "18:00"]
+    assert after["08:00"]["value"] == 60 and after["08:00"]["confirmed"]
+    assert after["18:00"]["id"] == by_time["18:00"]["id"]
+    # Updated in place; the 11:20 entry nothing matched is gone.
+    assert after["11:00"]["id"] == by_time["11:00"]["id"]
+    assert after["11:00"]["value"] == 75
+    assert after["11:30"]["value"] == 20
+
+
+@pytest.mark.asyncio
+async def test_reprocess_keep_confirmed_rejects_fully_confirmed(client: AsyncClient):
+    upload_id = await _processed_upload(client, [_extracted("2026-03-10 08:00", 60)])
+    async with get_db() as db:
+        await db.execute("UPDATE entries SET confirmed=1 WHERE upload_id=?", (upload_id,))
+        await db.commit()
+
+    resp = await client.post(f"/api/uploads/{upload_id}/reprocess?keep_confirmed=true")
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_reprocess_with_everything_confirmed_while_queued(client: AsyncClient):
+    upload_id = await _processed_upload(client, [_extracted("2026-03-10 08:00", 60)])
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post(f"/api/uploads/{upload_id}/reprocess?keep_confirmed=true")
+    assert resp.status_code == 200
+    async with get_db() as db:
+        await db.execute("UPDATE entries SET confirmed=1 WHERE upload_id=?", (upload_id,))
+        await db.commit()
+
+    with patch("app.services.upload_processor.LLMService") as llm:
+        await process_upload(upload_id)
+    llm.assert_not_called()
+    detail = (await client.get(f"/api/uploads/{upload_id}")).json()
+    assert detail["status"] == "done"
+    assert [e["value"] for e in detail["entries"]] == [60]
@@ -0,0 +1,101 @@
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db, init_db
+from app.services.search import build_match_query, stem_ru
+from tests.conftest import seed_entry
+
+
+async def _search(client: AsyncClient, q: str, **params) -> dict:
+    resp = await client.get("/api/entries/search", params={"q": q, **params})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_search_matches_raw_text_and_notes(client: AsyncClient):
+    await seed_entry(
+        client, entry_type="pills", subtype="vigantol", raw_text="09:00 Вигантол 2 капли"
+    )
+    await seed_entry(client, raw_text="10:30 поел 40мл маминого", notes="срыгнул после")
+    await seed_entry(client, raw_text="11:00 памперс моча")
+
+    data = await _search(client, "вигантол")
+    assert data["total"] == 1
+    hit = data["hits"][0]
+    assert hit["entry_type"] == "pills"
+    assert "<mark>Вигантол</mark>" in hit["snippet"]
+
+    assert (await _search(client, "срыгнул"))["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_stems_and_folds_yo(client: AsyncClient):
+    await seed_entry(client, raw_text="Вигантол 1 капля", notes="всё хорошо")
+
+    assert (await _search(client, "капли"))["total"] == 1
+    assert (await _search(client, "все"))["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_snippet_escapes_and_keeps_original_text(client: AsyncClient):
+    await seed_entry(client, notes='<img src=x onerror="alert(1)"> ещё ёлочка')
+
+    hit = (await _search(client, "елочка"))["hits"][0]
+    assert hit["snippet"] == (
+        "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; ещё <mark>ёлочка</mark>"
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_phrase_and_pagination(client: AsyncClient):
+    for hour in range(8, 13):
+        await seed_entry(client, occurred_at=f"2026-03-10T{hour:02d}:00:00", raw_text="поел смеси")
+    await seed_entry(client, raw_text="смеси поел")
+
+    phrase = await _search(client, '"поел смеси"')
+    assert phrase["total"] == 5
+
+    page = await _search(client, "смесь", limit=2, offset=4)
+    assert page["total"] == 6
+    assert len(page["hits"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_updates_and_deletes(client: AsyncClient):
+    entry = await seed_entry(client, notes="первый зуб")
+
+    await client.patch(f"/api/entries/{entry['id']}", json={"notes": "температура"})
+    assert (await _search(client, "зуб"))["total"] == 0
+    assert (await _search(client, "температура"))["total"] == 1
+
+    await client.delete(f"/api/entries/{entry['id']}")
+    assert (await _search(client, "температура"))["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_search_index_backfills_existing_entries(client: AsyncClient):
+    await seed_entry(client, notes="старая запись")
+    async with get_db() as db:
+        await db.executescript(
+            "DROP TABLE entries_fts; DROP TRIGGER entries_fts_ai;"
+            " DROP TRIGGER entries_fts_ad; DROP TRIGGER entries_fts_au;"
+            # A database from before schema versioning.
+            " PRAGMA user_version=0;"
+        )
+
+    await init_db()
+    assert (await _search(client, "старая"))["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_empty_query(client: AsyncClient):
+    resp = await client.get("/api/entries/search", params={"q": "  !! "})
+    assert resp.status_code == 400
+
+
+def test_build_match_query():
+    assert stem_ru("маминого") == "мамин"
+    assert stem_ru("поел") == "поел"
+    assert build_match_query('Смеси "ПОЕЛ 40мл"') == '"поел 40мл" AND "смес"*'
+    assert build_match_query("смеси", stemming=False) == '"смеси"*'
@@ -0,0 +1,72 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.database import SCHEMA_VERSION, get_db, init_db
+from app.main import app, lifespan
+from app.services.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_init_db_skips_schema_work_when_version_matches(db):
+    async with get_db() as conn:
+        cursor = await conn.execute("PRAGMA user_version")
+        assert (await cursor.fetchone())[0] == SCHEMA_VERSION
+
+    assert await init_db() is False
+
+
+@pytest.mark.asyncio
+async def test_lifespan_sweeps_left_behind_uploads_and_reports_timings(db, _tmp_settings):
+    async with get_db() as conn:
+        await conn.executemany(
+            "INSERT INTO uploads (filename, filepath, status, batch_id) VALUES (?, ?, ?, ?)",
+            [
+                ("a.jpg", "/tmp/a.jpg", "processing", None),
+                ("b.jpg", "/tmp/b.jpg", "batched", None),
+                ("c.jpg", "/tmp/c.jpg", "batched", "batch-1"),
+                ("d.jpg", "/tmp/d.jpg", "done", None),
+            ],
+        )
+        await conn.commit()
+    metrics.reset()
+
+    process = AsyncMock()
+    with (
+        patch("app.main.settings", _tmp_settings),
+        patch("app.services.upload_processor.process_claimed", process),
+    ):
+        async with lifespan(app):
+            # The first sweep runs right away, without waiting out the interval.
+            await asyncio.sleep(0.1)
+
+    process.assert_awaited_once_with(1)
+    async with get_db() as conn:
+        cursor = await conn.execute("SELECT status FROM uploads ORDER BY id")
+        assert [row[0] for row in await cursor.fetchall()] == [
+            "processing",
+            "pending",
+            "batched",
+            "done",
+        ]
+    counters = metrics.snapshot()["startup"]
+    assert {"init_db_ms", "background_tasks_ms", "ready_ms"} <= counters.keys()
+
+
+def test_importing_app_does_not_load_llm_sdks():
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('anthropic', 'openai', 'httpx') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""
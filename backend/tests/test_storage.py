@@ -0,0 +1,91 @@
+import hashlib
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db
+from app.services.storage import collect_garbage, migrate_legacy_uploads, write_blob
+
+
+async def _upload(client: AsyncClient, content: bytes, name: str = "page.jpg") -> int:
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post("/api/uploads", files={"file": (name, content, "image/jpeg")})
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def _blobs(upload_dir: str) -> list[Path]:
+    return sorted((Path(upload_dir) / "blobs").glob("*/*/*"))
+
+
+@pytest.mark.asyncio
+async def test_same_photo_shares_one_sharded_blob(client: AsyncClient, _tmp_settings):
+    first = await _upload(client, b"same-photo", "a.jpg")
+    second = await _upload(client, b"same-photo", "b.jpg")
+
+    sha = hashlib.sha256(b"same-photo").hexdigest()
+    blob = Path(_tmp_settings.upload_dir) / "blobs" / sha[:2] / sha[2:4] / sha
+    assert _blobs(_tmp_settings.upload_dir) == [blob]
+
+    # Both uploads serve the blob under their own filename.
+    resp = await client.get(f"/api/uploads/{second}/image")
+    assert resp.status_code == 200
+    assert resp.content == b"same-photo"
+
+    # Deletes leave the blob to GC, which removes it once nothing references it.
+    assert (await client.delete(f"/api/uploads/{first}")).status_code == 204
+    assert (await collect_garbage(grace_s=0)).removed == 0
+    assert (await client.delete(f"/api/uploads/{second}")).status_code == 204
+    assert blob.exists()
+    assert (await collect_garbage(grace_s=0)).removed == 1
+    assert not blob.exists()
+
+
+@pytest.mark.asyncio
+async def test_gc_removes_only_orphaned_blobs(client: AsyncClient, _tmp_settings):
+    await _upload(client, b"kept")
+    _, orphan = write_blob(b"orphaned-blob")
+
+    result = await collect_garbage(grace_s=0)
+    assert result.scanned == 2
+    assert result.removed == 1
+    assert result.reclaimed_bytes == len(b"orphaned-blob")
+    assert not (Path(_tmp_settings.upload_dir) / orphan).exists()
+    assert len(_blobs(_tmp_settings.upload_dir)) == 1
+
+
+@pytest.mark.asyncio
+async def test_gc_endpoint_skips_recent_blobs(client: AsyncClient, _tmp_settings):
+    write_blob(b"just-written")
+
+    resp = await client.post("/api/admin/gc")
+    assert resp.status_code == 200
+    assert resp.json()["removed"] == 0
+    assert len(_blobs(_tmp_settings.upload_dir)) == 1
+
+
+@pytest.mark.asyncio
+async def test_migrate_legacy_flat_files(client: AsyncClient, _tmp_settings):
+    legacy = Path(_tmp_settings.upload_dir) / "0f1e_old.jpg"
+    legacy.write_bytes(b"old-photo")
+    async with get_db() as db:
+        cursor = await db.execute(
+            "INSERT INTO uploads (filename, filepath, status) VALUES ('old.jpg', ?, 'done')",
+            (str(legacy),),
+        )
+        await db.commit()
+        upload_id = cursor.lastrowid
+
+    # Legacy absolute paths still resolve before migration.
+    assert (await client.get(f"/api/uploads/{upload_id}/image")).content == b"old-photo"
+
+    assert await migrate_legacy_uploads() == 1
+    assert not legacy.exists()
+    async with get_db() as db:
+        cursor = await db.execute("SELECT filepath, sha256 FROM uploads WHERE id=?", (upload_id,))
+        row = await cursor.fetchone()
+    assert row["sha256"] == hashlib.sha256(b"old-photo").hexdigest()
+    assert row["filepath"].startswith("blobs/")
+    assert (await client.get(f"/api/uploads/{upload_id}/image")).content == b"old-photo"
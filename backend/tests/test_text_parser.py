@@ -0,0 +1,117 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.text_parser import parse_event, parse_text
+
+TODAY = date(2026, 3, 1)
+
+
+@pytest.mark.parametrize(
+    ("segment", "expected"),
+    [
+        (
+            "поел 40мл маминого + 29мл смеси",
+            [("feeding", "breast", 40.0), ("feeding", "formula", 29.0)],
+        ),
+        ("поел 10мл+19мл", [("feeding", "formula", 10.0), ("feeding", "formula", 19.0)]),
+        ("сосала титю", [("feeding", "breast", None)]),
+        ("памперс моча кака", [("diaper", "pee+poo", None)]),
+        ("п. кака", [("diaper", "poo", None)]),
+        ("памперс с какашками и мочой", [("diaper", "pee+poo", None)]),
+        ("памперс пописал и покакал", [("diaper", "pee+poo", None)]),
+        ("подгузник с калом", [("diaper", "poo", None)]),
+        ("подгузник каки", [("diaper", "poo", None)]),
+        ("сухой памперс", [("diaper", "dry", None)]),
+        ("вес 3,45 кг", [("weight", None, 3450.0)]),
+        ("вес 3520 гр", [("weight", None, 3520.0)]),
+        ("вигантол 2 капли", [("pills", "vigantol", None)]),
+    ],
+)
+def test_parse_event(segment, expected):
+    entries = parse_event(segment)
+    assert entries is not None
+    assert [(e["entry_type"], e["subtype"], e["value"]) for e in entries] == expected
+
+
+@pytest.mark.parametrize("segment", ["поел", "памперс", "вес", "гуляли в парке", "поел 40+20мл"])
+def test_parse_event_leaves_ambiguous_text_to_the_llm(segment):
+    assert parse_event(segment) is None
+
+
+def test_parse_text_dates_rollover_and_unparsed_lines():
+    text = """
+    25.02
+    22:30 поел 40мл, памперс моча
+    01:15 поел 30 мл
+    03:00 гуляли
+    27.02 09:00 Вигантол 2 капли
+    без времени
+    """
+    entries, unparsed = parse_text(text, TODAY)
+
+    assert [(e["occurred_at"], e["entry_type"]) for e in entries] == [
+        ("2026-02-25 22:30", "feeding"),
+        ("2026-02-25 22:30", "diaper"),
+        ("2026-02-26 01:15", "feeding"),
+        ("2026-02-27 09:00", "pills"),
+    ]
+    assert entries[0]["raw_text"] == "22:30 поел 40мл, памперс моча"
+    assert entries[-1]["notes"] == "2 капли"
+    assert unparsed == [("2026-02-26", "03:00 гуляли"), ("2026-02-27", "без времени")]
+
+
+@pytest.mark.asyncio
+async def test_text_upload_parses_inline_without_llm(client: AsyncClient):
+    with patch("app.services.upload_processor.LLMService") as llm:
+        resp = await client.post(
+            "/api/uploads/text", json={"text": "10:30 поел 40мл маминого + 29мл смеси"}
+        )
+    llm.assert_not_called()
+    assert resp.status_code == 201
+    assert resp.json()["status"] == "done"
+
+    detail = (await client.get(f"/api/uploads/{resp.json()['id']}")).json()
+    assert detail["kind"] == "text"
+    assert [(e["subtype"], e["value"]) for e in detail["entries"]] == [
+        ("breast", 40),
+        ("formula", 29),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_text_upload_sends_only_unparsed_lines_to_llm(client: AsyncClient):
+    year = datetime.now().year
+    fallback = [
+        {
+            "entry_type": "diaper",
+            "subtype": "poo",
+            "occurred_at": f"{year}-02-25 11:00",
+            "confidence": "medium",
+        }
+    ]
+    with (
+        patch(
+            "app.services.llm.LLMService.parse_text_lines", new_callable=AsyncMock
+        ) as parse_lines,
+        patch("app.services.llm.clients"),
+    ):
+        parse_lines.return_value = fallback
+        resp = await client.post(
+            "/api/uploads/text",
+            json={"text": "25.02\n10:30 поел 40мл\n11:00 обкакался весь"},
+        )
+
+    assert resp.status_code == 201
+    parse_lines.assert_awaited_once_with([(f"{year}-02-25", "11:00 обкакался весь")])
+    detail = (await client.get(f"/api/uploads/{resp.json()['id']}")).json()
+    assert detail["status"] == "done"
+    assert [e["entry_type"] for e in detail["entries"]] == ["feeding", "diaper"]
+
+
+@pytest.mark.asyncio
+async def test_text_upload_rejects_empty_text(client: AsyncClient):
+    resp = await client.post("/api/uploads/text", json={"text": "  \n "})
+    assert resp.status_code == 400
@@ -0,0 +1,93 @@
+import io
+import os
+import random
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.database import get_db
+from app.services.tiering import tier_uploads
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _photo(seed: int = 0) -> bytes:
+    """A noisy full-quality JPEG, standing in for a phone photo."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (160, 120))
+    image.putdata([tuple(rng.randrange(256) for _ in range(3)) for _ in range(160 * 120)])
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=100)
+    return buffer.getvalue()
+
+
+async def _upload(client: AsyncClient, content: bytes, reviewed_days_ago: int | None) -> int:
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post(
+            "/api/uploads", files={"file": ("page.jpg", content, "image/jpeg")}
+        )
+    upload_id = resp.json()["id"]
+    if reviewed_days_ago is not None:
+        async with get_db() as db:
+            await db.execute(
+                "UPDATE uploads SET reviewed=1, reviewed_at=datetime('now', ?) WHERE id=?",
+                (f"-{reviewed_days_ago} days", upload_id),
+            )
+            await db.commit()
+    return upload_id
+
+
+async def _row(upload_id: int):
+    async with get_db() as db:
+        cursor = await db.execute("SELECT filepath, tier FROM uploads WHERE id=?", (upload_id,))
+        return await cursor.fetchone()
+
+
+@pytest.mark.asyncio
+async def test_tier_transcodes_aged_reviewed_uploads(client: AsyncClient, _tmp_settings):
+    photo = _photo()
+    old = await _upload(client, photo, reviewed_days_ago=60)
+    recent = await _upload(client, _photo(seed=1), reviewed_days_ago=1)
+    original_path = Path(_tmp_settings.upload_dir) / (await _row(old))["filepath"]
+    written = time.time() - 60 * 86400
+    os.utime(original_path, (written, written))
+
+    result = await tier_uploads()
+    assert (result.tiered, result.failed) == (1, 0)
+    assert result.bytes_after < result.bytes_before == len(photo)
+
+    row = await _row(old)
+    assert row["tier"] == "webp"
+    assert not original_path.exists()
+    assert (await _row(recent))["tier"] == "original"
+
+    # Served transparently at the same URL, as the transcoded format.
+    resp = await client.get(f"/api/uploads/{old}/image")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(resp.content)).size == (160, 120)
+
+
+@pytest.mark.asyncio
+async def test_tier_keeps_original_touched_by_a_recent_upload(client: AsyncClient, _tmp_settings):
+    old = await _upload(client, _photo(), reviewed_days_ago=60)
+    original_path = Path(_tmp_settings.upload_dir) / (await _row(old))["filepath"]
+
+    # Fresh mtime: the same photo may have just been uploaded again (write_blob), with
+    # its row not inserted yet.
+    assert (await tier_uploads()).tiered == 1
+    assert original_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_tier_skips_blob_shared_with_unreviewed_upload(client: AsyncClient):
+    photo = _photo()
+    reviewed = await _upload(client, photo, reviewed_days_ago=60)
+    await _upload(client, photo, reviewed_days_ago=None)
+
+    result = await tier_uploads()
+    assert result.tiered == 0
+    assert (await _row(reviewed))["tier"] == "original"
@@ -0,0 +1,61 @@
+import pytest
+from httpx import AsyncClient
+
+from tests.conftest import seed_entry
+
+pytest.importorskip("numpy")
+
+
+async def _feedings(client: AsyncClient, ml_by_day: dict[str, int]) -> None:
+    for day, ml in ml_by_day.items():
+        await seed_entry(client, value=ml, occurred_at=f"{day}T08:00:00")
+
+
+@pytest.mark.asyncio
+async def test_moving_average_uses_days_before_range(client: AsyncClient):
+    await _feedings(client, {"2026-03-08": 300, "2026-03-09": 400, "2026-03-10": 500})
+
+    resp = await client.get(
+        "/api/dashboard/trends", params={"from_date": "2026-03-10", "to_date": "2026-03-10"}
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["dates"] == ["2026-03-10"]
+    series = data["series"]["feeding_ml"]
+    assert series["values"] == [500]
+    # The padding days outside the range still count towards the first day's window.
+    assert series["moving_averages"]["3"] == [400]
+    assert series["band_low"][0] < series["band_high"][0]
+    assert data["series"]["feeding_count"]["values"] == [1]
+
+
+@pytest.mark.asyncio
+async def test_trend_slope_and_unlogged_days(client: AsyncClient):
+    await _feedings(
+        client, {"2026-03-01": 400, "2026-03-02": 450, "2026-03-04": 550, "2026-03-05": 600}
+    )
+    await seed_entry(
+        client, entry_type="diaper", subtype="pee", value=None, occurred_at="2026-03-02T09:00:00"
+    )
+    await seed_entry(
+        client, entry_type="diaper", subtype="dry", value=None, occurred_at="2026-03-02T10:00:00"
+    )
+
+    resp = await client.get(
+        "/api/dashboard/trends", params={"from_date": "2026-03-01", "to_date": "2026-03-05"}
+    )
+    series = resp.json()["series"]
+    feeding = series["feeding_ml"]
+    assert feeding["values"] == [400, 450, None, 550, 600]
+    assert feeding["slope_per_day"] == pytest.approx(50)
+    # An unlogged day is skipped, not averaged in as zero.
+    assert feeding["moving_averages"]["3"][2] == 425
+    assert series["diaper_count"]["values"] == [0, 1, None, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_trends_rejects_inverted_range(client: AsyncClient):
+    resp = await client.get(
+        "/api/dashboard/trends", params={"from_date": "2026-03-10", "to_date": "2026-03-01"}
+    )
+    assert resp.status_code == 400
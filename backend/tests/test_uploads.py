@@ -5,6 +5,7 @@ import pytest
 from httpx import AsyncClient
 
 from app.database import get_db
+from app.services.storage import collect_garbage
 
 
 @pytest.mark.asyncio
@@ -96,7 +97,7 @@ async def test_delete_upload_removes_entries_and_file(client: AsyncClient, _tmp_
         cursor = await db.execute("SELECT filepath FROM uploads WHERE id=?", (upload_id,))
         row = await cursor.fetchone()
         assert row is not None
-        filepath = Path(row["filepath"])
+        filepath = Path(_tmp_settings.upload_dir) / row["filepath"]
     assert filepath.exists()
 
     seed_resp = await client.post(
@@ -114,10 +115,11 @@ async def test_delete_upload_removes_entries_and_file(client: AsyncClient, _tmp_
     resp = await client.delete(f"/api/uploads/{upload_id}")
     assert resp.status_code == 204
 
-    # Upload gone, entries gone, file gone.
+    # Upload gone, entries gone, file gone with the next GC pass.
     assert (await client.get(f"/api/uploads/{upload_id}")).status_code == 404
     entries = (await client.get("/api/entries")).json()["entries"]
     assert all(e["upload_id"] != upload_id for e in entries)
+    assert (await collect_garbage(grace_s=0)).removed == 1
     assert not filepath.exists()
 
 
@@ -128,7 +130,7 @@ async def test_delete_upload_not_found(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_delete_upload_missing_file_succeeds(client: AsyncClient):
+async def test_delete_upload_missing_file_succeeds(client: AsyncClient, _tmp_settings):
     with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
         create_resp = await client.post(
             "/api/uploads",
@@ -140,7 +142,7 @@ async def test_delete_upload_missing_file_succeeds(client: AsyncClient):
         cursor = await db.execute("SELECT filepath FROM uploads WHERE id=?", (upload_id,))
         row = await cursor.fetchone()
         assert row is not None
-    Path(row["filepath"]).unlink()
+    (Path(_tmp_settings.upload_dir) / row["filepath"]).unlink()
 
     resp = await client.delete(f"/api/uploads/{upload_id}")
     assert resp.status_code == 204
@@ -0,0 +1,50 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.metrics import metrics
+from app.services.watchdog import LoopWatchdog
+
+
+def _block_the_loop() -> None:
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_captures_stack_of_blocking_call():
+    metrics.reset()
+    async with LoopWatchdog(interval_s=0.01, threshold_s=0.1) as watchdog:
+        _block_the_loop()
+        # Let the heartbeat wake up late and record the lag.
+        await asyncio.sleep(0.05)
+
+    assert len(watchdog.stalls) == 1
+    stall = watchdog.stalls[0]
+    assert stall.blocked_ms >= 100
+    assert "_block_the_loop" in stall.stack
+    event_loop = metrics.snapshot()["event_loop"]
+    assert event_loop["stalls"] == 1
+    assert event_loop["lag_max_ms"] >= 250
+    assert event_loop["lag_bucket_500ms"] == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_round_trip_does_not_block(client: AsyncClient, no_blocking):
+    with patch("app.routers.uploads.process_upload", new_callable=AsyncMock):
+        resp = await client.post(
+            "/api/uploads", files={"file": ("page.jpg", b"x" * 5_000_000, "image/jpeg")}
+        )
+    upload_id = resp.json()["id"]
+    assert (await client.get(f"/api/uploads/{upload_id}/image")).status_code == 200
+    assert (await client.delete(f"/api/uploads/{upload_id}")).status_code == 204
+    assert not no_blocking.stalls
+
+
+@pytest.mark.asyncio
+async def test_stalls_endpoint_when_disabled(client: AsyncClient):
+    resp = await client.get("/api/admin/stalls")
+    assert resp.status_code == 200
+    assert resp.json() == {"enabled": False, "stalls": []}
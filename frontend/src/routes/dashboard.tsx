@@ -5,6 +5,7 @@ import { useState } from 'react'
 import { api } from '../api/client'
 import type {
   AllTimeTotals as AllTimeTotalsData,
+  DashboardBundleResponse,
   DashboardDay,
   DashboardResponse,
   Entry,
@@ -61,40 +62,18 @@ function DashboardPage() {
   const { profile } = useProfile()
   const age = profile.birth_date ? formatAge(profile.birth_date) : null
 
+  // One round trip for the whole page; the backend runs the section queries concurrently.
   const { data, isLoading, isError, error } = useQuery({
-    queryKey: ['dashboard', { from_date, to_date }],
+    queryKey: ['dashboard', 'bundle', { from_date, to_date }],
     queryFn: () =>
-      api.get<DashboardResponse>(`/api/dashboard?from_date=${from_date}&to_date=${to_date}`),
-  })
-
-  const { data: feedingData } = useQuery({
-    queryKey: ['entries', { type: 'feeding', from_date, to_date }],
-    queryFn: () =>
-      api.get<{ entries: Entry[] }>(
-        `/api/entries?type=feeding&from_date=${from_date}&to_date=${to_date}`,
-      ),
-  })
-
-  const { data: diaperData } = useQuery({
-    queryKey: ['entries', { type: 'diaper', from_date, to_date }],
-    queryFn: () =>
-      api.get<{ entries: Entry[] }>(
-        `/api/entries?type=diaper&from_date=${from_date}&to_date=${to_date}`,
+      api.get<DashboardBundleResponse>(
+        `/api/dashboard/bundle?from_date=${from_date}&to_date=${to_date}`,
       ),
   })
-
-  const { data: weightData } = useQuery({
-    queryKey: ['entries', { type: 'weight', from_date, to_date }],
-    queryFn: () =>
-      api.get<{ entries: Entry[] }>(
-        `/api/entries?type=weight&from_date=${from_date}&to_date=${to_date}`,
-      ),
-  })
-
-  const { data: allWeightData } = useQuery({
-    queryKey: ['entries', { type: 'weight', all: true }],
-    queryFn: () => api.get<{ entries: Entry[] }>('/api/entries?type=weight&from_date=2000-01-01'), // sentinel: fetch all-time
-  })
+  const feedingData = data && { entries: data.feedings }
+  const diaperData = data && { entries: data.diapers }
+  const weightData = data && { entries: data.weights }
+  const allWeightData = data && { entries: data.all_weights }
 
   const days = data?.days ?? []
   const yesterdayStr = getRelativeDateStr(-1)
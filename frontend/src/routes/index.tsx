@@ -353,7 +353,7 @@ function UploadPage() {
                       <span style={{ color: BR.cyan }}>scanning…</span>
                     )}
                     {upload.status === 'pending' && <span>queued</span>}
-                    {upload.status === 'failed' && upload.error_message && (
+                    {(upload.status === 'failed' || upload.partial) && upload.error_message && (
                       <span style={{ color: BR.blood }}>· {upload.error_message}</span>
                     )}
                   </div>
@@ -174,7 +174,12 @@ function ReviewPage() {
   })
 
   const rescanMutation = useMutation({
-    mutationFn: (id: number) => api.post(`/api/uploads/${id}/reprocess`, {}),
+    mutationFn: (id: number) => {
+      // Keep what was already confirmed; only the rest of the page is re-read.
+      const current = detailQuery.data?.entries ?? []
+      const keep = current.some((e) => e.confirmed) && current.some((e) => !e.confirmed)
+      return api.post(`/api/uploads/${id}/reprocess${keep ? '?keep_confirmed=true' : ''}`, {})
+    },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['uploads'] })
       queryClient.invalidateQueries({ queryKey: ['upload', uploadId] })
@@ -2,20 +2,23 @@ export type EntryType = 'feeding' | 'diaper' | 'weight' | 'pills'
 export type FeedingSubtype = 'breast' | 'formula'
 export type DiaperSubtype = 'pee' | 'poo' | 'dry' | 'pee+poo'
 export type PillsSubtype = 'vigantol'
-export type UploadStatus = 'pending' | 'processing' | 'done' | 'failed'
+export type UploadStatus = 'pending' | 'processing' | 'batched' | 'done' | 'failed'
 export type Confidence = 'high' | 'medium' | 'low'
+export type UploadKind = 'image' | 'text'
 
 export interface Upload {
   id: number
   filename: string
   status: UploadStatus
   error_message: string | null
+  partial?: boolean
   entry_count?: number
   date_counts?: Record<string, number>
   created_at: string
   processed_at: string | null
   reviewed: boolean
   reviewed_at: string | null
+  kind?: UploadKind
 }
 
 export interface Entry {
@@ -30,19 +33,37 @@ export interface Entry {
   confidence: Confidence | null
   raw_text: string | null
   confirmed: boolean
+  duplicate_of?: number | null
   created_at: string
   updated_at: string
 }
 
+export interface DuplicateCluster {
+  entries: Entry[]
+}
+
+export interface ChangesResponse {
+  version: number
+  reset: boolean
+  has_more: boolean
+  snapshot: boolean
+  entries: Entry[]
+  uploads: Upload[]
+  deleted_entries: number[]
+  deleted_uploads: number[]
+}
+
 export interface UploadDetail {
   id: number
   filename: string
   status: UploadStatus
   error_message: string | null
+  partial?: boolean
   created_at: string
   processed_at: string | null
   reviewed: boolean
   reviewed_at: string | null
+  kind?: UploadKind
   entries: Entry[]
 }
 
@@ -74,3 +95,27 @@ export interface DashboardResponse {
   previous_weight: { value: number; occurred_at: string; date: string } | null
   all_time_totals: AllTimeTotals | null
 }
+
+export interface TrendSeries {
+  values: (number | null)[]
+  moving_averages: Record<'3' | '7' | '14', (number | null)[]>
+  slope_per_day: number | null
+  band_low: (number | null)[]
+  band_high: (number | null)[]
+}
+
+export interface TrendsResponse {
+  from_date: string
+  to_date: string
+  dates: string[]
+  band_days: number
+  band_percentiles: number[]
+  series: Record<'feeding_ml' | 'feeding_count' | 'diaper_count', TrendSeries>
+}
+
+export interface DashboardBundleResponse extends DashboardResponse {
+  feedings: Entry[]
+  diapers: Entry[]
+  weights: Entry[]
+  all_weights: Entry[]
+}
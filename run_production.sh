@@ -0,0 +1,10 @@
+#!/bin/bash
+# Serve the backend with several worker processes (WORKERS, default: one per CPU).
+# Workers claim uploads under renewable leases, so none is lost or processed twice,
+# and one of them (holding scheduler.lock next to the database) runs the schedulers.
+set -e
+cd "$(dirname "$0")/backend"
+# Migrate once up front rather than racing the workers' startup against each other.
+uv run python -m app.cli migrate
+uv run fastapi run app/main.py --host 0.0.0.0 --port "${BACKEND_PORT:-3849}" \
+    --workers "${WORKERS:-$(getconf _NPROCESSORS_ONLN)}"